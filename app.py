@@ -5,7 +5,31 @@ import shutil
 import datetime as dt
 import subprocess
 import re
-from flask import Flask, request, render_template_string, Response, send_from_directory, jsonify
+import time
+import queue
+import threading
+import collections
+import itertools
+import uuid
+import fnmatch
+import hashlib
+import gzip
+import mimetypes
+import sqlite3
+import mmap
+import tempfile
+import bisect
+import heapq
+import statistics
+import asyncio
+import socket
+import signal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, request, render_template, Response, send_from_directory, send_file, jsonify
+from markupsafe import escape
+from werkzeug.security import safe_join
+from werkzeug.datastructures import MultiDict
+from urllib.parse import parse_qsl, urlencode
 
 # === CONFIGS ===
 PROJECT_DIR = os.path.abspath(os.path.dirname(__file__))   # dossier d'où est lancé app.py
@@ -16,8 +40,91 @@ GIT_PATHS_FILE = os.path.join(PROJECT_DIR, "git_path.txt")
 BASE_CONFIG_FOR_CMD = os.path.join(PROJECT_DIR, "user_data", "config_base.json")
 CONFIGS_DIR = os.path.join(PROJECT_DIR, "user_data", "configs")
 EXCHANGE_CONFIG_PATH = os.path.join(CONFIGS_DIR, "config_exchange.json")
+WORKSPACES_DIR = os.path.join(PROJECT_DIR, "user_data", ".workspaces")   # copies de strategies/ par job
+DATA_DIR = os.path.join(PROJECT_DIR, "user_data", "data")
+BACKTEST_RESULTS_DIR = os.path.join(PROJECT_DIR, "user_data", "backtest_results")
+BT_CACHE_DIR = os.path.join(PROJECT_DIR, "user_data", ".cache", "backtest")
+INVENTORY_CACHE_PATH = os.path.join(PROJECT_DIR, "user_data", ".cache", "ohlcv_inventory.json")
+HISTORY_START_PATH = os.path.join(PROJECT_DIR, "user_data", ".cache", "ohlcv_history_start.json")   # 1re bougie dispo à l'exchange
+BT_CACHE_MAX_ENTRIES = 200                 # éviction LRU au-delà ...
+BT_CACHE_MAX_BYTES = 512 * 1024 * 1024     # ... ou au-delà de cette taille totale
+RESULTS_DB_PATH = os.path.join(PROJECT_DIR, "user_data", "results.sqlite3")   # résultats structurés backtest/hyperopt
+
+DOWNLOAD_MAX_PARALLEL = 4          # plafond de process download-data simultanés
+DOWNLOAD_SPAWN_INTERVAL_S = 1.5    # délai mini entre 2 lancements (ménage le rate-limit de l'exchange)
+RESAMPLE_MAX_WORKERS = 4          # paires rééchantillonnées en parallèle après le download
+DOWNLOAD_USE_PREPEND = True        # trous en début de série : --prepend (freqtrade >= 2023.2) au lieu d'un re-téléchargement complet
+
+WF_DEFAULT_WINDOWS = 4             # walk-forward : nombre de fenêtres par défaut ...
+WF_MAX_WINDOWS = 24                # ... et plafond
+WF_DEFAULT_OOS_PCT = 25            # part hors échantillon (OOS) de chaque fenêtre quand l'échantillon (IS) est optimisé
+
+FT_ZYGOTE = True                   # process freqtrade pré-chauffé (fork par commande, Linux/macOS) ; False = Popen classique
+FT_ZYGOTE_SCRIPT = os.path.join(PROJECT_DIR, "ft_zygote.py")
+FT_ZYGOTE_SOCKET = os.path.join(tempfile.gettempdir(), f"ft_zygote_{hashlib.sha1(PROJECT_DIR.encode()).hexdigest()[:10]}.sock")
+
+JOB_RING_SIZE = 20000              # événements SSE gardés par job (rejeu après reconnexion)
+JOB_SUBSCRIBER_QUEUE = 2000        # file par client abonné ; au-delà il se resynchronise depuis le buffer du job
+JOB_KEEP_S = 6 * 3600              # durée de conservation d'un job terminé
+JOB_KEEPALIVE_S = 15               # intervalle des commentaires keepalive SSE
+JOB_CPU_RESERVE = 0                # cœurs jamais attribués aux jobs (bot live, système) ; capacité = nb_cpu - réserve
+JOB_DEFAULT_DURATION_S = 600       # durée supposée d'un job sans historique (estimation du démarrage en file)
+SSE_BATCH_WINDOW_S = 0.1           # flux ?batch=1 : événements regroupés par fenêtre en une frame "batch" (0 = désactivé)
+SSE_COALESCE_EVENTS = {"progress", "hopt_progress", "queue"}   # dans une frame "batch", seule la dernière valeur est gardée
+SERVER_ASYNC = False               # True (ou `python app.py --async`) : serveur asyncio/uvicorn, flux SSE sans thread par client
+ASYNC_WSGI_WORKERS = 16            # threads du pont WSGI pour les routes Flask classiques en mode asynchrone
+
+METRICS_LATENCY_BUCKETS_S = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)   # /metrics : lancement, 1re sortie, flush
+METRICS_DURATION_BUCKETS_S = (1, 5, 15, 60, 300, 900, 1800, 3600, 7200, 14400, 43200)  # /metrics : durées de jobs / process
+
+LOG_FLUSH_BYTES = 64 * 1024        # flush du log dès que le buffer dépasse cette taille
+LOG_FLUSH_INTERVAL_S = 1.0         # ... ou au plus tard après ce délai
+LOG_CATALOG_PATH = os.path.join(LOG_DIR, "catalog.sqlite3")   # une ligne par run (métadonnées des logs)
+LOGS_PAGE_SIZE = 100               # lignes par page de /logs/
+LOG_VIEW_LINES = 500               # lignes par fenêtre du visualiseur de log
+LOG_VIEW_MAX_BYTES = 256 * 1024    # plafond d'octets renvoyés par requête de plage / chunk de suivi
+LOG_INDEX_BLOCK = 256 * 1024       # un point d'index (offset, n° de ligne) tous les ~256 Ko
+LOG_TAIL_POLL_S = 0.5              # période de scrutation du suivi en direct
+LOG_SEARCH_MAX_MATCHES = 500       # résultats max par requête de recherche
+LOG_RETENTION = {                  # politique par action ("*" = défaut) ; None = pas de limite
+    "*":        {"max_age_days": 90,  "max_count": 300, "max_bytes": 500 * 1024 * 1024},
+    "hyperopt": {"max_age_days": 180, "max_count": 200, "max_bytes": 2 * 1024 * 1024 * 1024},
+    "download": {"max_age_days": 30,  "max_count": 100, "max_bytes": 100 * 1024 * 1024},
+}
+LOG_COMPRESS_MIN_AGE_S = 60        # compression des logs terminés depuis au moins ce délai
+LOG_RETENTION_INTERVAL_S = 15 * 60 # période du worker de rétention / compression
+LOG_UNPACK_DIR = os.path.join(LOG_DIR, ".unpacked")   # copies décompressées pour le visualiseur
+LOG_UNPACKED_KEEP_S = 3600         # ... supprimées après 1 h sans consultation
 # ===============
 
+try:
+    import brotli   # optionnel : pip install brotli
+except ImportError:
+    brotli = None
+
+try:
+    import pyarrow.ipc        # optionnel (installé avec freqtrade) : lecture des fichiers .feather / .parquet
+    import pyarrow.parquet
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
+try:
+    import pandas as pd   # optionnel (installé avec freqtrade) : rééchantillonnage local des timeframes
+except ImportError:
+    pd = None
+
+try:
+    import uvicorn   # optionnel (installé avec freqtrade) : mode serveur asynchrone
+    from uvicorn.middleware.wsgi import WSGIMiddleware
+except ImportError:
+    uvicorn = None
+
+try:
+    import zstandard   # optionnel : pip install zstandard (sinon les logs sont compressés en gzip)
+except ImportError:
+    zstandard = None
+
 app = Flask(__name__)
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -50,33 +157,72 @@ def win_quote(arg: str):
         return '"' + arg.replace('"', r'\"') + '"'
     return arg
 
+def path_signature(path: str):
+    """(mtime_ns, taille, inode) d'un fichier/dossier, None s'il n'existe pas."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+class MtimeCache:
+    """
+    Garde le résultat de `loader()` tant que la signature (mtime/taille) des chemins surveillés ne change pas.
+    Pour un dossier, l'mtime bouge à chaque création / suppression / renommage d'entrée.
+    """
+
+    def __init__(self, loader, paths):
+        self.loader = loader
+        self._paths = paths if callable(paths) else (lambda: paths)
+        self._lock = threading.Lock()
+        self._sig = None
+        self._value = None
+        self._loaded = False
+
+    def signature(self):
+        return tuple(path_signature(p) for p in self._paths())
+
+    def get(self):
+        sig = self.signature()
+        with self._lock:
+            if self._loaded and self._sig == sig:
+                return self._value
+        value = self.loader()
+        with self._lock:
+            self._value, self._sig, self._loaded = value, sig, True
+        return value
+
 def strategies_dir():
     return os.path.join(PROJECT_DIR, "user_data", "strategies")
 
-def list_strategies():
+def _scan_strategies_dir():
     sdir = strategies_dir()
     if not os.path.isdir(sdir):
-        return []
-    return sorted(os.path.splitext(fn)[0] for fn in os.listdir(sdir) if fn.endswith(".py"))
-
-def list_strategy_jsons():
-    sdir = strategies_dir()
-    if not os.path.isdir(sdir):
-        return []
-    out = []
-    for fn in os.listdir(sdir):
+        return [], [], []
+    names = os.listdir(sdir)
+    strategies = sorted(os.path.splitext(fn)[0] for fn in names if fn.endswith(".py"))
+    jsons = []
+    for fn in names:
         if not fn.endswith(".json"):
             continue
         if fn.endswith(".json.bak") or fn.endswith(".json.tmp") or fn.endswith(".json.tmpbak"):
             continue
-        out.append(fn)
-    return sorted(out)
+        jsons.append(fn)
+    jsons.sort()
+    return strategies, jsons, [fn for fn in jsons if not fn.startswith("BAK_")]
+
+_strategies_listing = MtimeCache(_scan_strategies_dir, lambda: [strategies_dir()])
+
+def list_strategies():
+    return list(_strategies_listing.get()[0])
+
+def list_strategy_jsons():
+    return list(_strategies_listing.get()[1])
 
 def list_strategy_jsons_no_bakprefix():
-    all_jsons = list_strategy_jsons()
-    return [fn for fn in all_jsons if not fn.startswith("BAK_")]
+    return list(_strategies_listing.get()[2])
 
-def read_git_paths_list():
+def _load_git_paths_list():
     if not os.path.exists(GIT_PATHS_FILE):
         return []
     with open(GIT_PATHS_FILE, "r", encoding="utf-8", errors="ignore") as f:
@@ -89,6 +235,11 @@ def read_git_paths_list():
         out.append(os.path.normpath(p))
     return out
 
+_git_paths = MtimeCache(_load_git_paths_list, [GIT_PATHS_FILE])
+
+def read_git_paths_list():
+    return list(_git_paths.get())
+
 def cpu_count_safe():
     try:
         return max(1, os.cpu_count() or 1)
@@ -108,6 +259,8 @@ def unique_path(dirpath: str, filename: str) -> str:
         i += 1
     return cand
 
+RESULT_NAME_LOCK = threading.Lock()   # sérialise unique_path() + déplacement entre jobs concurrents
+
 HYPEROPT_LOSSES = [
     ("ShortTradeDurHyperOptLoss", "ShortTradeDurHyperOptLoss", "Favorise profits avec durée de trade courte."),
     ("OnlyProfitHyperOptLoss", "OnlyProfitHyperOptLoss", "Optimise uniquement le profit brut."),
@@ -123,16 +276,19 @@ HYPEROPT_LOSSES = [
     ("MultiMetricHyperOptLoss", "MultiMetricHyperOptLoss", "Combine plusieurs métriques (profit/risque)."),
 ]
 
-# ---------- pair_whitelist robuste ----------
-def read_pair_whitelist_from_exchange_config():
-    """Renvoie la liste des paires depuis config_exchange.json (profond ou non)."""
-    path = EXCHANGE_CONFIG_PATH
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        return []
+# ---------- Config freqtrade (fusionnée + cache) ----------
+def deep_merge_dicts(source: dict, destination: dict) -> dict:
+    """Fusion récursive façon freqtrade : les clés de `source` l'emportent, les dicts sont fusionnés."""
+    out = dict(destination)
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = deep_merge_dicts(value, out[key])
+        else:
+            out[key] = value
+    return out
 
+def extract_pair_whitelist(data: dict):
+    """Liste des paires d'une config (pairlists StaticPairList, exchange, racine, ou première trouvée en profondeur)."""
     def _clean_list(lst):
         return [p for p in lst if isinstance(p, str) and p.strip()]
 
@@ -147,6 +303,10 @@ def read_pair_whitelist_from_exchange_config():
             if isinstance(item, dict) and isinstance(item.get("pair_whitelist"), list):
                 return _clean_list(item["pair_whitelist"])
 
+    exch = data.get("exchange")
+    if isinstance(exch, dict) and isinstance(exch.get("pair_whitelist"), list):
+        return _clean_list(exch["pair_whitelist"])
+
     wl_root = data.get("pair_whitelist")
     if isinstance(wl_root, list):
         return _clean_list(wl_root)
@@ -171,17 +331,565 @@ def read_pair_whitelist_from_exchange_config():
         return _clean_list(deep)
     return []
 
+class ConfigService:
+    """
+    Config freqtrade effective : config_base.json + chaîne add_config_files, fusionnées dans l'ordre de freqtrade
+    (un fichier l'emporte sur ceux qu'il inclut, un include l'emporte sur les précédents).
+    Le résultat reste en mémoire tant qu'aucun des fichiers lus ne change (mtime/taille).
+    """
+
+    def __init__(self, base_path: str, fallback_path: str | None = None):
+        self.base_path = base_path
+        self.fallback_path = fallback_path
+        self._lock = threading.Lock()
+        self._files = []
+        self._sig = None
+        self._merged = {}
+        self._derived = {}
+        self.errors = []
+
+    def _load_file(self, path, files, sigs, seen):
+        path = os.path.normpath(path)
+        if path in seen:
+            self.errors.append(f"inclusion circulaire ignorée : {path}")
+            return {}
+        seen = seen | {path}
+        files.append(path)
+        sigs.append(path_signature(path))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            self.errors.append(f"fichier absent : {path}")
+            return {}
+        except Exception as e:
+            self.errors.append(f"{path} : {e}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        subs = data.get("add_config_files") or []
+        merged_subs = {}
+        for sub in subs:
+            sub_path = sub if os.path.isabs(sub) else os.path.join(os.path.dirname(path), sub)
+            merged_subs = deep_merge_dicts(self._load_file(sub_path, files, sigs, seen), merged_subs)
+        return deep_merge_dicts(data, merged_subs)
+
+    def _root(self):
+        if self.fallback_path and not os.path.exists(self.base_path):
+            return self.fallback_path
+        return self.base_path
+
+    def signature(self):
+        with self._lock:
+            files = list(self._files) or [self._root()]
+        return tuple(path_signature(p) for p in files) + (path_signature(self.base_path),)
+
+    def get(self) -> dict:
+        with self._lock:
+            if self._files and self._sig == tuple(path_signature(p) for p in self._files) and self._root() == self._files[0]:
+                return self._merged
+            self.errors = []
+            files, sigs = [], []
+            merged = self._load_file(self._root(), files, sigs, frozenset())
+            merged.pop("add_config_files", None)
+            self._merged, self._files, self._sig, self._derived = merged, files, tuple(sigs), {}
+            return merged
+
+    def _cached(self, name, fn):
+        merged = self.get()
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = fn(merged)
+            return self._derived[name]
+
+    def pairs(self):
+        return list(self._cached("pairs", extract_pair_whitelist))
+
+    def timeframe(self):
+        return self._cached("timeframe", lambda c: c.get("timeframe"))
+
+    def stake_currency(self):
+        return self._cached("stake_currency", lambda c: c.get("stake_currency"))
+
+    def exchange_name(self):
+        return self._cached("exchange_name", lambda c: (c.get("exchange") or {}).get("name") if isinstance(c.get("exchange"), dict) else None)
+
+    def files(self):
+        self.get()
+        with self._lock:
+            return list(self._files)
+
+CONFIG = ConfigService(BASE_CONFIG_FOR_CMD, fallback_path=EXCHANGE_CONFIG_PATH)
+
+def read_pair_whitelist_from_exchange_config():
+    """Paires de la config fusionnée (pair_whitelist de config_exchange.json via add_config_files), servies depuis la mémoire."""
+    return CONFIG.pairs()
+
+# ---------- Données OHLCV ----------
+OHLCV_EXTENSIONS = {"feather": ".feather", "parquet": ".parquet", "json": ".json", "jsongz": ".json.gz", "hdf5": ".h5"}
+JSON_TS_HEAD_RE = re.compile(rb"^\s*\[\s*\[\s*(\d+)")
+JSON_TS_TAIL_RE = re.compile(rb"\[\s*(\d+)\s*,[^\[\]]*\]\s*\]\s*$")
+TIMEFRAME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "M": 2592000}
+
+def timeframe_seconds(tf: str) -> int:
+    m = re.fullmatch(r"(\d+)([smhdwM])", tf or "")
+    if not m:
+        raise ValueError(f"timeframe invalide : {tf}")
+    return int(m.group(1)) * TIMEFRAME_UNITS[m.group(2)]
+
+def pair_to_filename(pair: str) -> str:
+    """Même convention que freqtrade (misc.pair_to_filename)."""
+    for ch in ["/", " ", ".", "@", "$", "+", ":"]:
+        pair = pair.replace(ch, "_")
+    return pair
+
+def ohlcv_data_dir() -> str:
+    cfg = CONFIG.get()
+    datadir = cfg.get("datadir")
+    if datadir:
+        return datadir if os.path.isabs(datadir) else os.path.join(PROJECT_DIR, datadir)
+    return os.path.join(DATA_DIR, CONFIG.exchange_name() or "")
+
+def ohlcv_file_candidates(pair: str, tf: str):
+    """Chemins possibles du fichier OHLCV d'une paire (format configuré en premier)."""
+    cfg = CONFIG.get()
+    futures = cfg.get("trading_mode") == "futures"
+    base_dir = os.path.join(ohlcv_data_dir(), "futures") if futures else ohlcv_data_dir()
+    stem = f"{pair_to_filename(pair)}-{tf}" + ("-futures" if futures else "")
+    preferred = cfg.get("dataformat_ohlcv") or "feather"
+    formats = [preferred] + [f for f in OHLCV_EXTENSIONS if f != preferred]
+    return [os.path.join(base_dir, stem + OHLCV_EXTENSIONS[f]) for f in formats if f in OHLCV_EXTENSIONS]
+
+def find_ohlcv_file(pair: str, tf: str):
+    for path in ohlcv_file_candidates(pair, tf):
+        if os.path.isfile(path):
+            return path
+    return None
+
+def _to_ms(value) -> int:
+    if hasattr(value, "timestamp"):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+def read_ohlcv_bounds(path: str):
+    """
+    {first, last (ms epoch), rows} d'un fichier OHLCV en ne lisant que le minimum :
+    premier/dernier batch Arrow (.feather), statistiques du footer (.parquet), début/fin du texte (.json).
+    None si le format n'est pas lisible ici (ex. .h5, ou pyarrow absent).
+    """
+    if path.endswith(".feather"):
+        if pyarrow is None:
+            return None
+        with pyarrow.ipc.open_file(pyarrow.memory_map(path, "r")) as reader:
+            n = reader.num_record_batches
+            if n == 0:
+                return {"first": None, "last": None, "rows": 0}
+            head = reader.get_batch(0).column("date")
+            tail = reader.get_batch(n - 1).column("date")
+            rows = len(head) if n == 1 else None   # sinon il faudrait décompresser tous les batchs
+            if len(head) == 0:
+                return {"first": None, "last": None, "rows": rows}
+            return {"first": _to_ms(head[0].as_py()), "last": _to_ms(tail[-1].as_py()), "rows": rows}
+    if path.endswith(".parquet"):
+        if pyarrow is None:
+            return None
+        meta = pyarrow.parquet.ParquetFile(path).metadata
+        col = meta.schema.names.index("date")
+        first = last = None
+        for i in range(meta.num_row_groups):
+            stats = meta.row_group(i).column(col).statistics
+            if stats is None or not stats.has_min_max:
+                return None
+            first = stats.min if first is None else min(first, stats.min)
+            last = stats.max if last is None else max(last, stats.max)
+        return {"first": None if first is None else _to_ms(first), "last": None if last is None else _to_ms(last),
+                "rows": meta.num_rows}
+    if path.endswith(".json") or path.endswith(".json.gz"):
+        if path.endswith(".gz"):
+            with gzip.open(path, "rb") as f:
+                data = f.read()
+            head, tail = data[:256], data[-512:]
+        else:
+            size = os.path.getsize(path)
+            with open(path, "rb") as f:
+                head = f.read(256)
+                f.seek(max(0, size - 512))
+                tail = f.read()
+        mh, mt = JSON_TS_HEAD_RE.search(head), JSON_TS_TAIL_RE.search(tail)
+        if not (mh and mt):
+            return {"first": None, "last": None, "rows": 0} if head.strip() in (b"", b"[]") else None
+        return {"first": int(mh.group(1)), "last": int(mt.group(1)), "rows": None}
+    return None
+
+def _ymd(ms: int) -> str:
+    return dt.datetime.fromtimestamp(ms / 1000, dt.timezone.utc).strftime("%Y%m%d")
+
+_HISTORY_START_LOCK = threading.Lock()
+
+def load_history_starts() -> dict:
+    """{chemin OHLCV: 1re bougie (ms)} des fichiers dont l'exchange n'a pas d'historique plus ancien."""
+    try:
+        with open(HISTORY_START_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def record_history_starts(tasks, start_ymd):
+    """
+    Après des downloads réussis depuis start_ymd (new, head, --erase) : un fichier qui commence encore après
+    start_ymd correspond à une paire listée plus tard. Sa 1re bougie est mémorisée pour que
+    plan_incremental_download ne relance pas un --prepend inutile à chaque rafraîchissement.
+    Renvoie le nombre de fichiers mémorisés.
+    """
+    start_ms = int(dt.datetime.strptime(start_ymd, "%Y%m%d").replace(tzinfo=dt.timezone.utc).timestamp() * 1000)
+    found = {}
+    for _label, tf, pairs, steps in tasks:
+        if not any(timerange in (None, f"{start_ymd}-") for timerange, _prepend in steps):
+            continue
+        tf_ms = timeframe_seconds(tf) * 1000
+        for pair in pairs:
+            path = find_ohlcv_file(pair, tf)
+            try:
+                bounds = read_ohlcv_bounds(path) if path else None
+            except Exception:
+                bounds = None
+            if bounds and bounds["first"] is not None and bounds["first"] - start_ms >= tf_ms:
+                found[path] = bounds["first"]
+    if found:
+        with _HISTORY_START_LOCK:
+            starts = load_history_starts()
+            starts.update(found)
+            ensure_dir(os.path.dirname(HISTORY_START_PATH))
+            tmp = HISTORY_START_PATH + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(starts, f)
+            os.replace(tmp, HISTORY_START_PATH)
+    return len(found)
+
+def plan_incremental_download(tfs, pairs, start_ymd, *, chunk_size=0, now=None):
+    """
+    Plan de download limité aux trous réels : pour chaque (paire, timeframe), compare le fichier OHLCV
+    existant à [start_ymd, maintenant] et regroupe les paires par plage à télécharger.
+    Renvoie (tâches [(label, tf, paires, étapes [(timerange, prepend), ...])], stats).
+      - "new"  : pas de fichier            -> --timerange start-
+      - "head" : données après start        -> --prepend --timerange start-  (freqtrade s'arrête à la 1re bougie)
+      - "tail" : dernière bougie dépassée   -> --timerange <aujourd'hui>-    (freqtrade repart de la dernière bougie)
+      - "head+tail" : les deux, en séquence dans une même tâche (chaque download réécrit le fichier entier :
+        deux process en parallèle sur le même fichier perdraient l'un des deux ajouts)
+    Pas de "head" pour un fichier dont la 1re bougie est celle mémorisée par record_history_starts()
+    (paire listée après start_ymd : l'exchange n'a rien de plus ancien).
+    """
+    now_ms = int((now or time.time()) * 1000)
+    start_ms = int(dt.datetime.strptime(start_ymd, "%Y%m%d").replace(tzinfo=dt.timezone.utc).timestamp() * 1000)
+    today = _ymd(now_ms)
+    groups = collections.OrderedDict()
+    stats = {"up_to_date": 0, "new": 0, "head": 0, "tail": 0, "unreadable": 0, "listed_later": 0}
+    history_starts = load_history_starts()
+
+    for tf in tfs:
+        tf_ms = timeframe_seconds(tf) * 1000
+        for pair in pairs:
+            path = find_ohlcv_file(pair, tf)
+            bounds = None
+            if path:
+                try:
+                    bounds = read_ohlcv_bounds(path)
+                except Exception:
+                    bounds = None
+                if bounds is None:
+                    stats["unreadable"] += 1
+            if not bounds or bounds["first"] is None:
+                groups.setdefault((tf, "new"), []).append(pair)
+                stats["new"] += 1
+                continue
+            head = bounds["first"] - start_ms >= tf_ms
+            if head and history_starts.get(path) == bounds["first"]:
+                head = False
+                stats["listed_later"] += 1
+            tail = now_ms - bounds["last"] >= 2 * tf_ms
+            if head and not DOWNLOAD_USE_PREPEND:
+                groups.setdefault((tf, "new"), []).append(pair)   # re-téléchargement complet : inclut la fin
+                stats["new"] += 1
+                continue
+            if head or tail:
+                groups.setdefault((tf, "+".join(k for k, on in (("head", head), ("tail", tail)) if on)), []).append(pair)
+                stats["head"] += head
+                stats["tail"] += tail
+            else:
+                stats["up_to_date"] += 1
+
+    steps = {"new": [(f"{start_ymd}-", False)], "head": [(f"{start_ymd}-", True)], "tail": [(f"{today}-", False)]}
+    steps["head+tail"] = steps["head"] + steps["tail"]
+    tasks = []
+    chunk_size = int(chunk_size or 0)
+    for (tf, kind), group_pairs in groups.items():
+        size = chunk_size if chunk_size > 0 else len(group_pairs)
+        for i in range(0, len(group_pairs), size):
+            label = f"{tf}:{kind}" + (f"#{i // size + 1}" if size < len(group_pairs) else "")
+            tasks.append((label, tf, group_pairs[i:i + size], steps[kind]))
+    stats["steps"] = sum(len(t[2]) * len(t[3]) for t in tasks)
+    return tasks, stats
+
+# ---------- Inventaire des données OHLCV ----------
+OHLCV_FILE_RE = re.compile(r"^(?P<pair>.+)-(?P<tf>\d+[smhdwM])(?P<futures>-futures)?(?P<ext>\.feather|\.parquet|\.json\.gz|\.json|\.h5)$")
+
+def read_ohlcv_dates(path: str):
+    """Horodatages (ms epoch) de toutes les bougies ; seule la colonne date est lue quand le format le permet."""
+    if path.endswith(".feather") or path.endswith(".parquet"):
+        if pyarrow is None:
+            return None
+        if path.endswith(".parquet"):
+            col = pyarrow.parquet.read_table(path, columns=["date"]).column("date")
+        else:
+            col = pyarrow.feather.read_table(path, columns=["date"], memory_map=True).column("date")
+        unit = getattr(col.type, "unit", "ms")
+        div = {"s": 0.001, "ms": 1, "us": 1000, "ns": 1000000}[unit]
+        return [int(v / div) for v in col.cast(pyarrow.int64()).to_pylist()]
+    if path.endswith(".json") or path.endswith(".json.gz"):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            return [int(row[0]) for row in json.load(f)]
+    return None
+
+INVENTORY_MAX_GAP_RANGES = 200    # trous mémorisés par fichier (pour savoir s'ils tombent dans la plage demandée)
+
+def count_gaps(dates, tf_ms: int):
+    """(nombre de trous, bougies manquantes, [[dernière bougie avant, première après], ...]) d'une série triée."""
+    gaps = missing = 0
+    ranges = []
+    prev = None
+    for t in dates:
+        if prev is not None and t - prev > tf_ms:
+            gaps += 1
+            missing += (t - prev) // tf_ms - 1
+            if len(ranges) < INVENTORY_MAX_GAP_RANGES:
+                ranges.append([prev, t])
+        prev = t
+    return gaps, missing, ranges
+
+class OhlcvInventory:
+    """
+    Index des fichiers OHLCV : première/dernière bougie, nombre de lignes et de trous par (paire, timeframe).
+    Un fichier n'est relu que si sa signature (mtime/taille/inode) change ; l'index est persisté entre deux lancements.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._entries = {}     # chemin -> enregistrement
+        self._loaded = False
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+        self._loaded = True
+
+    def _save(self):
+        ensure_dir(os.path.dirname(self.cache_path))
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.cache_path)
+
+    @staticmethod
+    def _scan_dirs():
+        base = ohlcv_data_dir()
+        return [d for d in (base, os.path.join(base, "futures")) if os.path.isdir(d)]
+
+    def refresh(self):
+        """Met l'index à jour (fichiers ajoutés / modifiés / supprimés) ; renvoie le nombre de fichiers relus."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            seen, changed = set(), 0
+            for d in self._scan_dirs():
+                for entry in os.scandir(d):
+                    m = OHLCV_FILE_RE.match(entry.name)
+                    if not m or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    sig = [st.st_mtime_ns, st.st_size, st.st_ino]
+                    seen.add(entry.path)
+                    rec = self._entries.get(entry.path)
+                    if rec is not None and rec.get("sig") == sig:
+                        continue
+                    self._entries[entry.path] = self._read(entry.path, m, sig)
+                    changed += 1
+            removed = [p for p in self._entries if p not in seen]
+            for p in removed:
+                del self._entries[p]
+            if changed or removed:
+                try:
+                    self._save()
+                except OSError:
+                    pass
+            return changed
+
+    @staticmethod
+    def _read(path: str, m, sig):
+        tf = m.group("tf")
+        rec = {"sig": sig, "file_pair": m.group("pair"), "tf": tf, "futures": bool(m.group("futures")),
+               "format": m.group("ext").lstrip("."), "first": None, "last": None, "rows": None,
+               "gaps": None, "missing_candles": None, "gap_ranges": [], "error": None}
+        try:
+            dates = read_ohlcv_dates(path)
+            if dates is None:
+                bounds = read_ohlcv_bounds(path) or {}
+                rec.update({k: bounds.get(k) for k in ("first", "last", "rows")})
+            elif dates:
+                gaps, missing, ranges = count_gaps(dates, timeframe_seconds(tf) * 1000)
+                rec.update({"first": dates[0], "last": dates[-1], "rows": len(dates), "gaps": gaps,
+                            "missing_candles": missing, "gap_ranges": ranges})
+            else:
+                rec["rows"] = 0
+        except Exception as e:
+            rec["error"] = str(e)
+        return rec
+
+    def coverage(self, pairs, tfs, start_ymd: str, end_ymd: str = "", now=None):
+        """
+        État des données pour [start_ymd, end_ymd] : {pair: {tf: cellule}} + résumé par timeframe.
+        Statuts : ok, gaps (couvert mais avec trous), partial (début/fin manquants), missing.
+        """
+        self.refresh()
+        futures = CONFIG.get().get("trading_mode") == "futures"
+        with self._lock:
+            by_key = {(r["file_pair"], r["tf"]): r for r in self._entries.values() if r["futures"] == futures}
+        now_ms = int((now or time.time()) * 1000)
+        start_ms = int(dt.datetime.strptime(start_ymd, "%Y%m%d").replace(tzinfo=dt.timezone.utc).timestamp() * 1000)
+        end_ms = now_ms
+        if end_ymd:
+            end_ms = min(now_ms, int(dt.datetime.strptime(end_ymd, "%Y%m%d").replace(tzinfo=dt.timezone.utc).timestamp() * 1000))
+        cells, summary = {}, {tf: {"ok": 0, "gaps": 0, "partial": 0, "missing": 0} for tf in tfs}
+        for pair in pairs:
+            row = cells[pair] = {}
+            for tf in tfs:
+                rec = by_key.get((pair_to_filename(pair), tf))
+                tf_ms = timeframe_seconds(tf) * 1000
+                if rec is None or rec["first"] is None:
+                    status = "missing"
+                elif rec["first"] - start_ms >= tf_ms or end_ms - rec["last"] >= 2 * tf_ms:
+                    status = "partial"
+                elif rec["gaps"] and (len(rec["gap_ranges"]) < rec["gaps"]
+                                      or any(b > start_ms and a < end_ms for a, b in rec["gap_ranges"])):
+                    status = "gaps"
+                else:
+                    status = "ok"
+                summary[tf][status] += 1
+                row[tf] = {"status": status, **({k: rec[k] for k in ("first", "last", "rows", "gaps", "missing_candles", "format")} if rec else {})}
+        return cells, summary
+
+OHLCV_INVENTORY = OhlcvInventory(INVENTORY_CACHE_PATH)
+
+# ---------- Rééchantillonnage local des timeframes ----------
+def split_resample_timeframes(tfs):
+    """
+    (timeframe de base, timeframes dérivables, timeframes à télécharger quand même) :
+    la base est le plus petit timeframe coché ; un timeframe est dérivable s'il en est un multiple (unités m/h/d).
+    """
+    ordered = sorted(set(tfs), key=timeframe_seconds)
+    base = ordered[0]
+    base_s = timeframe_seconds(base)
+    derived = [tf for tf in ordered[1:] if tf[-1] in "mhd" and timeframe_seconds(tf) % base_s == 0]
+    return base, derived, [tf for tf in ordered[1:] if tf not in derived]
+
+def resample_supported(fmt: str) -> bool:
+    return pd is not None and (pyarrow is not None or fmt in ("json", "jsongz"))
+
+def load_ohlcv_frame(path: str):
+    cols = ["date", "open", "high", "low", "close", "volume"]
+    if path.endswith(".feather"):
+        df = pd.read_feather(path)
+    elif path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    elif path.endswith(".json") or path.endswith(".json.gz"):
+        df = pd.read_json(path, orient="values", compression="gzip" if path.endswith(".gz") else None)
+        df.columns = cols
+        df["date"] = pd.to_datetime(df["date"], unit="ms", utc=True)
+    else:
+        raise ValueError(f"format non supporté : {os.path.basename(path)}")
+    return df.loc[:, cols]
+
+def write_ohlcv_frame(df, path: str):
+    """Écrit au format freqtrade déduit de l'extension (fichier temporaire puis renommage)."""
+    tmp = path + ".tmp"
+    if path.endswith(".feather"):
+        df.reset_index(drop=True).to_feather(tmp, compression_level=9, compression="lz4")
+    elif path.endswith(".parquet"):
+        df.reset_index(drop=True).to_parquet(tmp, index=False)
+    elif path.endswith(".json") or path.endswith(".json.gz"):
+        out = df.copy()
+        out["date"] = (out["date"] - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(milliseconds=1)
+        out.to_json(tmp, orient="values", compression="gzip" if path.endswith(".gz") else None)
+    else:
+        raise ValueError(f"format non supporté : {os.path.basename(path)}")
+    os.replace(tmp, path)
+
+def resample_ohlcv(df, base_tf: str, tf: str):
+    """Agrégation vectorisée (open=first, high=max, low=min, close=last, volume=sum), bougies alignées sur l'epoch UTC."""
+    ratio = timeframe_seconds(tf) // timeframe_seconds(base_tf)
+    grouped = df.set_index("date").resample(f"{timeframe_seconds(tf)}s", origin="epoch", label="left", closed="left")
+    out = grouped.agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+    counts = grouped["close"].count()
+    keep = counts > 0                     # intervalles vides (trous) : pas de bougie
+    if len(out) and counts.iloc[0] < ratio:
+        keep.iloc[0] = False              # première bougie incomplète (début des données)
+    if len(out) and counts.iloc[-1] < ratio:
+        keep.iloc[-1] = False             # dernière bougie pas encore close
+    return out[keep].reset_index()
+
+def merge_ohlcv_frames(existing, new):
+    """Fusionne un historique existant et de nouvelles bougies (les nouvelles priment à date égale), trié par date."""
+    out = pd.concat([existing, new], ignore_index=True)
+    out["date"] = pd.to_datetime(out["date"], utc=True)
+    return out.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+
+def resample_pair(pair: str, base_tf: str, targets, *, erase: bool = False):
+    """
+    Dérive les `targets` d'une paire depuis son fichier base_tf ; renvoie [(tf, erreur|None), ...].
+    Un fichier cible existant est complété (jamais raccourci) : son historique hors de la plage du base_tf est gardé.
+    Avec `erase` (download --erase), les fichiers cibles sont réécrits depuis le base_tf seul.
+    """
+    src = find_ohlcv_file(pair, base_tf)
+    if src is None:
+        return [(tf, f"pas de données {base_tf}") for tf in targets]
+    df = load_ohlcv_frame(src)
+    results = []
+    for tf in targets:
+        try:
+            dst = ohlcv_file_candidates(pair, tf)[0]
+            ensure_dir(os.path.dirname(dst))
+            out = resample_ohlcv(df, base_tf, tf)
+            if not erase and os.path.isfile(dst):
+                out = merge_ohlcv_frames(load_ohlcv_frame(dst), out)
+            write_ohlcv_frame(out, dst)
+            results.append((tf, None))
+        except Exception as e:
+            results.append((tf, str(e)))
+    return results
+
 # ---------- Build commandes ----------
-def build_cmd(action, strategy, start_ymd, *, end_ymd=None, timeframe=None, epochs=None, spaces=None, erase=False, hyperopt_loss=None, job_workers=None):
+def build_cmd(action, strategy, start_ymd, *, end_ymd=None, timeframe=None, epochs=None, spaces=None, erase=False, hyperopt_loss=None, job_workers=None, pairs=None, strategy_path=None, timerange=None, prepend=False, export_dir=None):
     py = find_python_exe()
     base = [py, "-m", "freqtrade"]
     cfg  = ["--config", os.path.relpath(BASE_CONFIG_FOR_CMD, PROJECT_DIR)]
+    if strategy_path and action != "download":
+        cfg += ["--strategy-path", strategy_path]
+    if export_dir and action in ("backtest", "backtest_bear"):
+        cfg += ["--export-filename", export_dir]   # répertoire : freqtrade y nomme lui-même l'export
 
     if action == "download":
-        cmd = base + ["download-data"] + cfg + ["--timerange", f"{start_ymd}-"]
+        cmd = base + ["download-data"] + cfg + ["--timerange", timerange or f"{start_ymd}-"]
         cmd += ["--timeframes", timeframe or "1h"]
+        if pairs:
+            cmd += ["--pairs"] + list(pairs)
         if erase:
             cmd += ["--erase"]
+        if prepend:
+            cmd += ["--prepend"]
         return cmd
 
     if action == "backtest":
@@ -230,9 +938,634 @@ def build_cmd(action, strategy, start_ymd, *, end_ymd=None, timeframe=None, epoc
 
     raise ValueError("Action inconnue")
 
+# ---------- Workspaces isolés par job ----------
+def _link_or_copy(src, dst):
+    """Lien physique si possible (instantané, pas d'espace disque), sinon copie."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+def strategy_workspace_dir(job_id: str) -> str:
+    return os.path.join(WORKSPACES_DIR, job_id, "strategies")
+
+def create_strategy_workspace(job_id: str, strategy: str, params_json: str | None = None) -> str:
+    """
+    Prépare user_data/.workspaces/<job_id>/strategies pour un job :
+    liens physiques vers les fichiers de user_data/strategies (hors JSON de paramètres),
+    plus une copie indépendante de <strategy>.json (ou de `params_json`) que freqtrade peut réécrire.
+    """
+    sdir = strategies_dir()
+    ws = strategy_workspace_dir(job_id)
+    ensure_dir(ws)
+    for fn in os.listdir(sdir):
+        src = os.path.join(sdir, fn)
+        if fn == "__pycache__" or ".json" in fn:
+            continue
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(ws, fn), copy_function=_link_or_copy,
+                            ignore=shutil.ignore_patterns("__pycache__"))
+        else:
+            _link_or_copy(src, os.path.join(ws, fn))
+    src_json = params_json or os.path.join(sdir, f"{strategy}.json")
+    if os.path.isfile(src_json):
+        shutil.copyfile(src_json, os.path.join(ws, f"{strategy}.json"))
+    return ws
+
+def remove_strategy_workspace(job_id: str):
+    shutil.rmtree(os.path.join(WORKSPACES_DIR, job_id), ignore_errors=True)
+
+# ---------- Cache de résultats backtest ----------
+def _hash_tree_contents(h, root, *, suffixes=None):
+    """Ajoute au hash le chemin relatif + contenu des fichiers de `root` (filtrés par suffixe)."""
+    if not os.path.isdir(root):
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        for fn in sorted(filenames):
+            if suffixes and not fn.endswith(suffixes):
+                continue
+            path = os.path.join(dirpath, fn)
+            h.update(os.path.relpath(path, root).encode("utf-8", "replace"))
+            with open(path, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+
+def _hash_tree_stats(h, root):
+    """Ajoute au hash chemin relatif + taille + mtime de chaque fichier (données OHLCV : pas de lecture)."""
+    if not os.path.isdir(root):
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fn in sorted(filenames):
+            st = os.stat(os.path.join(dirpath, fn))
+            h.update(f"{os.path.relpath(os.path.join(dirpath, fn), root)}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8", "replace"))
+
+def backtest_cache_key(cmd, params_json: str | None) -> str:
+    """
+    Clé de cache d'un backtest : arguments freqtrade (hors exécutable / workspace), code des stratégies,
+    JSON de paramètres, configs et mtime/taille des fichiers de données.
+    """
+    args = list(cmd[3:])
+    for opt in ("--strategy-path", "--export-filename"):
+        if opt in args:
+            i = args.index(opt)
+            del args[i:i + 2]
+    h = hashlib.sha256(json.dumps(args).encode("utf-8"))
+    _hash_tree_contents(h, strategies_dir(), suffixes=(".py",))
+    if params_json and os.path.isfile(params_json):
+        with open(params_json, "rb") as f:
+            h.update(b"params:" + f.read())
+    if os.path.isfile(BASE_CONFIG_FOR_CMD):
+        with open(BASE_CONFIG_FOR_CMD, "rb") as f:
+            h.update(b"config_base:" + f.read())
+    _hash_tree_contents(h, CONFIGS_DIR)
+    _hash_tree_stats(h, DATA_DIR)
+    return h.hexdigest()[:32]
+
+def workspace_export_dir(job_id: str) -> str:
+    """user_data/.workspaces/<job_id>/backtest_results : exports d'un seul run, sans mélange avec les jobs concurrents."""
+    return os.path.join(WORKSPACES_DIR, job_id, "backtest_results")
+
+def publish_backtest_exports(export_dir: str):
+    """
+    Recopie dans user_data/backtest_results les exports écrits par un run dans son répertoire de workspace
+    (.last_result.json compris) ; renvoie les exports (chemins dans le workspace) pour le cache.
+    """
+    if not os.path.isdir(export_dir):
+        return []
+    ensure_dir(BACKTEST_RESULTS_DIR)
+    exports = []
+    for fn in sorted(os.listdir(export_dir)):
+        src = os.path.join(export_dir, fn)
+        if not os.path.isfile(src):
+            continue
+        dst = os.path.join(BACKTEST_RESULTS_DIR, fn)
+        if os.path.exists(dst):
+            os.remove(dst)
+        _link_or_copy(src, dst)
+        if not fn.startswith("."):
+            exports.append(src)
+    return exports
+
+class BacktestCache:
+    """
+    Résultats de backtest indexés par backtest_cache_key() : <root>/<clé>/entry.json + exports/.
+    L'mtime de entry.json sert d'horodatage LRU ; éviction par nombre d'entrées et taille totale.
+    """
+
+    def __init__(self, root: str, max_entries: int, max_bytes: int):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        path = os.path.join(self.root, key, "entry.json")
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                return None
+        entry["exports"] = [os.path.join(self.root, key, "exports", fn) for fn in entry.get("exports", [])]
+        return entry
+
+    def put(self, key: str, entry: dict, export_files=()):
+        entry_dir = os.path.join(self.root, key)
+        with self._lock:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            ensure_dir(os.path.join(entry_dir, "exports"))
+            names = []
+            for src in export_files:
+                try:
+                    shutil.copy2(src, os.path.join(entry_dir, "exports", os.path.basename(src)))
+                    names.append(os.path.basename(src))
+                except OSError:
+                    pass
+            tmp = os.path.join(entry_dir, "entry.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({**entry, "exports": names}, f)
+            os.replace(tmp, os.path.join(entry_dir, "entry.json"))
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for key in os.listdir(self.root):
+            entry_dir = os.path.join(self.root, key)
+            meta = os.path.join(entry_dir, "entry.json")
+            if not os.path.isfile(meta):
+                continue
+            size = sum(os.path.getsize(os.path.join(dp, fn)) for dp, _, fns in os.walk(entry_dir) for fn in fns)
+            entries.append((os.stat(meta).st_mtime, size, entry_dir))
+        entries.sort()
+        total = sum(e[1] for e in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, entry_dir = entries.pop(0)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    @staticmethod
+    def restore_exports(entry):
+        """Remet dans backtest_results les exports d'une entrée s'ils n'y sont plus."""
+        ensure_dir(BACKTEST_RESULTS_DIR)
+        for src in entry.get("exports", []):
+            dst = os.path.join(BACKTEST_RESULTS_DIR, os.path.basename(src))
+            if os.path.isfile(src) and not os.path.exists(dst):
+                shutil.copy2(src, dst)
+
+BT_CACHE = BacktestCache(BT_CACHE_DIR, BT_CACHE_MAX_ENTRIES, BT_CACHE_MAX_BYTES)
+
+# ---------- Métriques (format texte Prometheus) ----------
+class MetricsRegistry:
+    """
+    Compteurs, jauges et histogrammes en mémoire, exposés par /metrics au format texte Prometheus.
+    Une série = (nom, labels) ; les jauges d'état (jobs en cours, zygote, ...) sont lues au moment
+    du scrape par des collecteurs ; celles qui n'ont pas d'état à relire sont tenues par inc(±1).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}        # nom -> (type, aide, buckets)
+        self._series = {}      # (nom, labels triés) -> valeur | [compteurs par bucket..., +Inf, somme]
+        self._collectors = []  # fn() -> [(nom, {labels}, valeur), ...]
+        self.started_at = time.time()
+
+    def counter(self, name: str, help_text: str):
+        self._meta[name] = ("counter", help_text, None)
+
+    def gauge(self, name: str, help_text: str):
+        self._meta[name] = ("gauge", help_text, None)
+
+    def histogram(self, name: str, help_text: str, buckets=METRICS_LATENCY_BUCKETS_S):
+        self._meta[name] = ("histogram", help_text, tuple(sorted(buckets)))
+
+    def add_collector(self, fn):
+        self._collectors.append(fn)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, self._key(labels))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        buckets = self._meta[name][2]
+        key = (name, self._key(labels))
+        with self._lock:
+            h = self._series.get(key)
+            if h is None:
+                h = self._series[key] = [0] * (len(buckets) + 1) + [0.0]
+            h[bisect.bisect_left(buckets, value)] += 1
+            h[-1] += value
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _num(value):
+        value = float(value)
+        return str(int(value)) if value.is_integer() else repr(value)
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+    def render(self) -> str:
+        series = {}
+        for fn in self._collectors:
+            try:
+                for name, labels, value in fn():
+                    series[(name, self._key(labels))] = value
+            except Exception:
+                pass
+        with self._lock:
+            series.update((k, list(v) if isinstance(v, list) else v) for k, v in self._series.items())
+        by_name = collections.defaultdict(list)
+        for (name, labels), value in sorted(series.items(), key=lambda kv: kv[0]):
+            by_name[name].append((labels, value))
+        out = []
+        for name, (kind, help_text, buckets) in self._meta.items():
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            for labels, value in by_name.get(name, ()):
+                if kind != "histogram":
+                    out.append(f"{name}{self._labels(labels)} {self._num(value)}")
+                    continue
+                total = 0
+                for le, n in zip(buckets + ("+Inf",), value[:-1]):
+                    total += n
+                    out.append(f"{name}_bucket{self._labels(labels, [('le', le if le == '+Inf' else self._num(le))])} {total}")
+                out.append(f"{name}_sum{self._labels(labels)} {self._num(value[-1])}")
+                out.append(f"{name}_count{self._labels(labels)} {total}")
+        return "\n".join(out) + "\n"
+
+METRICS = MetricsRegistry()
+METRICS.counter("ftpanel_jobs_submitted_total", "Jobs soumis, par action.")
+METRICS.counter("ftpanel_jobs_started_total", "Jobs démarrés (sortis de la file), par action.")
+METRICS.counter("ftpanel_jobs_finished_total", "Jobs terminés, par action et statut (ok, error, cancelled).")
+METRICS.histogram("ftpanel_job_queue_wait_seconds", "Attente en file avant démarrage.", METRICS_DURATION_BUCKETS_S)
+METRICS.histogram("ftpanel_job_duration_seconds", "Durée d'exécution des jobs (hors attente en file).", METRICS_DURATION_BUCKETS_S)
+METRICS.counter("ftpanel_job_events_total", "Événements SSE émis par les jobs, par action et type (line, warn, err, ...).")
+METRICS.counter("ftpanel_processes_spawned_total", "Process lancés, par action, commande et lanceur (zygote, popen).")
+METRICS.histogram("ftpanel_process_first_output_seconds", "Délai entre le lancement d'un process et sa première ligne.")
+METRICS.histogram("ftpanel_process_result_seconds", "Délai entre le lancement et le bloc de résultats (backtest / hyperopt).",
+                  METRICS_DURATION_BUCKETS_S)
+METRICS.histogram("ftpanel_process_runtime_seconds", "Durée des process, du lancement à proc.wait().", METRICS_DURATION_BUCKETS_S)
+METRICS.counter("ftpanel_process_lines_total", "Lignes lues sur la sortie des process.")
+METRICS.counter("ftpanel_process_exits_total", "Fins de process, par action, commande et code retour.")
+METRICS.counter("ftpanel_log_bytes_written_total", "Octets écrits dans les logs de log_app/.")
+METRICS.counter("ftpanel_log_lines_written_total", "Lignes écrites dans les logs de log_app/.")
+METRICS.histogram("ftpanel_log_flush_seconds", "Durée des écritures groupées de logs.")
+METRICS.counter("ftpanel_sse_connections_total", "Abonnements aux flux SSE des jobs.")
+METRICS.counter("ftpanel_sse_bytes_total", "Octets envoyés sur les flux SSE des jobs, par serveur (thread, async).")
+METRICS.gauge("ftpanel_sse_clients", "Connexions SSE ouvertes sur les flux de jobs, par serveur (thread, async).")
+METRICS.gauge("ftpanel_jobs_running", "Jobs en cours d'exécution.")
+METRICS.gauge("ftpanel_jobs_queued", "Jobs en attente de cœurs.")
+METRICS.gauge("ftpanel_cpu_slots_used", "Cœurs réservés par les jobs en cours.")
+METRICS.gauge("ftpanel_cpu_slots_capacity", "Cœurs attribuables aux jobs.")
+METRICS.gauge("ftpanel_zygote_up", "1 si le zygote freqtrade est prêt.")
+METRICS.gauge("ftpanel_start_time_seconds", "Démarrage du panel (timestamp Unix).")
+
+class ProcessTimer:
+    """
+    Jalons d'un process freqtrade : lancement, première ligne, jeton de résultat ("Result for strategy",
+    "Hyperopt results") et proc.wait() ; alimente les histogrammes ftpanel_process_*.
+    """
+
+    RESULT_TOKENS = {"backtesting": "result for strategy", "hyperopt": "hyperopt results"}
+
+    def __init__(self, action: str, cmd, proc):
+        self.action = action or "other"
+        self.command = cmd[cmd.index("freqtrade") + 1] if "freqtrade" in cmd[:-1] else os.path.basename(str(cmd[0]))
+        self.t0 = time.monotonic()
+        self.lines = 0
+        self._token = self.RESULT_TOKENS.get(self.command)
+        METRICS.inc("ftpanel_processes_spawned_total", action=self.action, command=self.command,
+                    launcher="zygote" if isinstance(proc, ZygoteProcess) else "popen")
+
+    def line(self, low: str):
+        self.lines += 1
+        if self.lines == 1:
+            METRICS.observe("ftpanel_process_first_output_seconds", time.monotonic() - self.t0,
+                            action=self.action, command=self.command)
+        if self._token is not None and self._token in low:
+            self._token = None
+            METRICS.observe("ftpanel_process_result_seconds", time.monotonic() - self.t0,
+                            action=self.action, command=self.command)
+
+    def exit(self, returncode):
+        METRICS.observe("ftpanel_process_runtime_seconds", time.monotonic() - self.t0,
+                        action=self.action, command=self.command)
+        METRICS.inc("ftpanel_process_lines_total", self.lines, action=self.action, command=self.command)
+        METRICS.inc("ftpanel_process_exits_total", action=self.action, command=self.command,
+                    returncode="none" if returncode is None else returncode)
+
+# ---------- Zygote freqtrade (process pré-chauffés) ----------
+class ZygoteProcess:
+    """
+    Commande freqtrade exécutée par un enfant forké du zygote (voir ft_zygote.py).
+    Expose le sous-ensemble de subprocess.Popen utilisé ici : pid, stdout (lignes), poll, wait, terminate, kill.
+    """
+
+    EXIT_MARKER = "\0EXIT "
+
+    def __init__(self, sock: socket.socket, args=None):
+        self._sock = sock
+        self._reader = sock.makefile("r", encoding="utf-8", errors="replace")
+        self.args = args
+        self.returncode = None
+        self._done = threading.Event()   # code retour connu (flux de sortie terminé)
+        self._drainer = None
+        self._drain_lock = threading.Lock()
+        head = self._reader.readline()
+        if not head.startswith("PID "):
+            self._close()
+            raise OSError(f"réponse du zygote invalide : {head!r}")
+        self.pid = int(head[4:])
+        self.stdout = self._lines()
+
+    @classmethod
+    def connect(cls, sock_path, argv, cwd, env=None):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(5)
+            sock.connect(sock_path)
+            req = {"argv": list(argv), "cwd": cwd, "env": env or {}}
+            sock.sendall((json.dumps(req) + "\n").encode("utf-8"))
+            sock.settimeout(None)
+            return cls(sock, list(argv))
+        except BaseException:
+            sock.close()
+            raise
+
+    def _lines(self):
+        try:
+            for line in self._reader:
+                if line.startswith(self.EXIT_MARKER):
+                    try:
+                        self.returncode = int(line[len(self.EXIT_MARKER):])
+                    except ValueError:
+                        self.returncode = 1
+                    break
+                yield line
+        finally:
+            if self.returncode is None:   # fin de flux sans code retour : enfant tué ou planté
+                self.returncode = -signal.SIGTERM
+            self._close()
+            self._done.set()
+
+    def _close(self):
+        for f in (self._reader, self._sock):
+            try:
+                f.close()
+            except Exception:
+                pass
+
+    def poll(self):
+        return self.returncode
+
+    def _drain(self):
+        """Lit la sortie restante jusqu'au code retour."""
+        try:
+            for _ in self.stdout:
+                pass
+        except ValueError:   # flux en cours de lecture par un autre thread : il ira jusqu'au code retour
+            pass
+
+    def wait(self, timeout=None):
+        """Comme Popen.wait : bloque jusqu'à la fin, ou lève subprocess.TimeoutExpired après `timeout` secondes."""
+        if self._done.is_set():
+            return self.returncode
+        if timeout is None:
+            self._drain()
+            self._done.wait()
+            return self.returncode
+        with self._drain_lock:
+            if self._drainer is None:
+                self._drainer = threading.Thread(target=self._drain, name=f"zygote-wait-{self.pid}", daemon=True)
+                self._drainer.start()
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.returncode is not None:
+            return
+        try:
+            os.killpg(self.pid, sig)   # l'enfant est chef de son groupe (setsid) : workers hyperopt inclus
+        except ProcessLookupError:
+            pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+class FreqtradeZygote:
+    """
+    Pilote le process ft_zygote.py : freqtrade, pandas et ccxt y sont importés une fois pour toutes,
+    chaque commande `python -m freqtrade ...` devient un fork (quelques ms au lieu de plusieurs secondes).
+    Démarrage en tâche de fond ; tant qu'il n'est pas prêt (ou si freqtrade est introuvable) : None -> Popen.
+    """
+
+    def __init__(self, script: str, sock_path: str):
+        self.script = script
+        self.sock_path = sock_path
+        self.state = "stopped"   # stopped | starting | ready | unavailable
+        self.info = ""
+        self._proc = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supported():
+        return hasattr(os, "fork") and hasattr(socket, "AF_UNIX") and os.name == "posix"
+
+    def start(self):
+        with self._lock:
+            if self.state in ("starting", "ready", "unavailable"):
+                return
+            self.state = "starting"
+        threading.Thread(target=self._run, daemon=True, name="ft-zygote").start()
+
+    def _run(self):
+        try:
+            proc = subprocess.Popen(
+                [find_python_exe(), self.script, "--socket", self.sock_path], cwd=PROJECT_DIR,
+                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding="utf-8", errors="replace", bufsize=1,
+            )
+        except Exception as e:
+            self.state, self.info = "unavailable", str(e)
+            return
+        self._proc = proc
+        for raw in proc.stdout:
+            line = raw.rstrip("\r\n")
+            if line == "READY":
+                self.state, self.info = "ready", f"pid {proc.pid}"
+            elif line.startswith("UNAVAILABLE"):
+                self.state, self.info = "unavailable", line[len("UNAVAILABLE"):].strip()
+            elif line:
+                print(f"[ZYGOTE] {line}", file=sys.stderr)
+        proc.wait()
+        with self._lock:
+            if self.state == "starting":   # mort avant READY : pas de relance en boucle
+                self.state, self.info = "unavailable", f"arrêté au démarrage (code {proc.returncode})"
+            elif self.state != "unavailable":
+                self.state = "stopped"
+
+    def applies(self, cmd):
+        return len(cmd) > 3 and list(cmd[:3]) == [find_python_exe(), "-m", "freqtrade"]
+
+    def spawn(self, cmd, cwd=None, env=None):
+        """ZygoteProcess pour `cmd`, ou None si le zygote ne peut pas la prendre (appelant : Popen)."""
+        if not self.applies(cmd):
+            return None
+        if self.state != "ready":
+            if self.state == "stopped":
+                self.start()
+            return None
+        try:
+            return ZygoteProcess.connect(self.sock_path, cmd[3:], cwd or PROJECT_DIR, env)
+        except OSError as e:
+            print(f"[ZYGOTE] Indisponible, relance : {e}", file=sys.stderr)
+            with self._lock:
+                if self.state == "ready":
+                    self.state = "stopped"
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.kill()
+            else:
+                self.start()
+            return None
+
+    def status(self):
+        return {"enabled": FT_ZYGOTE, "state": self.state, "info": self.info}
+
+FT_ZYGOTE_POOL = FreqtradeZygote(FT_ZYGOTE_SCRIPT, FT_ZYGOTE_SOCKET)   # démarré par start_services()
+
+def start_process(cmd, **popen_kwargs):
+    """
+    Lance `cmd` comme subprocess.Popen, via le zygote pour les commandes freqtrade dont la sortie est lue
+    en texte (stdout=PIPE, stderr=STDOUT) ; repli transparent sur Popen sinon.
+    """
+    if (FT_ZYGOTE and popen_kwargs.get("stdout") == subprocess.PIPE
+            and popen_kwargs.get("stderr") == subprocess.STDOUT and popen_kwargs.get("text")):
+        proc = FT_ZYGOTE_POOL.spawn(cmd, cwd=popen_kwargs.get("cwd"), env=popen_kwargs.get("env"))
+        if proc is not None:
+            return proc
+    return subprocess.Popen(cmd, **popen_kwargs)
+
+# ---------- Exécution parallèle ----------
+class SpawnThrottle:
+    """Espace les lancements de process d'au moins `interval` secondes (partagé entre threads)."""
+
+    def __init__(self, interval: float):
+        self.interval = max(0.0, float(interval or 0))
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self, stop: threading.Event | None = None):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_at)
+            self._next_at = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            if stop is not None:
+                stop.wait(delay)
+            else:
+                time.sleep(delay)
+
+def plan_download_tasks(tfs, pairs, chunk_size=0):
+    """Découpe le download en tâches (label, timeframe, paires|None) : une par timeframe, ou par lot de paires."""
+    tasks = []
+    chunk_size = int(chunk_size or 0)
+    for tf in tfs:
+        if chunk_size <= 0 or chunk_size >= len(pairs):
+            tasks.append((tf, tf, None))
+            continue
+        for i in range(0, len(pairs), chunk_size):
+            tasks.append((f"{tf}#{i // chunk_size + 1}", tf, pairs[i:i + chunk_size]))
+    return tasks
+
+def iter_parallel_procs(jobs, *, max_parallel, spawn_interval=0.0, track=None, action=""):
+    """
+    Lance les commandes `jobs` [(label, cmd), ...] dans un pool borné et multiplexe leurs sorties.
+    `cmd` peut être une liste de commandes, exécutées l'une après l'autre (arrêt au premier code non nul).
+    Génère des tuples (label, kind, value) avec kind = "line" | "exit" | "spawn_error".
+    `track(proc)` est appelé pour chaque process lancé (annulation par le job) ; `action` étiquette les métriques.
+    Si le générateur est fermé, les process en cours sont terminés.
+    """
+    out_q = queue.Queue()
+    stop = threading.Event()
+    throttle = SpawnThrottle(spawn_interval)
+    procs = []
+    procs_lock = threading.Lock()
+
+    def _worker(label, cmd):
+        rc = None
+        for step in (cmd if cmd and isinstance(cmd[0], (list, tuple)) else [cmd]):
+            if stop.is_set():
+                break
+            throttle.wait(stop)
+            if stop.is_set():
+                break
+            try:
+                proc = start_process(
+                    step, cwd=PROJECT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                    text=True, encoding="utf-8", errors="replace", bufsize=1,
+                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+                )
+            except Exception as e:
+                out_q.put((label, "spawn_error", str(e)))
+                return
+            with procs_lock:
+                procs.append(proc)
+            if track is not None:
+                track(proc)
+            timer = ProcessTimer(action, step, proc)
+            for raw in proc.stdout:
+                line = raw.rstrip("\r\n")
+                timer.line(line.lower())
+                out_q.put((label, "line", line))
+            rc = proc.wait()
+            timer.exit(rc)
+            if rc != 0:
+                break
+        out_q.put((label, "exit", rc))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, int(max_parallel or 1)), thread_name_prefix="ftproc")
+    try:
+        for label, cmd in jobs:
+            pool.submit(_worker, label, cmd)
+        pending = len(jobs)
+        while pending:
+            item = out_q.get()
+            if item[1] in ("exit", "spawn_error"):
+                pending -= 1
+            yield item
+    finally:
+        stop.set()
+        with procs_lock:
+            for p in procs:
+                if p.poll() is None:
+                    try:
+                        p.terminate()
+                    except Exception:
+                        pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
 # ---------- SSE helpers ----------
-def sse_format(event: str | None, data: str):
+def sse_format(event: str | None, data: str, event_id: int | None = None):
     lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
     if event:
         lines.append(f"event: {event}")
     for ln in data.splitlines() or [""]:
@@ -240,1000 +1573,2926 @@ def sse_format(event: str | None, data: str):
     lines.append("")
     return "\n".join(lines) + "\n"
 
+def _resolve_future(fut):
+    if not fut.done():
+        fut.set_result(None)
+
 def is_warn_err(line: str):
     l = line.lower()
     return ("error" in l or "warning" in l or "critical" in l or "traceback" in l or "exception" in l)
 
-# ---------- Routes ----------
-@app.get("/")
-def index():
-    strategies = list_strategies()
-    json_files = list_strategy_jsons()
-    json_files_apply = list_strategy_jsons_no_bakprefix()
-    default_strategy = DEFAULT_STRATEGY if DEFAULT_STRATEGY in strategies else (strategies[0] if strategies else DEFAULT_STRATEGY)
+# ---------- Logs (écriture bufferisée) ----------
+class LogSink:
+    """
+    Fichier de log d'un job : un seul handle ouvert, écritures regroupées en mémoire
+    et vidées par taille (LOG_FLUSH_BYTES) ou par délai (LOG_FLUSH_INTERVAL_S, via un thread commun).
+    """
 
-    git_paths_list = read_git_paths_list()
-    pair_count = len(read_pair_whitelist_from_exchange_config())
-    nb_cpu = cpu_count_safe()
-
-    html = """
-<!doctype html>
-<html lang="fr">
-<head>
-  <meta charset="utf-8" />
-  <title>Freqtrade - Controle Panel</title>
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <style>
-    :root { color-scheme: light dark; }
-    body { font-family: system-ui, Arial, sans-serif; margin: 24px; }
-    .wrap { max-width: 1200px; margin: 0 auto; }
-    .card { border: 1px solid #4444; border-radius: 14px; padding: 16px; box-shadow: 0 2px 10px #0001; margin-bottom: 16px; }
-    .card h2 { margin: 0 0 10px 0; }
-    .row { display: flex; gap: 12px; flex-wrap: wrap; align-items: flex-end; }
-    .row.space-between { justify-content: space-between; align-items: center; }
-    label { display:block; margin: 0 0 4px; font-weight: 600; }
-    input, button, select { font-size: 16px; padding: 8px 10px; }
-    input[type="date"], input[type="number"], select { width: 260px; }
-    #start_date, #end_date { width: 160px; padding: 6px 8px; font-size: 14px; }
-    button { cursor: pointer; border-radius: 10px; border: 1px solid #5555; }
-    button.primary { background: #2563eb; color: white; border-color: #1d4ed8; }
-    .grid { display: grid; grid-template-columns: 1fr; gap: 16px; }
-    .panel { border: 1px dashed #8886; border-radius: 12px; padding: 10px; }
-    .title { font-weight: 700; margin-bottom: 6px; }
-    .status { font-size: 14px; opacity: .9; margin-bottom: 6px; }
-    .ok { color: #16a34a; font-weight: 600; }
-    .err { color: #dc2626; font-weight: 600; }
-    .warn { color: #d97706; font-weight: 600; }
-    pre { white-space: pre-wrap; background: #1112; padding: 10px; border-radius: 10px; max-height: 45vh; overflow: auto; }
-    a { text-decoration: none; }
-    .inline { display:flex; flex-direction: column; }
-    .inline > label { margin-bottom: 4px; }
-    .git-path-select { flex: 1; min-width: 400px; max-width: 100%; }
-    .flex-grow { flex: 1; }
-    .spaces-wrap { display: flex; gap: 12px; align-items: center; flex-wrap: wrap; }
-    .spaces-wrap label { font-weight: normal; }
-    .tf-wrap { display:flex; gap:12px; flex-wrap:wrap; }
-    .tf-wrap label { font-weight: normal; }
-    .muted { color: #888; font-weight: 600; }
-    .progress { width: 100%; height: 10px; background:#0002; border-radius: 8px; overflow:hidden; }
-    .progress > div { height: 100%; width: 0%; background: #2563eb; transition: width .2s ease; }
-    button:disabled { opacity: .55; cursor: not-allowed; }
-    .result { border-top: 1px dashed #8886; margin-top: 8px; padding-top: 8px; }
-  </style>
-</head>
-<body>
-<div class="wrap">
-  <h1>Freqtrade - Controle Panel</h1>
-
-  <!-- Strategy -->
-  <div class="card">
-    <h2>Strategy</h2>
-
-    <div class="row" style="justify-content:space-between; align-items:flex-end">
-      <div class="row" style="gap:18px; flex-wrap:wrap; flex:1; align-items:center">
-        <div class="row" style="gap:12px; align-items:flex-end">
-          <div class="inline">
-            <label for="strategy">Script</label>
-            <select id="strategy">
-              {% for s in strategies %}
-                <option value="{{s}}" {% if s==default_strategy %}selected{% endif %}>{{s}}</option>
-              {% endfor %}
-            </select>
-          </div>
-          <div class="inline">
-            <label for="start_date">Start date</label>
-            <input id="start_date" type="date" value="{{ default_date_input }}" />
-          </div>
-          <div class="inline">
-            <label for="end_date">End date</label>
-            <input id="end_date" type="date" value="{{ default_end_date_input }}" />
-          </div>
-        </div>
-
-        <div class="inline" style="margin-top:12px">
-          <div class="muted">pair_whitelist (config_exchange.json) : <span id="pairCount">{{ pair_count }}</span></div>
-        </div>
-      </div>
-
-      <div class="row" style="gap:12px">
-        <button class="primary" onclick="openLogs()">Logs</button>
-      </div>
-    </div>
-  </div>
-
-  <!-- Download -->
-  <div class="card">
-    <h2>Download</h2>
-    <div class="row" style="gap:12px; align-items:flex-end">
-      <div class="inline" style="flex:1">
-        <label>Timeframes</label>
-        <div class="tf-wrap">
-          <label><input type="checkbox" name="tf" value="3m"> 3m</label>
-          <label><input type="checkbox" name="tf" value="5m"> 5m</label>
-          <label><input type="checkbox" name="tf" value="15m"> 15m</label>
-          <label><input type="checkbox" name="tf" value="30m"> 30m</label>
-          <label><input type="checkbox" name="tf" value="1h" checked> 1h</label>
-          <label><input type="checkbox" name="tf" value="2h"> 2h</label>
-          <label><input type="checkbox" name="tf" value="4h"> 4h</label>
-          <label><input type="checkbox" name="tf" value="6h"> 6h</label>
-          <label><input type="checkbox" name="tf" value="12h"> 12h</label>
-          <label><input type="checkbox" name="tf" value="1d" checked> 1d</label>
-        </div>
-      </div>
-      <div class="inline">
-        <label for="dl_erase">Erase</label>
-        <input id="dl_erase" type="checkbox" />
-      </div>
-      <div class="inline" style="align-items:flex-start">
-        <label style="visibility:hidden">Action</label>
-        <button class="primary" onclick="startDownload()">Download data</button>
-      </div>
-    </div>
-
-    <div style="margin-top:10px">
-      <div class="progress"><div id="dlProgressBar"></div></div>
-      <div id="dlProgressText" class="muted" style="margin-top:6px">0 / 0 (0%)</div>
-    </div>
-  </div>
-
-  <!-- Backtest -->
-  <div class="card">
-    <h2>Backtest</h2>
-    <div class="row" style="justify-content:space-between; gap:12px">
-      <div class="inline flex-grow">
-        <label for="bt_json_sel">Fichier .json <!-- (user_data/strategies) --></label>
-        <select id="bt_json_sel" class="flex-grow" style="min-width:400px">
-          <option value="">— Utiliser le {strategy}.json courant —</option>
-          {% for jf in json_files %}
-            <option value="{{jf}}">{{jf}}</option>
-          {% endfor %}
-        </select>
-      </div>
-      <div class="row" style="gap:12px">
-        <div class="inline" style="align-items:flex-start">
-          <label style="visibility:hidden">Backtest</label>
-          <button id="btn-backtest" class="primary" onclick="startBacktest()">Backtest</button>
-        </div>
-        <div class="inline" style="align-items:flex-start">
-          <label style="font-size:12px; opacity:.8">Période BEAR<br>20220110-20220618</label>
-          <button id="btn-backtest-bear" class="primary" onclick="startStream('backtest_bear')">Backtest BEAR</button>
-        </div>
-      </div>
-    </div>
-  </div>
-
-  <!-- Hyperopt -->
-  <div class="card">
-    <h2>Hyperopt</h2>
-  <!-- Ligne 1 : Epochs, Loss, Job workers, Bouton -->
-    <div class="row" style="gap:24px; align-items:center">
-      <div class="inline">
-        <label for="epochs">Epochs (défaut 100)</label>
-        <input id="epochs" type="number" min="1" step="1" value="100" />
-        <div class="muted" style="margin-top:6px">Itérations (plus = plus long)</div>
-      </div>
-
-      <div class="inline">
-        <label for="hyperoptloss">Hyperopt loss</label>
-        <select id="hyperoptloss" style="min-width:320px"></select>
-        <div id="lossDesc" class="muted" style="margin-top:6px"></div>
-      </div>
-
-      <div class="inline">
-        <label for="jobworkers">Job workers (CPU)</label>
-        <select id="jobworkers"></select>
-        <div class="muted" style="margin-top:6px">Processus parallèles (défaut : max)</div>
-      </div>
-
-      <div class="inline" style="align-items:flex-start">
-        <label style="visibility:hidden">Action</label>
-        <button id="btn-hyperopt" class="primary" onclick="startHyperopt()">Lancer Hyperopt</button>
-      </div>
-    </div>
-
-    <!-- Ligne 2 : Spaces -->
-    <div class="row" style="gap:24px; margin-top:10px">
-      <div class="inline" style="flex:1">
-        <label>Spaces</label>
-        <div class="spaces-wrap" id="spacesWrap">
-          <label><input type="checkbox" name="spaces" value="all"> all</label>
-          <label><input type="checkbox" name="spaces" value="buy"> buy</label>
-          <label><input type="checkbox" name="spaces" value="sell"> sell</label>
-          <label><input type="checkbox" name="spaces" value="roi"> roi</label>
-          <label><input type="checkbox" name="spaces" value="stoploss"> stoploss</label>
-          <label><input type="checkbox" name="spaces" value="trailing"> trailing</label>
-          <label><input type="checkbox" name="spaces" value="protection"> protection</label>
-          <label><input type="checkbox" name="spaces" value="trades"> trades</label>
-          <label><input type="checkbox" name="spaces" value="default" checked> default</label>
-        </div>
-      </div>
-    </div>
-
-    <!-- Progress Hyperopt -->
-    <div style="margin-top:10px">
-      <div class="progress"><div id="hoptProgressBar"></div></div>
-      <div id="hoptProgressText" class="muted" style="margin-top:6px">0 / 0 (0%)</div>
-    </div>
-  </div>
-
-  <!-- Apply Strategy -->
-  <div class="card">
-    <h2>Apply Strategy Hyperopt</h2>
-    <div class="row" style="justify-content:space-between; gap:12px">
-      <div class="inline flex-grow">
-        <label for="apply_json_sel">Fichier .json <!-- (user_data/strategies) --></label>
-        <select id="apply_json_sel" class="flex-grow" style="min-width:400px">
-          {% for jf in json_files_apply %}
-            <option value="{{jf}}">{{jf}}</option>
-          {% endfor %}
-        </select>
-      </div>
-      <div class="inline" style="align-items:flex-start">
-        <label style="visibility:hidden">Apply</label>
-        <button class="primary" onclick="startApplyStrategy()">Apply</button>
-      </div>
-    </div>
-  </div>
-
-  <!-- Git -->
-  <div class="card">
-    <h2>Git</h2>
-    <div class="row space-between">
-      <div class="inline" style="flex:1">
-        <label for="git_path">Chemin</label>
-        <select id="git_path" class="git-path-select">
-          {% for p in git_paths_list %}
-            <option value="{{p}}">{{p}}</option>
-          {% endfor %}
-        </select>
-      </div>
-      <button class="primary" onclick="startGitPush()">PUSH</button>
-    </div>
-  </div>
-
-  <!-- Panneaux de sortie -->
-  <div class="grid">
-    <div class="panel">
-      <div class="title">Download data</div>
-      <div id="status-download" class="status">Prêt.</div>
-      <pre id="out-download"></pre>
-    </div>
-    <div class="panel">
-      <div class="title">Backtest</div>
-      <div id="status-backtest" class="status">Prêt.</div>
-      <pre id="out-backtest"></pre>
-    </div>
-    <div class="panel">
-      <div class="title">Backtest BEAR</div>
-      <div id="status-backtest_bear" class="status">Prêt.</div>
-      <pre id="out-backtest_bear"></pre>
-    </div>
-    <div class="panel">
-      <div class="title">Hyperopt</div>
-      <div id="status-hyperopt" class="status">Prêt.</div>
-      <pre id="out-hyperopt"></pre>
-    </div>
-    <div class="panel">
-      <div class="title">Apply Strategy Hyperopt</div>
-      <div id="status-apply_strategy" class="status">Prêt.</div>
-      <pre id="out-apply_strategy"></pre>
-    </div>
-    <div class="panel">
-      <div class="title">Git PUSH</div>
-      <div id="status-git_push" class="status">Prêt.</div>
-      <pre id="out-git_push"></pre>
-    </div>
-  </div>
-</div>
-
-<script>
-  const sources = {};
-  const LOSS_ITEMS = {{ loss_items_json|safe }};
-  const NB_CPU = {{ nb_cpu }};
-
-  function setDisabled(el, disabled){ if(!el) return; el.disabled = !!disabled; }
-  function lockFor(action){
-    const btnBT      = document.getElementById('btn-backtest');
-    const btnBTBear  = document.getElementById('btn-backtest-bear');
-    const btnHopt    = document.getElementById('btn-hyperopt');
-    if(action === 'hyperopt'){
-      setDisabled(btnBT, true); setDisabled(btnBTBear, true);
-    } else if(action === 'backtest' || action === 'backtest_bear'){
-      setDisabled(btnHopt, true);
-    }
-  }
-  function unlockAll(){
-    const btnBT      = document.getElementById('btn-backtest');
-    const btnBTBear  = document.getElementById('btn-backtest-bear');
-    const btnHopt    = document.getElementById('btn-hyperopt');
-    setDisabled(btnBT, false); setDisabled(btnBTBear, false); setDisabled(btnHopt, false);
-  }
-
-  function toYMD(dstr){ if(!dstr) return ""; const [y,m,d]=dstr.split("-"); return `${y}${m}${d}`; }
-  function openLogs(){ window.open('/logs/', '_blank'); }
-  function appendColored(outEl, cls, text){
-    const span = document.createElement('span');
-    span.className = cls;
-    span.textContent = text;
-    outEl.appendChild(span);
-    outEl.appendChild(document.createTextNode("\\n"));
-    outEl.scrollTop = outEl.scrollHeight;
-  }
-
-  function setBarProgress(barId, textId, current, total){
-    const bar = document.getElementById(barId);
-    const txt = document.getElementById(textId);
-    const pct = total > 0 ? Math.min(100, Math.floor(100*current/total)) : 0;
-    if (bar) bar.style.width = pct + "%";
-    if (txt) txt.textContent = `${current} / ${total} (${pct}%)`;
-  }
-  function resetHyperoptProgress(total){
-    setBarProgress('hoptProgressBar', 'hoptProgressText', 0, total || 0);
-  }
-
-  function applySpacesRules(){
-    const boxes = Array.from(document.querySelectorAll("input[name='spaces']"));
-    if (!boxes.length) return;
-    const allBox = boxes.find(b => b.value === "all");
-    const defBox = boxes.find(b => b.value === "default");
-    const wantedDefault = ["buy","sell","roi","stoploss"];
-
-    const setDis = (b, disabled) => {
-      b.disabled = !!disabled;
-      const lbl = b.parentElement;
-      lbl.style.opacity = disabled ? .6 : 1;
-    };
-
-    if (allBox && allBox.checked){
-      boxes.forEach(b => { if (b !== allBox){ b.checked = false; setDis(b, true); } else setDis(b, false); });
-      return;
-    }
-    if (defBox && defBox.checked){
-      boxes.forEach(b => {
-        if (b.value === "default"){ setDis(b, false); }
-        else if (wantedDefault.includes(b.value)){ b.checked = true; setDis(b, true); }
-        else { b.checked = false; setDis(b, true); }
-      });
-      return;
-    }
-    boxes.forEach(b => setDis(b, false));
-  }
-
-  document.addEventListener("DOMContentLoaded", () => {
-    applySpacesRules();
-    document.querySelectorAll("input[name='spaces']").forEach(b => b.addEventListener("change", applySpacesRules));
-
-    const lossSel = document.getElementById('hyperoptloss');
-    const lossDesc = document.getElementById('lossDesc');
-    if (lossSel){
-      LOSS_ITEMS.forEach(it => {
-        const opt = document.createElement('option');
-        opt.value = it.value; opt.textContent = it.label; opt.title = it.desc;
-        lossSel.appendChild(opt);
-      });
-      lossSel.value = "OnlyProfitHyperOptLoss";
-      const updateDesc = () => {
-        const cur = LOSS_ITEMS.find(x => x.value === lossSel.value);
-        lossDesc.textContent = cur ? cur.desc : "";
-      };
-      lossSel.addEventListener('change', updateDesc);
-      updateDesc();
-    }
+    _open_sinks = set()
+    _registry_lock = threading.Lock()
+    _flusher = None
+
+    def __init__(self, path: str, *, flush_bytes: int = LOG_FLUSH_BYTES, flush_interval: float = LOG_FLUSH_INTERVAL_S, mode: str = "w"):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.bytes_written = 0
+        self.lines_written = 0
+        self.flush_count = 0
+        self.flush_time_total = 0.0
+        self.flush_time_max = 0.0
+        self._buf = []
+        self._buf_bytes = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._fh = open(path, mode + "b")
+        self.closed = False
+        with LogSink._registry_lock:
+            LogSink._open_sinks.add(self)
+            if LogSink._flusher is None and flush_interval > 0:
+                LogSink._flusher = threading.Thread(target=LogSink._flush_loop, name="log-flusher", daemon=True)
+                LogSink._flusher.start()
+
+    def write(self, text: str):
+        data = text.encode("utf-8", errors="replace")
+        with self._lock:
+            if self.closed:
+                return
+            self._buf.append(data)
+            self._buf_bytes += len(data)
+            self.lines_written += 1
+            if self._buf_bytes >= self.flush_bytes or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            if not self.closed:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buf:
+            return
+        t0 = time.perf_counter()
+        chunk = b"".join(self._buf)
+        self._fh.write(chunk)
+        self._fh.flush()
+        elapsed = time.perf_counter() - t0
+        METRICS.inc("ftpanel_log_bytes_written_total", len(chunk))
+        METRICS.inc("ftpanel_log_lines_written_total", len(self._buf))
+        METRICS.observe("ftpanel_log_flush_seconds", elapsed)
+        self.bytes_written += len(chunk)
+        self.flush_count += 1
+        self.flush_time_total += elapsed
+        self.flush_time_max = max(self.flush_time_max, elapsed)
+        self._buf = []
+        self._buf_bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self._flush_locked()
+            finally:
+                self.closed = True
+                self._fh.close()
+        with LogSink._registry_lock:
+            LogSink._open_sinks.discard(self)
+
+    @classmethod
+    def is_open(cls, path: str) -> bool:
+        """Un LogSink de ce process écrit-il encore dans `path` ?"""
+        path = os.path.abspath(path)
+        with cls._registry_lock:
+            return any(os.path.abspath(s.path) == path for s in cls._open_sinks)
+
+    def stats(self):
+        return {
+            "path": self.path, "bytes_written": self.bytes_written, "lines": self.lines_written,
+            "flushes": self.flush_count,
+            "flush_avg_ms": (1000.0 * self.flush_time_total / self.flush_count) if self.flush_count else 0.0,
+            "flush_max_ms": 1000.0 * self.flush_time_max,
+        }
 
-    const jwSel = document.getElementById('jobworkers');
-    if (jwSel){
-      const max = Math.max(1, NB_CPU || 1);
-      for (let i=1;i<=max;i++){
-        const opt = document.createElement('option');
-        opt.value = String(i); opt.textContent = String(i);
-        jwSel.appendChild(opt);
-      }
-      jwSel.value = String(max);
-    }
-  });
-
-  async function refreshStrategies(){
-    const r = await fetch('/api/list_strategies'); if(!r.ok) return;
-    const { strategies=[] } = await r.json();
-    const sel = document.getElementById('strategy'); const cur = sel.value; sel.innerHTML = "";
-    strategies.forEach(s => { const opt = document.createElement('option'); opt.value=s; opt.textContent=s; if(s===cur) opt.selected=true; sel.appendChild(opt); });
-  }
-  async function refreshJsons(){
-    const a = await fetch('/api/list_jsons'); const b = await fetch('/api/list_jsons_apply');
-    if(a.ok){
-      const { json_files=[] } = await a.json();
-      const sel = document.getElementById('bt_json_sel'); const cur = sel.value; sel.innerHTML = "";
-      const ph = document.createElement('option'); ph.value=""; ph.textContent="— Utiliser le {strategy}.json courant —"; if(cur==="") ph.selected=true; sel.appendChild(ph);
-      json_files.forEach(p => { const opt = document.createElement('option'); opt.value=p; opt.textContent=p; if(p===cur) opt.selected=true; sel.appendChild(opt); });
-    }
-    if(b.ok){
-      const { json_files_apply=[] } = await b.json();
-      const sel2 = document.getElementById('apply_json_sel'); const cur2 = sel2.value; sel2.innerHTML = "";
-      json_files_apply.forEach(p => { const opt = document.createElement('option'); opt.value=p; opt.textContent=p; if(p===cur2) opt.selected=true; sel2.appendChild(opt); });
-    }
-  }
-  async function refreshGitPaths(){
-    const r = await fetch('/api/git_paths'); if(!r.ok) return;
-    const { git_paths_list=[] } = await r.json();
-    const sel = document.getElementById('git_path'); const cur = sel.value; sel.innerHTML = "";
-    git_paths_list.forEach(p => { const opt = document.createElement('option'); opt.value=p; opt.textContent=p; if(p===cur) opt.selected=true; sel.appendChild(opt); });
-  }
-  async function refreshLists(){ await Promise.allSettled([refreshStrategies(), refreshJsons(), refreshGitPaths()]); }
-
-  function collectTimeframes(){ return Array.from(document.querySelectorAll("input[name='tf']:checked")).map(b => b.value); }
-  function setDownloadProgress(current, total){
-    setBarProgress('dlProgressBar', 'dlProgressText', current, total);
-  }
-
-  function startStream(action, extraParams={}){
-    if(sources[action]) sources[action].close();
-    lockFor(action);
-
-    const strategy = document.getElementById('strategy').value.trim();
-    const start_date = document.getElementById('start_date')?.value || "";
-    const end_date = document.getElementById('end_date')?.value || "";
-    const start_ymd = toYMD(start_date);
-    const end_ymd = toYMD(end_date);
-
-    const outEl = document.getElementById('out-'+action);
-    const stEl  = document.getElementById('status-'+action);
-    outEl.textContent = ""; stEl.textContent = "Exécution en cours…";
-
-    const params = new URLSearchParams({ action, strategy, start_ymd, ...extraParams });
-    if (action === 'backtest' && end_ymd) params.set('end_ymd', end_ymd);
-    if (action === 'hyperopt' && end_ymd) params.set('end_ymd', end_ymd);
-
-    const src = new EventSource('/run_stream?'+params.toString());
-    sources[action] = src;
-
-    if(action === 'download'){ setDownloadProgress(0, 0); }
-    if(action === 'hyperopt'){
-      const tot = parseInt(extraParams.epochs || '100', 10);
-      resetHyperoptProgress(tot);
-    }
+    @staticmethod
+    def _flush_loop():
+        while True:
+            time.sleep(LOG_FLUSH_INTERVAL_S)
+            with LogSink._registry_lock:
+                sinks = list(LogSink._open_sinks)
+            now = time.monotonic()
+            for sink in sinks:
+                if sink._buf and now - sink._last_flush >= sink.flush_interval:
+                    try:
+                        sink.flush()
+                    except Exception:
+                        pass
+
+# ---------- Catalogue des logs ----------
+LOG_NAME_RE = re.compile(r"^(?P<action>.+)_(?P<ts>\d{8}_\d{6})\.log$")
 
-    // Affiche la commande exécutée
-    src.addEventListener('line', ev => {
-      const pre = document.getElementById('out-'+action);
-      const div = document.createElement('div');
-      div.className = 'muted';
-      div.textContent = ev.data;
-      pre.appendChild(div);
-      pre.appendChild(document.createTextNode("\\n"));
-      pre.scrollTop = pre.scrollHeight;
-    });
-
-    src.addEventListener('meta', ev => {
-      try{
-        const meta = JSON.parse(ev.data);
-        if(action === 'download' && typeof meta.total_steps === 'number'){
-          setDownloadProgress(0, meta.total_steps);
+class LogCatalog:
+    """
+    Index SQLite des runs (un enregistrement par fichier de log) : action, stratégie, timerange,
+    code retour, durée, lignes, taille. Sert le listing paginé/filtré sans parcourir log_app/.
+    """
+
+    COLUMNS = ("filename", "action", "strategy", "timerange", "job_id", "status",
+               "started_at", "finished_at", "duration_s", "returncode", "lines", "bytes",
+               "compression", "disk_bytes")
+
+    def __init__(self, path: str, log_dir: str):
+        self.path = path
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            created = not self._db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='runs'").fetchone()
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    filename TEXT PRIMARY KEY, action TEXT, strategy TEXT, timerange TEXT, job_id TEXT,
+                    status TEXT, started_at REAL, finished_at REAL, duration_s REAL,
+                    returncode INTEGER, lines INTEGER, bytes INTEGER)""")
+            cols = {r[1] for r in self._db.execute("PRAGMA table_info(runs)")}
+            for col, decl in (("compression", "TEXT"), ("disk_bytes", "INTEGER")):
+                if col not in cols:
+                    self._db.execute(f"ALTER TABLE runs ADD COLUMN {col} {decl}")
+            self._db.execute("CREATE INDEX IF NOT EXISTS runs_started ON runs(started_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS runs_action ON runs(action, started_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS runs_strategy ON runs(strategy, started_at)")
+        if created:
+            self.import_existing()
+
+    def mark_interrupted(self):
+        """Runs restés "running" : l'app a été arrêtée pendant le job (appelé au démarrage du serveur, pas à l'import)."""
+        with self._lock, self._db:
+            return self._db.execute("UPDATE runs SET status='interrupted' WHERE status='running'").rowcount
+
+    def import_existing(self):
+        """Import unique des logs antérieurs au catalogue (métadonnées déduites du nom et de la taille)."""
+        rows = []
+        for fn in os.listdir(self.log_dir):
+            m = LOG_NAME_RE.match(fn)
+            if not m:
+                continue
+            try:
+                st = os.stat(os.path.join(self.log_dir, fn))
+                started = dt.datetime.strptime(m.group("ts"), "%Y%m%d_%H%M%S").timestamp()
+            except (OSError, ValueError):
+                continue
+            rows.append((fn, m.group("action"), "unknown", started, st.st_mtime, st.st_size))
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO runs (filename, action, status, started_at, finished_at, bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def start(self, filename: str, *, action: str, strategy: str, timerange: str, job_id: str):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO runs (filename, action, strategy, timerange, job_id, status, started_at) "
+                "VALUES (?, ?, ?, ?, ?, 'running', ?)",
+                (filename, action, strategy, timerange, job_id, time.time()))
+
+    def finish(self, filename: str, *, returncode: int, lines: int, nbytes: int, cancelled: bool = False):
+        now = time.time()
+        status = "cancelled" if cancelled else ("ok" if returncode == 0 else "error")
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE runs SET status=?, finished_at=?, duration_s=? - started_at, returncode=?, lines=?, bytes=? "
+                "WHERE filename=?",
+                (status, now, now, returncode, lines, nbytes, filename))
+
+    def get(self, filename: str):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM runs WHERE filename=?", (filename,)).fetchone()
+        return dict(row) if row else None
+
+    def query(self, *, action: str = "", strategy: str = "", status: str = "", q: str = "",
+              page: int = 1, per_page: int = LOGS_PAGE_SIZE):
+        """Retourne (runs de la page, nombre total) ; les plus récents d'abord."""
+        where, args = [], []
+        for col, val in (("action", action), ("strategy", strategy), ("status", status)):
+            if val:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if q:
+            where.append("filename LIKE ?")
+            args.append(f"%{q}%")
+        clause = (" WHERE " + " AND ".join(where)) if where else ""
+        page = max(1, page)
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM runs{clause}", args).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT * FROM runs{clause} ORDER BY started_at DESC, filename DESC LIMIT ? OFFSET ?",
+                args + [per_page, (page - 1) * per_page]).fetchall()
+        return [dict(r) for r in rows], total
+
+    def pending_compression(self, min_age_s: float):
+        """Runs terminés, non compressés, depuis au moins `min_age_s` secondes : [(filename, job_id), ...]."""
+        limit = time.time() - min_age_s
+        with self._lock:
+            return [(r[0], r[1]) for r in self._db.execute(
+                "SELECT filename, job_id FROM runs WHERE status != 'running' AND compression IS NULL "
+                "AND COALESCE(finished_at, started_at) < ?", (limit,))]
+
+    def set_compressed(self, filename: str, compression: str, disk_bytes: int):
+        with self._lock, self._db:
+            self._db.execute("UPDATE runs SET compression=?, disk_bytes=? WHERE filename=?",
+                             (compression, disk_bytes, filename))
+
+    def retention_candidates(self):
+        """Runs terminés groupés par action, du plus récent au plus ancien : (filename, job_id, started_at, octets disque)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT action, filename, job_id, started_at, COALESCE(disk_bytes, bytes, 0) FROM runs "
+                "WHERE status != 'running' ORDER BY started_at DESC").fetchall()
+        grouped = collections.defaultdict(list)
+        for action, filename, job_id, started_at, nbytes in rows:
+            grouped[action].append((filename, job_id, started_at or 0, nbytes))
+        return grouped
+
+    def delete(self, filenames):
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM runs WHERE filename=?", [(fn,) for fn in filenames])
+
+    def typical_duration(self, action: str, limit: int = 20):
+        """Durée médiane des derniers runs réussis de `action` (None sans historique)."""
+        with self._lock:
+            rows = sorted(r[0] for r in self._db.execute(
+                "SELECT duration_s FROM runs WHERE action=? AND status='ok' AND duration_s IS NOT NULL "
+                "ORDER BY started_at DESC LIMIT ?", (action, limit)))
+        return rows[len(rows) // 2] if rows else None
+
+    def facets(self):
+        """Valeurs distinctes pour les filtres du listing."""
+        with self._lock:
+            return {
+                col: [r[0] for r in self._db.execute(
+                    f"SELECT DISTINCT {col} FROM runs WHERE {col} IS NOT NULL ORDER BY {col}")]
+                for col in ("action", "strategy", "status")
+            }
+
+LOG_CATALOG = LogCatalog(LOG_CATALOG_PATH, LOG_DIR)
+
+# ---------- Rétention et compression des logs ----------
+LOG_COMPRESSION = "zstd" if zstandard is not None else "gzip"
+LOG_COMPRESSED_EXT = {"gzip": ".gz", "zstd": ".zst"}
+LOG_IO_CHUNK = 1024 * 1024
+
+def compressed_log_path(path: str):
+    """(chemin, encodage) de la version compressée d'un log, ou None."""
+    for encoding, ext in LOG_COMPRESSED_EXT.items():
+        if os.path.isfile(path + ext):
+            return path + ext, encoding
+    return None
+
+def open_compressed_log(path: str, encoding: str):
+    """Flux binaire décompressé d'un log compressé."""
+    if encoding == "gzip":
+        return gzip.open(path, "rb")
+    if zstandard is None:
+        raise RuntimeError("log compressé en zstd mais le paquet zstandard n'est pas installé")
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+def compress_log_file(path: str, encoding: str = LOG_COMPRESSION, may_remove=None):
+    """
+    Compresse `path` en flux (fichier temporaire puis renommage) et supprime l'original.
+    `may_remove()` est revérifié juste avant la suppression : s'il renvoie False, la copie compressée
+    est abandonnée, l'original gardé, et la fonction renvoie None.
+    """
+    dst = path + LOG_COMPRESSED_EXT[encoding]
+    tmp = dst + ".tmp"
+    st = os.stat(path)
+    with open(path, "rb") as src, open(tmp, "wb") as raw:
+        if encoding == "gzip":
+            out = gzip.GzipFile(filename=os.path.basename(path), mode="wb", compresslevel=6, fileobj=raw, mtime=int(st.st_mtime))
+        else:
+            out = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False)
+        with out:
+            shutil.copyfileobj(src, out, LOG_IO_CHUNK)
+    if may_remove is not None and not may_remove():
+        os.remove(tmp)
+        return None
+    os.utime(tmp, (st.st_atime, st.st_mtime))
+    os.replace(tmp, dst)
+    os.remove(path)
+    return dst
+
+_UNPACK_LOCK = threading.Lock()
+
+def unpack_log(filename: str, packed_path: str, encoding: str) -> str:
+    """Copie décompressée d'un log (pour l'index de lignes / mmap), gardée LOG_UNPACKED_KEEP_S après usage."""
+    dst = os.path.join(LOG_UNPACK_DIR, filename)
+    with _UNPACK_LOCK:
+        if not (os.path.isfile(dst) and os.path.getmtime(dst) >= os.path.getmtime(packed_path)):
+            ensure_dir(LOG_UNPACK_DIR)
+            tmp = dst + ".tmp"
+            with open_compressed_log(packed_path, encoding) as src, open(tmp, "wb") as out:
+                shutil.copyfileobj(src, out, LOG_IO_CHUNK)
+            os.replace(tmp, dst)
+        else:
+            os.utime(dst)
+    return dst
+
+def retention_policy(action: str) -> dict:
+    return {**LOG_RETENTION["*"], **LOG_RETENTION.get(action, {})}
+
+class LogRetention:
+    """
+    Worker de fond : compresse les logs des runs terminés puis applique, par action,
+    les limites d'âge / de nombre / de taille totale de LOG_RETENTION (fichier + entrée du catalogue).
+    Le statut du catalogue ne suffit pas (il peut venir d'un autre process) : un log dont le LogSink est
+    encore ouvert ou dont le job n'est pas terminé dans JOBS n'est jamais compressé ni supprimé.
+    """
+
+    def __init__(self, catalog: LogCatalog, log_dir: str):
+        self.catalog = catalog
+        self.log_dir = log_dir
+        self.last_run = None
+        self.last_stats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="log-retention", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[LOGS] Rétention : {e}", file=sys.stderr)
+            time.sleep(LOG_RETENTION_INTERVAL_S)
+
+    def run_once(self) -> dict:
+        with self._lock:
+            stats = {"compressed": 0, "saved_bytes": 0, "deleted": 0, "freed_bytes": 0, "unpacked_removed": 0}
+            self._compress(stats)
+            self._prune(stats)
+            self._clean_unpacked(stats)
+            self.last_run = time.time()
+            self.last_stats = stats
+            return stats
+
+    @staticmethod
+    def in_use(path: str, job_id) -> bool:
+        if LogSink.is_open(path):
+            return True
+        job = JOBS.get(job_id) if job_id else None
+        return job is not None and not job.done
+
+    def _compress(self, stats):
+        for filename, job_id in self.catalog.pending_compression(LOG_COMPRESS_MIN_AGE_S):
+            path = os.path.join(self.log_dir, filename)
+            if self.in_use(path, job_id):
+                continue
+            if not os.path.isfile(path):
+                packed = compressed_log_path(path)
+                if packed:   # déjà compressé (catalogue recréé)
+                    self.catalog.set_compressed(filename, packed[1], os.path.getsize(packed[0]))
+                continue
+            size = os.path.getsize(path)
+            dst = compress_log_file(path, may_remove=lambda: not self.in_use(path, job_id))
+            if dst is None:
+                continue
+            disk = os.path.getsize(dst)
+            self.catalog.set_compressed(filename, LOG_COMPRESSION, disk)
+            with _LOG_INDEXES_LOCK:
+                _LOG_INDEXES.pop(path, None)
+            stats["compressed"] += 1
+            stats["saved_bytes"] += size - disk
+
+    def _prune(self, stats):
+        now = time.time()
+        doomed = []
+        for action, runs in self.catalog.retention_candidates().items():
+            pol = retention_policy(action)
+            max_age = pol["max_age_days"] * 86400 if pol.get("max_age_days") else None
+            total = 0
+            for i, (filename, job_id, started_at, nbytes) in enumerate(runs):
+                total += nbytes
+                if ((pol.get("max_count") and i >= pol["max_count"])
+                        or (max_age and now - started_at > max_age)
+                        or (pol.get("max_bytes") and total > pol["max_bytes"])):
+                    doomed.append((filename, job_id, nbytes))
+        deleted = []
+        for filename, job_id, nbytes in doomed:
+            path = os.path.join(self.log_dir, filename)
+            if self.in_use(path, job_id):
+                continue
+            for candidate in [path] + [path + ext for ext in LOG_COMPRESSED_EXT.values()] + [os.path.join(LOG_UNPACK_DIR, filename)]:
+                try:
+                    os.remove(candidate)
+                except FileNotFoundError:
+                    pass
+            deleted.append(filename)
+            stats["deleted"] += 1
+            stats["freed_bytes"] += nbytes
+        if deleted:
+            self.catalog.delete(deleted)
+
+    def _clean_unpacked(self, stats):
+        if not os.path.isdir(LOG_UNPACK_DIR):
+            return
+        limit = time.time() - LOG_UNPACKED_KEEP_S
+        for fn in os.listdir(LOG_UNPACK_DIR):
+            path = os.path.join(LOG_UNPACK_DIR, fn)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+                    stats["unpacked_removed"] += 1
+            except OSError:
+                pass
+
+LOG_RETENTION_WORKER = LogRetention(LOG_CATALOG, LOG_DIR)
+
+# ---------- Lecture des logs (index de lignes, plages, recherche) ----------
+def log_file_path(filename: str):
+    """
+    Chemin lisible d'un log de LOG_DIR (copie décompressée si le log a été compressé),
+    ou None si le nom sort du dossier / n'existe pas.
+    """
+    path = safe_join(LOG_DIR, filename)
+    if not path:
+        return None
+    if os.path.isfile(path):
+        return path
+    packed = compressed_log_path(path)
+    return unpack_log(filename, *packed) if packed else None
+
+class LogLineIndex:
+    """
+    Index creux d'un fichier de log : un couple (offset, n° de ligne) tous les ~LOG_INDEX_BLOCK octets.
+    Étendu incrémentalement quand le fichier grossit ; une plage de lignes ne relit qu'un bloc + la fenêtre.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, ino):
+        self._ino = ino
+        self.offsets = [0]       # début de ligne
+        self.line_nos = [0]      # n° (0-based) de cette ligne
+        self.size = 0            # octets indexés
+        self.newlines = 0        # nombre de "\n" dans les octets indexés
+        self.last_line_start = 0
+
+    @property
+    def total_lines(self):
+        return self.newlines + (1 if self.size > self.last_line_start else 0)
+
+    def refresh(self):
+        with self._lock:
+            st = os.stat(self.path)
+            if st.st_ino != self._ino or st.st_size < self.size:
+                self._reset(st.st_ino)
+            if st.st_size == self.size:
+                return self
+            with open(self.path, "rb") as f:
+                f.seek(self.size)
+                while self.size < st.st_size:
+                    block = f.read(min(LOG_INDEX_BLOCK, st.st_size - self.size))
+                    if not block:
+                        break
+                    n = block.count(b"\n")
+                    if n:
+                        self.newlines += n
+                        self.last_line_start = self.size + block.rfind(b"\n") + 1
+                        if self.last_line_start - self.offsets[-1] >= LOG_INDEX_BLOCK:
+                            self.offsets.append(self.last_line_start)
+                            self.line_nos.append(self.newlines)
+                    self.size += len(block)
+            return self
+
+    def _checkpoint_for_line(self, line_no: int):
+        i = bisect.bisect_right(self.line_nos, line_no) - 1
+        return self.offsets[i], self.line_nos[i]
+
+    def line_at(self, offset: int, mm=None) -> int:
+        """N° de ligne (0-based) contenant l'octet `offset`."""
+        i = bisect.bisect_right(self.offsets, offset) - 1
+        start, line_no = self.offsets[i], self.line_nos[i]
+        if mm is not None:
+            return line_no + mm[start:offset].count(b"\n")
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return line_no + f.read(offset - start).count(b"\n")
+
+    def read_lines(self, start: int, count: int):
+        """Lit `count` lignes à partir de la ligne `start` : (lignes, offset de début, offset de fin)."""
+        offset, line_no = self._checkpoint_for_line(start)
+        lines, budget = [], LOG_VIEW_MAX_BYTES
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while line_no < start:
+                if not f.readline():
+                    break
+                line_no += 1
+            first = f.tell()
+            while len(lines) < count and budget > 0:
+                raw = f.readline(budget)
+                if not raw:
+                    break
+                budget -= len(raw)
+                lines.append(raw.rstrip(b"\r\n").decode("utf-8", errors="replace"))
+            return lines, first, f.tell()
+
+_LOG_INDEXES = collections.OrderedDict()
+_LOG_INDEXES_LOCK = threading.Lock()
+
+def log_line_index(path: str) -> LogLineIndex:
+    """Index du fichier (gardé en mémoire pour les 32 logs consultés le plus récemment), mis à jour."""
+    with _LOG_INDEXES_LOCK:
+        idx = _LOG_INDEXES.pop(path, None) or LogLineIndex(path)
+        _LOG_INDEXES[path] = idx
+        while len(_LOG_INDEXES) > 32:
+            _LOG_INDEXES.popitem(last=False)
+    return idx.refresh()
+
+def search_log(path: str, pattern: str, *, regex: bool = False, ignore_case: bool = False,
+               start_offset: int = 0, max_matches: int = LOG_SEARCH_MAX_MATCHES):
+    """
+    Recherche dans un log via mmap (pas de lecture complète en mémoire).
+    Retourne (correspondances [{offset, line, text}], offset de reprise ou None si fin du fichier).
+    """
+    idx = log_line_index(path)
+    if idx.size == 0 or not pattern:
+        return [], None
+    needle = pattern.encode("utf-8")
+    if regex or ignore_case:
+        rx = re.compile(needle if regex else re.escape(needle), re.IGNORECASE if ignore_case else 0)
+    matches = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if regex or ignore_case:
+            found = ((m.start(), m.end()) for m in rx.finditer(mm, start_offset) if m.end() > m.start())
+        else:
+            def _substring_hits(pos=start_offset):
+                while True:
+                    pos = mm.find(needle, pos)
+                    if pos < 0:
+                        return
+                    yield pos, pos + len(needle)
+                    pos += len(needle)
+            found = _substring_hits()
+        next_offset = None
+        try:
+            for start, end in found:
+                if len(matches) >= max_matches:
+                    next_offset = start
+                    break
+                ls = max(mm.rfind(b"\n", 0, start) + 1, start - 200)
+                le = mm.find(b"\n", start)
+                le = len(mm) if le < 0 else le
+                matches.append({
+                    "offset": start, "length": end - start, "line": idx.line_at(start, mm),
+                    "text": mm[ls:min(le, ls + 500)].decode("utf-8", errors="replace").rstrip("\r"),
+                })
+        finally:
+            found.close()   # libère le finditer (il référence le mmap) avant sa fermeture
+    return matches, next_offset
+
+# ---------- Progression Hyperopt ----------
+# Une seule regex combinée (alternatives nommées) au lieu de 5 regex + 1 fallback par ligne.
+HOPT_PROGRESS_RE = re.compile(
+    r"\bepoch\s*[:\- ]*\s*(?P<e1>\d+)\s*/\s*(?P<t1>\d+)\b"                      # "Epoch 7/100"
+    r"|\b(?P<e2>\d+)\s*/\s*(?P<t2>\d+)\s*(?:epochs?\b|:)"                          # "7/100 epochs", "Best   7/100:"
+    r"|\btrial\s+(?P<e3>\d+)\s*(?:of|/)\s*(?P<t3>\d+)\b"                           # "Trial 7 of 100"
+    r"|\btrial\s+(?P<e4>\d+)\b"                                                 # "Trial 7 finished ..."
+    r"|\bepoch[^\d]*(?P<e5>\d+)\b",                                             # "Epoch 7"
+    re.IGNORECASE,
+)
+HOPT_TRADES_RE = re.compile(r"\b(\d+)\s+trades\b", re.IGNORECASE)
+HOPT_PROFIT_RE = re.compile(r"total profit\s+-?[\d.]+\s*\w*\s*\(\s*(-?[\d.]+)\s*%", re.IGNORECASE)
+HOPT_LOSS_RE = re.compile(r"(?:objective|with value)\s*:?\s*(-?\d+(?:\.\d+)?(?:e[-+]?\d+)?)", re.IGNORECASE)
+
+class HyperoptProgressParser:
+    """
+    Extrait la progression d'un hyperopt (freqtrade / optuna) ligne par ligne.
+    Préfiltre par mots-clés (la plupart des lignes s'arrêtent là), puis une regex combinée ;
+    renvoie un dict {current, total, best_loss, trades, profit} seulement quand l'état change.
+    """
+
+    def __init__(self, total_epochs: int):
+        self.total = max(1, int(total_epochs))
+        self.current = 0
+        self.best_loss = None
+        self.trades = None
+        self.profit = None
+
+    def feed(self, line: str, low: str | None = None):
+        if low is None:
+            low = line.lower()
+        if "epoch" not in low and "trial" not in low and "objective" not in low:
+            return None
+        m = HOPT_PROGRESS_RE.search(line)
+        if m is None:
+            return None
+        before = (self.current, self.best_loss, self.trades, self.profit)
+
+        cur = next(int(v) for v in (m.group("e1"), m.group("e2"), m.group("e3"), m.group("e4"), m.group("e5")) if v is not None)
+        self.current = max(self.current, min(cur, self.total))
+
+        lm = HOPT_LOSS_RE.search(line)
+        if lm:
+            loss = float(lm.group(1))
+            if self.best_loss is None or loss < self.best_loss:
+                self.best_loss = loss
+                tm = HOPT_TRADES_RE.search(line)
+                pm = HOPT_PROFIT_RE.search(line)
+                self.trades = int(tm.group(1)) if tm else None
+                self.profit = float(pm.group(1)) if pm else None
+
+        if (self.current, self.best_loss, self.trades, self.profit) == before:
+            return None
+        return self.snapshot()
+
+    def snapshot(self, current: int | None = None):
+        return {
+            "current": self.current if current is None else current, "total": self.total,
+            "best_loss": self.best_loss, "trades": self.trades, "profit": self.profit,
         }
-        if(action === 'hyperopt' && typeof meta.epochs_total === 'number'){
-          resetHyperoptProgress(meta.epochs_total);
+
+# ---------- Jobs (process détachés des requêtes HTTP) ----------
+class Job:
+    """
+    Une action en cours d'exécution dans un thread dédié.
+    Les événements émis sont numérotés (id SSE) et gardés dans un buffer circulaire
+    pour permettre aux clients de se rattacher (Last-Event-ID) sans relancer l'action.
+    """
+
+    def __init__(self, job_id: str, opts: dict):
+        self.id = job_id
+        self.opts = opts
+        self.action = opts.get("action", "")
+        self.created_at = time.time()
+        self.finished_at = None
+        self.returncode = None
+        self.events = collections.deque(maxlen=JOB_RING_SIZE)
+        self.last_seq = 0
+        self.cancelled = False
+        self._cond = threading.Condition()
+        self._procs = []
+        self._logs = []
+        self._cleanups = []
+        self._subs = set()   # JobSubscription : un par client SSE connecté
+        self.slots = 0           # cœurs réservés auprès du JobManager
+        self.started_at = None   # None tant que le job attend en file
+        self.queue_position = 0
+        self.eta_s = None
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    def emit(self, event: str, data: str):
+        with self._cond:
+            self.last_seq += 1
+            ev = (self.last_seq, event, data)
+            self.events.append(ev)
+            if event == "end":
+                try:
+                    self.returncode = json.loads(data).get("returncode")
+                except Exception:
+                    pass
+            for sub in self._subs:
+                sub._push(ev)
+            self._notify()
+        METRICS.inc("ftpanel_job_events_total", action=self.action, event=event)
+
+    def finish(self):
+        with self._cond:
+            self.finished_at = time.time()
+            self._notify()
+
+    def _notify(self):
+        """Réveille les abonnés (threads et coroutines) ; appelé sous self._cond."""
+        self._cond.notify_all()
+        for sub in self._subs:
+            sub._wake()
+
+    def _events_since(self, last_id: int):
+        """(événements d'id > last_id, nb d'événements sortis du buffer) ; ids contigus -> lecture par la fin."""
+        if not self.events:
+            return [], 0
+        first = self.events[0][0]
+        lost = max(0, first - last_id - 1)
+        n = self.last_seq - max(last_id, first - 1)
+        return list(itertools.islice(reversed(self.events), max(0, n)))[::-1], lost
+
+    def subscribe(self, last_id: int = 0) -> "JobSubscription":
+        """Nouvel abonné au flux, qui reprend après l'événement `last_id` (rejeu depuis le buffer)."""
+        sub = JobSubscription(self, last_id)
+        with self._cond:
+            self._subs.add(sub)
+        METRICS.inc("ftpanel_sse_connections_total")
+        return sub
+
+    def unsubscribe(self, sub: "JobSubscription"):
+        with self._cond:
+            self._subs.discard(sub)
+
+    def open_log(self, path: str) -> LogSink:
+        sink = LogSink(path)
+        self._logs.append(sink)
+        return sink
+
+    def add_cleanup(self, fn):
+        """Enregistre une fonction appelée en fin de job (succès, erreur ou annulation)."""
+        self._cleanups.append(fn)
+
+    def run_cleanups(self):
+        while self._cleanups:
+            try:
+                self._cleanups.pop()()
+            except Exception:
+                pass
+
+    def close_logs(self):
+        for sink in self._logs:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+    def track(self, proc):
+        with self._cond:
+            self._procs.append(proc)
+            if self.cancelled and proc.poll() is None:
+                proc.terminate()
+
+    def popen(self, cmd, **kwargs):
+        proc = start_process(cmd, **kwargs)
+        self.track(proc)
+        return proc
+
+    def cancel(self):
+        with self._cond:
+            self.cancelled = True
+            procs = list(self._procs)
+        for p in procs:
+            if p.poll() is None:
+                try:
+                    p.terminate()
+                except Exception:
+                    pass
+
+    def summary(self):
+        return {
+            "job_id": self.id, "action": self.action, "strategy": self.opts.get("strategy"),
+            "created_at": self.created_at, "finished_at": self.finished_at,
+            "done": self.done, "returncode": self.returncode, "last_event_id": self.last_seq,
+            "subscribers": len(self._subs),
+            "state": "done" if self.done else ("running" if self.started_at else "queued"),
+            "slots": self.slots, "queue_position": self.queue_position, "eta_s": self.eta_s,
         }
-      }catch(_){}
-    });
-
-    src.addEventListener('progress', ev => {
-      try{ const data = JSON.parse(ev.data); setDownloadProgress(data.current||0, data.total||0); }catch(_){}
-    });
-
-    src.addEventListener('hopt_progress', ev => {
-      try{
-        const data = JSON.parse(ev.data);
-        setBarProgress('hoptProgressBar', 'hoptProgressText', data.current||0, data.total||0);
-      }catch(_){}
-    });
-
-    src.addEventListener('warn', ev => appendColored(document.getElementById('out-'+action), "warn", ev.data));
-    src.addEventListener('err',  ev => appendColored(document.getElementById('out-'+action), "err",  ev.data));
-
-    src.addEventListener('result', ev => {
-      const pre = document.getElementById('out-'+action);
-      const div = document.createElement('div');
-      div.className = 'result';
-      div.textContent = ev.data;
-      pre.appendChild(div);
-      pre.scrollTop = pre.scrollHeight;
-    });
-
-    src.addEventListener('end', ev => {
-      try{
-        const data = JSON.parse(ev.data);
-        const ok = data.returncode === 0;
-        const cls = ok ? 'ok' : 'err';
-        const txt = ok ? 'Terminé ✓' : 'Terminé avec erreurs ✗';
-        const link = data.log_download ? ` — Log : <a href="${data.log_download}" target="_blank">ouvrir</a>` : '';
-        stEl.innerHTML = `<span class="${cls}">${txt}</span>${link}`;
-        if(action === 'download' && ok && data.total_steps){ setDownloadProgress(data.total_steps, data.total_steps); }
-        if(action === 'hyperopt' && typeof data.epochs_total === 'number'){ setBarProgress('hoptProgressBar','hoptProgressText', data.epochs_total, data.epochs_total); }
-      }catch(_){
-        stEl.innerHTML = `<span class="err">Terminé (parsing meta échoué)</span>`;
-      }
-      src.close(); delete sources[action];
-      unlockAll();
-      refreshLists();
-    });
-
-    src.onerror = () => {
-      stEl.innerHTML = '<span class="err">Erreur de streaming</span>';
-      src.close(); delete sources[action];
-      unlockAll();
-      refreshLists();
-    };
-  }
-
-  function startDownload(){
-    const tfs = collectTimeframes();
-    const erase = document.getElementById('dl_erase').checked ? "1" : "0";
-    startStream('download', { tfs: tfs.join(","), erase });
-  }
-  function startBacktest(){
-    const chosen = document.getElementById('bt_json_sel')?.value || "";
-    const extra = {}; if(chosen) extra.bt_json = chosen;
-    startStream('backtest', extra);
-  }
-  function startHyperopt(){
-    const epochs = Math.max(1, parseInt(document.getElementById('epochs').value || '100', 10));
-    const spaces = Array.from(document.querySelectorAll("input[name='spaces']:checked")).map(b => b.value);
-    const loss = (document.getElementById('hyperoptloss')?.value || 'OnlyProfitHyperOptLoss').trim();
-    const jobw = (document.getElementById('jobworkers')?.value || '').trim();
-    startStream('hyperopt', {
-      epochs:String(epochs),
-      spaces: spaces.join(","),
-      hyperopt_loss: loss,
-      job_workers: jobw
-    });
-  }
-  function startApplyStrategy(){
-    const chosen = document.getElementById('apply_json_sel')?.value || "";
-    if(!chosen){ alert("Sélectionne un fichier .json à appliquer !"); return; }
-    startStream('apply_strategy', { apply_json: chosen });
-  }
-  function startGitPush(){
-    const val = document.getElementById('git_path')?.value || "";
-    if(!val){
-      document.getElementById('status-git_push').textContent = "Aucun chemin Git sélectionné.";
-      document.getElementById('out-git_push').textContent = "";
-      return;
-    }
-    startStream('git_push', { git_path_single: val });
-  }
-</script>
-</body>
-</html>
-"""
-    return render_template_string(
-        html,
-        strategies=strategies,
-        default_strategy=default_strategy,
-        default_date_input=html_default_date_input(),
-        default_end_date_input=html_end_date_input(),
-        git_paths_list=read_git_paths_list(),
-        json_files=json_files,
-        json_files_apply=json_files_apply,
-        pair_count=pair_count,
-        nb_cpu=cpu_count_safe(),
-        loss_items_json=json.dumps([{"value":v, "label":lbl, "desc":desc} for (v,lbl,desc) in HYPEROPT_LOSSES], ensure_ascii=False)
-    )
 
-@app.get("/run_stream")
-def run_stream():
+class JobSubscription:
     """
-    Stream SSE par action.
-    - Hyperopt : sauvegarde le JSON, lance, renomme le JSON généré, puis restaure la sauvegarde.
-    - Backtest (si fichier .json sélectionné) : swap temporaire avec <strategy>.json puis restauration.
+    Un abonné au flux d'un job (onglet, client SSE). Job.emit() pousse dans sa file bornée sans jamais bloquer :
+    un abonné trop lent voit sa file vidée puis se resynchronise depuis le buffer circulaire du job,
+    sans freiner le process ni les autres abonnés.
+    """
+
+    def __init__(self, job: Job, last_id: int):
+        self.job = job
+        self.cursor = last_id
+        self.queue = collections.deque()
+        self.resync = True     # rattrapage initial (Last-Event-ID) depuis le buffer circulaire
+        self._waiter = None    # (loop, future) d'une attente asynchrone
+
+    # --- appelées sous job._cond ---
+    def _push(self, ev):
+        if self.resync:
+            return
+        if len(self.queue) >= JOB_SUBSCRIBER_QUEUE:
+            self.queue.clear()
+            self.resync = True
+            return
+        self.queue.append(ev)
+
+    def _pending(self):
+        return bool(self.queue) or self.job.done or (self.resync and self.job.last_seq > self.cursor)
+
+    def _take(self):
+        if self.resync:
+            self.resync = False
+            self.queue.clear()
+            batch, lost = self.job._events_since(self.cursor)
+        else:
+            batch, lost = list(self.queue), 0
+            self.queue.clear()
+        if batch:
+            self.cursor = batch[-1][0]
+        return batch, lost
+
+    def _wake(self):
+        if self._waiter is not None:
+            loop, fut = self._waiter
+            self._waiter = None
+            loop.call_soon_threadsafe(_resolve_future, fut)
+
+    # --- côté lecteur ---
+    def next(self, timeout: float, window: float = 0.0):
+        """
+        (nouveaux événements, nb perdus) ; attend au plus `timeout` s s'il n'y a rien.
+        Avec `window` > 0, dès qu'un événement arrive, laisse encore `window` s aux suivants pour les regrouper.
+        """
+        with self.job._cond:
+            if not self._pending():
+                self.job._cond.wait(timeout)
+            if not (window > 0 and self._pending() and not self.job.done):
+                return self._take()
+        time.sleep(window)
+        with self.job._cond:
+            return self._take()
+
+    async def next_async(self, timeout: float, window: float = 0.0):
+        """Comme next(), sans bloquer de thread : attente sur une future de la boucle asyncio."""
+        loop = asyncio.get_running_loop()
+        with self.job._cond:
+            if not self._pending():
+                fut = loop.create_future()
+                self._waiter = (loop, fut)
+            else:
+                fut = None
+        if fut is not None:
+            try:
+                await asyncio.wait_for(fut, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self.job._cond:
+                    self._waiter = None
+        if window > 0:
+            with self.job._cond:
+                collect = self._pending() and not self.job.done
+            if collect:
+                await asyncio.sleep(window)
+        with self.job._cond:
+            return self._take()
+
+    def close(self):
+        self.job.unsubscribe(self)
+
+def job_cpu_capacity():
+    return max(1, cpu_count_safe() - JOB_CPU_RESERVE)
+
+def job_cpu_slots(opts: dict, capacity: int):
+    """
+    Cœurs réservés par une action : hyperopt = --job-workers (tous si non précisé, -n à la joblib),
+    batch / walk-forward / download = leur parallélisme, backtest = 1, apply / git = 0 (jamais mis en file).
+    """
+    action = opts.get("action")
+    if action == "hyperopt":
+        jw = opts.get("job_workers") or 0
+        need = jw if jw > 0 else (capacity if jw == 0 else max(1, cpu_count_safe() + 1 + jw))
+    elif action in ("batch_backtest", "walk_forward"):
+        need = opts.get("batch_parallel") or 1
+    elif action == "download":
+        need = opts.get("dl_parallel") or 1
+    elif action in ("backtest", "backtest_bear"):
+        need = 1
+    else:
+        need = 0
+    return min(max(0, int(need)), capacity) if need else 0
+
+class JobManager:
+    """
+    Registre des jobs : lance chaque action dans un thread et garde les jobs terminés JOB_KEEP_S secondes.
+    Admission par cœurs : un job démarre quand ses slots tiennent dans la capacité libre, dans l'ordre d'arrivée
+    (pas de dépassement par un petit job, pour ne pas affamer un gros hyperopt) ; apply / git passent toujours.
     """
-    action    = (request.args.get("action") or "").strip()
-    strategy  = (request.args.get("strategy") or DEFAULT_STRATEGY).strip()
-    start_ymd = (request.args.get("start_ymd") or "").strip() or default_start_date()
-    end_ymd   = (request.args.get("end_ymd") or "").strip()
-    bt_json   = (request.args.get("bt_json") or "").strip()
-    apply_json = (request.args.get("apply_json") or "").strip() if action == "apply_strategy" else ""
 
-    epochs_param = request.args.get("epochs", "").strip()
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._queue = []        # jobs en attente, ordre d'arrivée
+        self._running = set()
+        self._used = 0
+
+    def submit(self, opts: dict, on_done=None) -> Job:
+        """`on_done(job)` est enregistré avant la mise en file : appelé même si le job échoue aussitôt démarré."""
+        self._prune()
+        job_id = dt.datetime.now().strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        job = Job(job_id, opts)
+        if on_done is not None:
+            job.add_cleanup(lambda: on_done(job))
+        job.slots = job_cpu_slots(opts, self.capacity)
+        if opts.get("action") == "hyperopt":
+            opts["job_workers"] = job.slots        # la réservation borne réellement les workers
+        elif opts.get("action") in ("batch_backtest", "walk_forward"):
+            opts["batch_parallel"] = job.slots
+        METRICS.inc("ftpanel_jobs_submitted_total", action=job.action)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._queue.append(job)
+        self._dispatch()
+        return job
+
+    def _dispatch(self):
+        """Démarre les jobs admissibles puis publie position et démarrage estimé aux jobs restés en file."""
+        started = []
+        with self._lock:
+            blocked = False
+            for job in list(self._queue):
+                if job.slots and (blocked or self._used + job.slots > self.capacity):
+                    blocked = True
+                    continue
+                self._queue.remove(job)
+                self._running.add(job)
+                self._used += job.slots
+                job.started_at = time.time()
+                started.append(job)
+            waiting = list(self._queue)
+            running = list(self._running)
+        for job in started:
+            METRICS.inc("ftpanel_jobs_started_total", action=job.action)
+            METRICS.observe("ftpanel_job_queue_wait_seconds", job.started_at - job.created_at, action=job.action)
+            if job.queue_position:
+                job.queue_position, job.eta_s = 0, None
+                job.emit("queue", json.dumps({"state": "running", "slots": job.slots}))
+            threading.Thread(target=self._run, args=(job,), name=f"job-{job.id}", daemon=True).start()
+        if waiting:
+            self._publish_queue(waiting, running)
+
+    def _expected_duration(self, job: Job):
+        return LOG_CATALOG.typical_duration(job.action) or JOB_DEFAULT_DURATION_S
+
+    def _publish_queue(self, waiting, running):
+        """Simule la libération des cœurs (fin estimée des jobs en cours) pour dater le démarrage de chaque job en file."""
+        now = time.time()
+        ends = [(max(now, j.started_at + self._expected_duration(j)), j.slots) for j in running]
+        heapq.heapify(ends)
+        free = self.capacity - sum(j.slots for j in running)
+        t = now
+        for pos, job in enumerate(waiting, 1):
+            while free < job.slots and ends:
+                t_end, slots = heapq.heappop(ends)
+                t, free = max(t, t_end), free + slots
+            free -= job.slots
+            heapq.heappush(ends, (t + self._expected_duration(job), job.slots))
+            eta = round(t - now)
+            if (pos, eta // 30) != (job.queue_position, (job.eta_s or 0) // 30):
+                job.emit("queue", json.dumps({"state": "queued", "position": pos, "eta_s": eta,
+                                              "slots": job.slots, "capacity": self.capacity}))
+            job.queue_position, job.eta_s = pos, eta
+
+    def _run(self, job: Job):
+        saw_end = False
+        try:
+            for event, data in action_events(job, job.opts):
+                job.emit(event, data)
+                saw_end = saw_end or event == "end"
+        except Exception as e:
+            job.emit("err", f"[JOB] Erreur interne: {e}")
+        finally:
+            job.close_logs()
+            job.run_cleanups()
+            if not saw_end:
+                job.emit("end", json.dumps({"returncode": 1, "log_download": ""}))
+            job.finish()
+            with self._lock:
+                self._running.discard(job)
+                self._used -= job.slots
+            status = "cancelled" if job.cancelled else ("ok" if job.returncode == 0 else "error")
+            METRICS.inc("ftpanel_jobs_finished_total", action=job.action, status=status)
+            METRICS.observe("ftpanel_job_duration_seconds", job.finished_at - job.started_at, action=job.action)
+            self._dispatch()
+
+    def cancel(self, job: Job):
+        """Annule un job : retiré de la file s'il n'a pas démarré, sinon ses process sont terminés."""
+        with self._lock:
+            queued = job in self._queue
+            if queued:
+                self._queue.remove(job)
+        if not queued:
+            job.cancel()
+            return
+        job.cancelled = True
+        job.queue_position, job.eta_s = 0, None
+        job.emit("warn", "[FILE] Job annulé avant son démarrage.")
+        job.emit("end", json.dumps({"returncode": 1, "log_download": ""}))
+        job.run_cleanups()
+        job.finish()
+        METRICS.inc("ftpanel_jobs_finished_total", action=job.action, status="cancelled")
+        self._dispatch()
+
+    def status(self):
+        with self._lock:
+            return {"capacity": self.capacity, "used": self._used, "queued": len(self._queue),
+                    "running": len(self._running)}
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        self._prune()
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at)
+
+    def _prune(self):
+        limit = time.time() - JOB_KEEP_S
+        with self._lock:
+            for jid in [jid for jid, j in self._jobs.items() if j.done and j.finished_at < limit]:
+                del self._jobs[jid]
+
+JOBS = JobManager(job_cpu_capacity())
+
+def _job_gauges():
+    """Jauges lues au scrape de /metrics : file des jobs, zygote."""
+    sched = JOBS.status()
+    yield "ftpanel_jobs_running", {}, sched["running"]
+    yield "ftpanel_jobs_queued", {}, sched["queued"]
+    yield "ftpanel_cpu_slots_used", {}, sched["used"]
+    yield "ftpanel_cpu_slots_capacity", {}, sched["capacity"]
+    yield "ftpanel_zygote_up", {}, 1 if FT_ZYGOTE_POOL.status()["state"] == "ready" else 0
+    yield "ftpanel_start_time_seconds", {}, METRICS.started_at
+
+METRICS.add_collector(_job_gauges)
+
+def stream_job_response(job: Job, last_id: int, batched: bool = False):
+    """
+    Réponse SSE qui rejoue les événements du job après `last_id` puis suit le direct.
+    `batched` : une frame "batch" par fenêtre SSE_BATCH_WINDOW_S au lieu d'une frame par événement.
+    """
+    window = SSE_BATCH_WINDOW_S if batched else 0.0
+    def generate():
+        sub = job.subscribe(last_id)
+        METRICS.inc("ftpanel_sse_clients", 1, server="thread")
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                batch, lost = sub.next(JOB_KEEPALIVE_S, window)
+                if not batch and job.done:
+                    return
+                chunk = (job_sse_batch(batch, lost) if batched else job_sse_chunk(batch, lost)).encode("utf-8")
+                METRICS.inc("ftpanel_sse_bytes_total", len(chunk), server="thread")
+                yield chunk
+        finally:
+            sub.close()
+            METRICS.inc("ftpanel_sse_clients", -1, server="thread")
+
+    return Response(generate(), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Connection": "keep-alive"}
+
+def job_sse_chunk(batch, lost: int):
+    """Frames SSE d'un lot d'événements de job (keepalive si vide)."""
+    parts = []
+    if lost:
+        parts.append(sse_format("warn", f"[JOB] {lost} événement(s) plus anciens non rejoués (buffer plein)."))
+    for seq, event, data in batch:
+        parts.append(sse_format(event, data, event_id=seq))
+    return "".join(parts) if batch else "".join(parts) + ": keepalive\n\n"
+
+def job_sse_batch(batch, lost: int):
+    """
+    Une seule frame SSE "batch" (id = dernier événement) dont la donnée est la liste JSON [[event, data], ...] ;
+    les événements de SSE_COALESCE_EVENTS n'y figurent qu'une fois, avec leur dernière valeur.
+    """
+    if not batch:
+        return ": keepalive\n\n"
+    items = []
+    if lost:
+        items.append(["warn", f"[JOB] {lost} événement(s) plus anciens non rejoués (buffer plein)."])
+    latest = {}
+    for _, event, data in batch:
+        if event in SSE_COALESCE_EVENTS:
+            if event in latest:
+                items[latest[event]] = None
+            latest[event] = len(items)
+        items.append([event, data])
+    payload = json.dumps([it for it in items if it is not None], ensure_ascii=False)
+    return sse_format("batch", payload, event_id=batch[-1][0])
+
+def wants_batch(args):
+    return (args.get("batch") or "").strip() in ("1", "true", "yes")
+
+def parse_last_event_id(req):
+    raw = (req.headers.get("Last-Event-ID") or req.args.get("last_id") or "").strip()
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return 0
+
+# ---------- Paramètres d'action ----------
+def parse_run_params(args):
+    """Extrait les paramètres d'une action depuis la query string (ou un formulaire)."""
+    action    = (args.get("action") or "").strip()
+    strategy  = (args.get("strategy") or DEFAULT_STRATEGY).strip()
+    start_ymd = (args.get("start_ymd") or "").strip() or default_start_date()
+    end_ymd   = (args.get("end_ymd") or "").strip()
+    bt_json   = (args.get("bt_json") or "").strip()
+    apply_json = (args.get("apply_json") or "").strip() if action == "apply_strategy" else ""
+
+    epochs_param = args.get("epochs", "").strip()
     try:
         epochs = int(epochs_param) if epochs_param else 100
         if epochs < 1: epochs = 100
     except:
         epochs = 100
 
-    spaces_csv = (request.args.get("spaces") or "").strip()
+    spaces_csv = (args.get("spaces") or "").strip()
     spaces = [s for s in spaces_csv.split(",") if s] if spaces_csv else None
     if spaces == ["default"]:
         spaces = None
 
-    hyperopt_loss = (request.args.get("hyperopt_loss") or "").strip() or "OnlyProfitHyperOptLoss"
-    job_workers_param = (request.args.get("job_workers") or "").strip()
+    hyperopt_loss = (args.get("hyperopt_loss") or "").strip() or "OnlyProfitHyperOptLoss"
+    job_workers_param = (args.get("job_workers") or "").strip()
     try:
         job_workers = int(job_workers_param) if job_workers_param else None
     except:
         job_workers = None
 
-    tfs_csv = (request.args.get("tfs") or "").strip()
+    tfs_csv = (args.get("tfs") or "").strip()
     timeframes = [t for t in tfs_csv.split(",") if t] if tfs_csv else None
-    erase = ((request.args.get("erase") or "0").strip() == "1")
+    erase = ((args.get("erase") or "0").strip() == "1")
+    try:
+        dl_parallel = int((args.get("dl_parallel") or "").strip() or 1)
+    except ValueError:
+        dl_parallel = 1
+    dl_parallel = max(1, min(dl_parallel, DOWNLOAD_MAX_PARALLEL))
+    try:
+        dl_chunk = max(0, int((args.get("dl_chunk") or "").strip() or 0))
+    except ValueError:
+        dl_chunk = 0
 
-    git_path_single = request.args.get("git_path_single", "").strip() if action == "git_push" else ""
+    git_path_single = args.get("git_path_single", "").strip() if action == "git_push" else ""
 
-    if action == "backtest":
+    dl_resample = ((args.get("dl_resample") or "0").strip() == "1")
+
+    force = ((args.get("force") or "0").strip() == "1")
+    bt_glob = (args.get("bt_glob") or "").strip() if action == "batch_backtest" else ""
+    try:
+        batch_parallel = int((args.get("batch_parallel") or "").strip() or cpu_count_safe())
+    except ValueError:
+        batch_parallel = cpu_count_safe()
+    batch_parallel = max(1, min(batch_parallel, cpu_count_safe()))
+
+    try:
+        wf_windows = int((args.get("wf_windows") or "").strip() or WF_DEFAULT_WINDOWS)
+    except ValueError:
+        wf_windows = WF_DEFAULT_WINDOWS
+    wf_windows = max(2, min(wf_windows, WF_MAX_WINDOWS))
+    wf_mode = "anchored" if (args.get("wf_mode") or "").strip() == "anchored" else "rolling"
+    wf_optimize = ((args.get("wf_optimize") or "0").strip() == "1")
+    try:
+        wf_oos_pct = float((args.get("wf_oos_pct") or "").strip() or WF_DEFAULT_OOS_PCT)
+    except ValueError:
+        wf_oos_pct = WF_DEFAULT_OOS_PCT
+    wf_oos_pct = max(5.0, min(wf_oos_pct, 50.0))
+
+    return {
+        "action": action,
+        "strategy": strategy,
+        "start_ymd": start_ymd,
+        "end_ymd": end_ymd,
+        "bt_json": bt_json,
+        "apply_json": apply_json,
+        "epochs": epochs,
+        "spaces": spaces,
+        "hyperopt_loss": hyperopt_loss,
+        "job_workers": job_workers,
+        "timeframes": timeframes,
+        "erase": erase,
+        "dl_parallel": dl_parallel,
+        "dl_chunk": dl_chunk,
+        "dl_resample": dl_resample,
+        "git_path_single": git_path_single,
+        "force": force,
+        "bt_glob": bt_glob,
+        "batch_parallel": batch_parallel,
+        "wf_windows": wf_windows,
+        "wf_mode": wf_mode,
+        "wf_optimize": wf_optimize,
+        "wf_oos_pct": wf_oos_pct,
+    }
+
+def action_events(job, opts):
+    """
+    Exécute une action et génère ses événements SSE sous forme de tuples (event, data).
+    - Backtest / Hyperopt : tournent dans un workspace isolé (user_data/.workspaces/<job>) ;
+      les fichiers partagés de user_data/strategies ne sont jamais déplacés.
+    - Hyperopt : le JSON généré dans le workspace est rangé sous <strategy>_<epochs>_<loss>_<start>_<end>.json.
+    """
+    action = opts["action"]
+    strategy = opts["strategy"]
+    start_ymd = opts["start_ymd"]
+    end_ymd = opts["end_ymd"]
+    bt_json = opts["bt_json"]
+    apply_json = opts["apply_json"]
+    epochs = opts["epochs"]
+    spaces = opts["spaces"]
+    hyperopt_loss = opts["hyperopt_loss"]
+    job_workers = opts["job_workers"]
+    timeframes = opts["timeframes"]
+    erase = opts["erase"]
+    dl_parallel = opts["dl_parallel"]
+    dl_chunk = opts["dl_chunk"]
+    git_path_single = opts["git_path_single"]
+
+    if action in ("backtest", "batch_backtest", "walk_forward"):
         if not end_ymd:
             end_ymd = default_end_date()
         if start_ymd and end_ymd and start_ymd > end_ymd:
-            def bad_dates():
-                yield sse_format("err", f"Plage de dates invalide: START({start_ymd}) > END({end_ymd}).")
-                payload = {"returncode": 1, "log_download": ""}
-                yield sse_format("end", json.dumps(payload))
-            return Response(bad_dates(), mimetype="text/event-stream")
+            yield "err", f"Plage de dates invalide: START({start_ymd}) > END({end_ymd})."
+            yield "end", json.dumps({"returncode": 1, "log_download": ""})
+            return
 
+    # Backtest / hyperopt : commande complète (workspace du job compris), affichée et journalisée telle quelle
+    ws_dir = strategy_workspace_dir(job.id)
+    export_dir = workspace_export_dir(job.id) if action in ("backtest", "backtest_bear") else None
     try:
         if action == "git_push":
             cmd = ["git", "-C", git_path_single, "status"]
         elif action == "download":
             cmd = None
         elif action == "backtest":
-            cmd = build_cmd("backtest", strategy, start_ymd, end_ymd=end_ymd)
+            cmd = build_cmd("backtest", strategy, start_ymd, end_ymd=end_ymd, strategy_path=ws_dir, export_dir=export_dir)
         elif action == "backtest_bear":
-            cmd = build_cmd("backtest_bear", strategy, start_ymd)
+            cmd = build_cmd("backtest_bear", strategy, start_ymd, strategy_path=ws_dir, export_dir=export_dir)
         elif action == "hyperopt":
-            cmd = build_cmd("hyperopt", strategy, start_ymd, end_ymd=end_ymd, epochs=epochs, spaces=spaces, hyperopt_loss=hyperopt_loss, job_workers=job_workers)
+            cmd = build_cmd("hyperopt", strategy, start_ymd, end_ymd=end_ymd, epochs=epochs, spaces=spaces, hyperopt_loss=hyperopt_loss, job_workers=job_workers, strategy_path=ws_dir)
         elif action == "apply_strategy":
             cmd = None
+        elif action in ("batch_backtest", "walk_forward"):
+            cmd = None
         else:
             raise ValueError("Action inconnue")
     except Exception as e:
-        def err_stream():
-            yield sse_format("err", f"Erreur: {e}")
-            payload = {"returncode": 1, "log_download": ""}
-            yield sse_format("end", json.dumps(payload))
-        return Response(err_stream(), mimetype="text/event-stream")
+        yield "err", f"Erreur: {e}"
+        yield "end", json.dumps({"returncode": 1, "log_download": ""})
+        return
 
     ts = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
     log_path = os.path.join(LOG_DIR, f"{action}_{ts}.log")
 
     pairs = read_pair_whitelist_from_exchange_config()
     tfs_list = timeframes if timeframes else ["1h", "1d"]
-    total_steps_download = (len(pairs) * len(tfs_list)) if action == "download" else 0
+    total_steps_download = 0
+    dl_tasks, dl_stats = [], {}
+    resample_base, resample_tfs = None, []
+    if action == "download":
+        try:
+            # Option : ne télécharger que le plus petit timeframe et dériver localement ses multiples
+            dl_tfs = tfs_list
+            if opts["dl_resample"] and len(tfs_list) > 1:
+                fmt = CONFIG.get().get("dataformat_ohlcv") or "feather"
+                if resample_supported(fmt):
+                    resample_base, resample_tfs, others = split_resample_timeframes(tfs_list)
+                    dl_tfs = [resample_base] + others
+                else:
+                    yield "warn", f"[RESAMPLE] pandas{'' if fmt in ('json', 'jsongz') else ' / pyarrow'} indisponible : tous les timeframes seront téléchargés."
+            # --erase : tout re-télécharger ; sinon seulement les trous constatés dans user_data/data
+            if erase:
+                dl_tasks = [(label, tf, chunk or pairs, [(None, False)]) for (label, tf, chunk) in plan_download_tasks(dl_tfs, pairs, dl_chunk)]
+            else:
+                dl_tasks, dl_stats = plan_incremental_download(dl_tfs, pairs, start_ymd, chunk_size=dl_chunk)
+        except Exception as e:
+            yield "err", f"[DOWNLOAD] Planification impossible : {e}"
+            yield "end", json.dumps({"returncode": 1, "log_download": ""})
+            return
+        total_steps_download = sum(len(t[2]) * len(t[3]) for t in dl_tasks) + len(pairs) * len(resample_tfs)
     prog_current = 0
 
     def emit_progress():
-        if action != "download":
-            return ""
         payload = {"current": prog_current, "total": total_steps_download}
-        return sse_format("progress", json.dumps(payload))
-
-    # Regex de détection progression Hyperopt (Epoch + Optuna Trial)
-    epoch_patterns = [
-        re.compile(r'\bepoch\s*[:\- ]*\s*(\d+)\s*/\s*(\d+)\b', re.IGNORECASE),  # "Epoch 7/100"
-        re.compile(r'\b(\d+)\s*/\s*(\d+)\s*epochs?\b', re.IGNORECASE),          # "7/100 epochs"
-        re.compile(r'\bepoch[^\d]*(\d+)\b', re.IGNORECASE),                     # "Epoch 7"
-        re.compile(r'\btrial\s+(\d+)\b.*\b(finished|completed|complete|done)\b', re.IGNORECASE),  # "Trial 7 finished"
-        re.compile(r'\btrial\s+(\d+)\s*(?:of|/)\s*(\d+)\b', re.IGNORECASE),     # "Trial 7 of 100"
-    ]
+        return "progress", json.dumps(payload)
+
+    # Entête / commande affichée
+    if action == "git_push":
+        cmd_str = f"git push in {git_path_single or '(none)'}"
+    elif action == "apply_strategy":
+        cmd_str = f"APPLY {strategy}.json <= {apply_json or '(none)'}"
+    elif action == "download":
+        cmd_str = "freqtrade download-data (multi-timeframes) --config config_base.json"
+    elif action == "batch_backtest":
+        cmd_str = f"freqtrade backtesting (batch {opts['bt_glob'] or '(none)'}) --strategy {strategy} --timerange {start_ymd}-{end_ymd}"
+    elif action == "walk_forward":
+        cmd_str = (f"freqtrade {'hyperopt + ' if opts['wf_optimize'] else ''}backtesting "
+                   f"(walk-forward {opts['wf_windows']} fenêtres {opts['wf_mode']}) --strategy {strategy} --timerange {start_ymd}-{end_ymd}")
+    else:
+        cmd_str = " ".join(win_quote(x) for x in cmd) if cmd else "(no external command)"
+    header = f"CMD> {cmd_str}"
+    yield "line", header
+
+    meta = {"logfile": log_path, "cwd": PROJECT_DIR, "cmd": cmd_str}
+    if action == "download":
+        meta["total_steps"] = total_steps_download
+    if action == "hyperopt":
+        meta["epochs_total"] = epochs  # FIX: pas d'accès à request ici
+    if action in ("backtest", "backtest_bear", "hyperopt"):
+        meta["workspace"] = ws_dir
+    yield "meta", json.dumps(meta)
+
+    rc = 0
+    is_download      = (action == "download")
+    is_backtest      = (action == "backtest")
+    is_backtest_bear = (action == "backtest_bear")
+    is_hyperopt      = (action == "hyperopt")
+    is_gitpush       = (action == "git_push")
+    is_apply         = (action == "apply_strategy")
+    is_batch         = (action == "batch_backtest")
+    is_walk_forward  = (action == "walk_forward")
 
-    def generate():
-        nonlocal prog_current
+    sdir = strategies_dir()
+    strat_json_path = os.path.join(sdir, f"{strategy}.json")
 
-        # Entête / commande affichée
-        if action == "git_push":
-            cmd_str = f"git push in {git_path_single or '(none)'}"
-        elif action == "apply_strategy":
-            cmd_str = f"APPLY {strategy}.json <= {apply_json or '(none)'}"
-        elif action == "download":
-            cmd_str = "freqtrade download-data (multi-timeframes) --config config_base.json"
+    log = job.open_log(log_path)
+    log.write(header + "\n")
+    log_name = os.path.basename(log_path)
+    try:
+        if cmd and "--timerange" in cmd:
+            timerange = cmd[cmd.index("--timerange") + 1]
+        elif action in ("batch_backtest", "walk_forward", "download"):
+            timerange = f"{start_ymd}-{end_ymd or ''}"
         else:
-            cmd_str = " ".join(win_quote(x) for x in cmd) if cmd else "(no external command)"
-        header = f"CMD> {cmd_str}"
-        yield sse_format("line", header)
-
-        meta = {"logfile": log_path, "cwd": PROJECT_DIR, "cmd": cmd_str}
-        if action == "download":
-            meta["total_steps"] = total_steps_download
-        if action == "hyperopt":
-            meta["epochs_total"] = epochs  # FIX: pas d'accès à request ici
-        yield sse_format("meta", json.dumps(meta))
-
-        rc = 0
-        is_download      = (action == "download")
-        is_backtest      = (action == "backtest")
-        is_backtest_bear = (action == "backtest_bear")
-        is_hyperopt      = (action == "hyperopt")
-        is_gitpush       = (action == "git_push")
-        is_apply         = (action == "apply_strategy")
-
-        sdir = strategies_dir()
-        strat_json_path = os.path.join(sdir, f"{strategy}.json")
-
-        with open(log_path, "w", encoding="utf-8", errors="replace") as f:
-            f.write(header + "\n")
-
-        # === APPLY STRATEGY ===
-        if is_apply:
-            try:
-                if not apply_json:
-                    msg = "[APPLY] Aucun fichier sélectionné."
-                    yield sse_format("err", msg)
-                    with open(log_path, "a", encoding="utf-8") as f: f.write("ERR: " + msg + "\n")
-                    rc = 1
+            timerange = ""
+        LOG_CATALOG.start(log_name, action=action, strategy=strategy, timerange=timerange, job_id=job.id)
+
+        def _catalog_finish():   # après job.close_logs() : compteurs définitifs
+            rc_final = job.returncode if job.returncode is not None else 1
+            LOG_CATALOG.finish(log_name, returncode=rc_final, lines=log.lines_written,
+                               nbytes=log.bytes_written, cancelled=job.cancelled)
+        job.add_cleanup(_catalog_finish)
+    except sqlite3.Error as e:
+        yield "warn", f"[LOGS] Catalogue indisponible : {e}"
+
+    # Cache de résultats : un backtest identique (code, JSON, configs, données, timerange) n'est pas relancé
+    bt_cache_key = None
+    cached_bt = None
+    if is_backtest or is_backtest_bear:
+        try:
+            params_json = os.path.join(sdir, bt_json) if (is_backtest and bt_json) else strat_json_path
+            if not os.path.isfile(params_json):
+                params_json = strat_json_path
+            bt_cache_key = backtest_cache_key(cmd, params_json)
+            if not opts["force"]:
+                cached_bt = BT_CACHE.get(bt_cache_key)
+        except Exception as e:
+            yield "warn", f"[CACHE] Clé de cache indisponible : {e}"
+
+    # === APPLY STRATEGY ===
+    if is_apply:
+        try:
+            if not apply_json:
+                msg = "[APPLY] Aucun fichier sélectionné."
+                yield "err", msg
+                log.write("ERR: " + msg + "\n")
+                rc = 1
+            else:
+                chosen_path = os.path.join(sdir, apply_json)
+                if apply_json == f"{strategy}.json":
+                    msg = f"[APPLY] Le fichier sélectionné est déjà {strategy}.json : aucune modification appliquée."
+                    yield "warn", msg
+                    log.write("WARN: " + msg + "\n")
                 else:
-                    chosen_path = os.path.join(sdir, apply_json)
-                    if apply_json == f"{strategy}.json":
-                        msg = f"[APPLY] Le fichier sélectionné est déjà {strategy}.json : aucune modification appliquée."
-                        yield sse_format("warn", msg)
-                        with open(log_path, "a", encoding="utf-8") as f: f.write("WARN: " + msg + "\n")
+                    if os.path.isfile(strat_json_path):
+                        ts_backup = dt.datetime.now().strftime("%Y%m%d_%H%M")
+                        backup_name = os.path.join(sdir, f"BAK_{strategy}_{ts_backup}.json")
+                        shutil.move(strat_json_path, backup_name)
+                    if not os.path.isfile(chosen_path):
+                        msg = f"[APPLY] Fichier choisi introuvable: {chosen_path}"
+                        yield "err", msg
+                        log.write("ERR: " + msg + "\n")
+                        rc = 1
                     else:
-                        if os.path.isfile(strat_json_path):
-                            ts_backup = dt.datetime.now().strftime("%Y%m%d_%H%M")
-                            backup_name = os.path.join(sdir, f"BAK_{strategy}_{ts_backup}.json")
-                            shutil.move(strat_json_path, backup_name)
-                        if not os.path.isfile(chosen_path):
-                            msg = f"[APPLY] Fichier choisi introuvable: {chosen_path}"
-                            yield sse_format("err", msg)
-                            with open(log_path, "a", encoding="utf-8") as f: f.write("ERR: " + msg + "\n")
-                            rc = 1
-                        else:
-                            shutil.move(chosen_path, strat_json_path)
+                        shutil.move(chosen_path, strat_json_path)
+        except Exception as e:
+            rc = 1
+            err = f"[APPLY] Erreur: {e}"
+            yield "err", err
+            log.write("ERR: " + err + "\n")
+
+    # === GIT PUSH ===
+    elif is_gitpush:
+        if not git_path_single:
+            msg = "Aucun chemin sélectionné."
+            yield "warn", msg
+            log.write("WARN: " + msg + "\n")
+            rc = 1
+        else:
+            for cmd_ in (["git","-C",git_path_single,"add","-A"],
+                         ["git","-C",git_path_single,"commit","-m",f"auto push {dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"],
+                         ["git","-C",git_path_single,"push"]):
+                try:
+                    proc = job.popen(
+                        cmd_, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                        text=True, encoding="utf-8", errors="replace", bufsize=1,
+                        cwd=PROJECT_DIR
+                    )
+                except Exception as e:
+                    err = f"[GIT] Impossible d'exécuter: {e}"
+                    yield "err", err
+                    log.write("ERR: " + err + "\n")
+                    rc = 1
+                    break
+
+                for raw in proc.stdout:
+                    line = raw.rstrip("\r\n")
+                    low = line.lower()
+                    if is_warn_err(low):
+                        yield "warn" if "warn" in low else "err", line
+                    log.write(line + "\n")
+                code = proc.wait()
+                if code != 0:
+                    rc = 1
+
+    # === BACKTEST servi depuis le cache ===
+    elif cached_bt is not None:
+        when = dt.datetime.fromtimestamp(cached_bt.get("created_at", 0)).strftime("%Y-%m-%d %H:%M:%S")
+        msg = f"[CACHE] Résultat identique déjà calculé le {when} (clé {bt_cache_key}) — cocher « Forcer » pour relancer."
+        yield "line", msg
+        log.write(msg + "\n")
+        try:
+            BacktestCache.restore_exports(cached_bt)
+        except Exception as e:
+            yield "warn", f"[CACHE] Restauration des exports impossible : {e}"
+        if cached_bt.get("result"):
+            log.write("\n".join(cached_bt["result"]) + "\n")
+            yield "result", "\n".join(cached_bt["result"])
+        rc = cached_bt.get("returncode", 0)
+
+    # === BACKTEST / BEAR / HYPEROPT ===
+    elif is_backtest or is_backtest_bear or is_hyperopt:
+        try:
+            # Workspace isolé : le job travaille sur sa propre copie de <strategy>.json (ou du JSON choisi)
+            selected_json_path = os.path.join(sdir, bt_json) if (is_backtest and bt_json) else None
+            if selected_json_path and not os.path.isfile(selected_json_path):
+                yield "warn", f"[BACKTEST] Fichier choisi introuvable, utilisation de {strategy}.json : {bt_json}"
+                selected_json_path = None
+            create_strategy_workspace(job.id, strategy, params_json=selected_json_path)
+            job.add_cleanup(lambda: remove_strategy_workspace(job.id))
+            if export_dir:
+                ensure_dir(export_dir)
+            ws_json_path = os.path.join(ws_dir, f"{strategy}.json")
+            ws_json_mtime = os.stat(ws_json_path).st_mtime_ns if os.path.isfile(ws_json_path) else None
+            yield "line", f"WORKSPACE> {ws_dir}"
+
+            proc = job.popen(
+                cmd, cwd=PROJECT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding="utf-8", errors="replace", bufsize=1,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+            proc_timer = ProcessTimer(action, cmd, proc)
+            if isinstance(proc, ZygoteProcess):
+                yield "line", f"ZYGOTE> pid {proc.pid} (process freqtrade pré-chauffé)"
+        except Exception as e:
+            yield "err", f"Impossible de démarrer le processus: {e}"
+            payload = {"returncode": 1, "log_download": ""}
+            yield "end", json.dumps(payload)
+            return
+
+        # Capture résultats + progression
+        result_buf = []
+        seen_result = False
+        start_token = "hyperopt results" if is_hyperopt else "result for strategy"
+
+        total_epochs = max(1, int(epochs))  # total figé = saisie UI
+        hopt_parser = HyperoptProgressParser(total_epochs)
+
+        for raw in proc.stdout:
+            line = raw.rstrip("\r\n")
+            low = line.lower()
+            proc_timer.line(low)
+
+            log.write(line + "\n")
+
+            if is_warn_err(low):
+                yield "warn" if "warn" in low else "err", line
+
+            # Progress Hyperopt
+            if is_hyperopt:
+                progress = hopt_parser.feed(line, low)
+                if progress is not None:
+                    yield "hopt_progress", json.dumps(progress)
+
+            # Résultats
+            if not seen_result and start_token in low:
+                seen_result = True
+            if seen_result:
+                result_buf.append(line)
+
+        rc = proc.wait()
+        proc_timer.exit(rc)
+
+        if result_buf:
+            yield "result", "\n".join(result_buf)
+
+        exports = []
+        if export_dir:
+            try:
+                exports = publish_backtest_exports(export_dir)
             except Exception as e:
-                rc = 1
-                err = f"[APPLY] Erreur: {e}"
-                yield sse_format("err", err)
-                with open(log_path, "a", encoding="utf-8") as f: f.write("ERR: " + err + "\n")
-
-        # === GIT PUSH ===
-        elif is_gitpush:
-            if not git_path_single:
-                msg = "Aucun chemin sélectionné."
-                yield sse_format("warn", msg)
-                with open(log_path, "a", encoding="utf-8") as f: f.write("WARN: " + msg + "\n")
-                rc = 1
+                yield "warn", f"[BACKTEST] Copie des exports vers backtest_results impossible : {e}"
+
+        if bt_cache_key and rc == 0 and result_buf:
+            try:
+                BT_CACHE.put(bt_cache_key, {"result": result_buf, "returncode": rc, "cmd": cmd_str,
+                                            "created_at": time.time(), "summary": parse_backtest_summary(result_buf)},
+                             exports)
+            except Exception as e:
+                yield "warn", f"[CACHE] Mise en cache impossible : {e}"
+
+        if result_buf and not is_hyperopt:
+            parsed = parse_backtest_result(result_buf)
+            yield record_result(
+                kind=action, strategy=strategy,
+                params_name=os.path.basename(selected_json_path) if selected_json_path else f"{strategy}.json",
+                timerange=cmd[cmd.index("--timerange") + 1], returncode=rc,
+                summary=parsed["summary"], metrics=parsed["metrics"], pairs=parsed["pairs"],
+                params=read_params_json(ws_json_path), log_filename=log_name, job_id=job.id)
+
+        # Post-traitement Hyperopt : le JSON produit dans le workspace est rangé sous un nom unique
+        if is_hyperopt:
+            end_label = end_ymd if end_ymd else "open"
+            final_name = f"{strategy}_{epochs}_{hyperopt_loss}_{start_ymd}_{end_label}.json"
+            try:
+                new_mtime = os.stat(ws_json_path).st_mtime_ns if os.path.isfile(ws_json_path) else None
+                if new_mtime is not None and new_mtime != ws_json_mtime:
+                    with RESULT_NAME_LOCK:   # jobs concurrents : choix du nom + déplacement atomiques
+                        final_path = unique_path(sdir, final_name)
+                        shutil.move(ws_json_path, final_path)
+                    yield "result", f"[HYPEROPT] JSON enregistré : {os.path.basename(final_path)}"
+                    best = hopt_parser.snapshot()
+                    yield record_result(
+                        kind="hyperopt", strategy=strategy, params_name=os.path.basename(final_path),
+                        timerange=cmd[cmd.index("--timerange") + 1], returncode=rc,
+                        summary={"trades": best["trades"], "profit_pct": best["profit"], "loss": best["best_loss"]},
+                        metrics={"epochs": epochs, "hyperopt_loss": hyperopt_loss, "spaces": spaces or ["default"]},
+                        params=read_params_json(final_path), log_filename=log_name, job_id=job.id)
+                else:
+                    yield "warn", "[HYPEROPT] Aucun nouveau JSON trouvé à renommer."
+            except Exception as e:
+                yield "err", f"[HYPEROPT] Échec du renommage : {e}"
+            yield "hopt_progress", json.dumps(hopt_parser.snapshot(current=total_epochs))
+
+    # === BATCH BACKTEST ===
+    elif is_batch:
+        rc = yield from batch_backtest_events(job, opts, log, end_ymd)
+
+    # === WALK-FORWARD ===
+    elif is_walk_forward:
+        rc = yield from walk_forward_events(job, opts, log, end_ymd)
+
+    # === DOWNLOAD (multi-TF) ===
+    elif is_download:
+        if dl_stats:
+            msg = (f"[DOWNLOAD] Plan incrémental : {dl_stats['up_to_date']} à jour, {dl_stats['new']} sans données, "
+                   f"{dl_stats['tail']} à compléter (fin), {dl_stats['head']} à compléter (début)")
+            if dl_stats["unreadable"]:
+                msg += f", {dl_stats['unreadable']} fichier(s) illisible(s) re-téléchargé(s)"
+            if dl_stats["listed_later"]:
+                msg += f", {dl_stats['listed_later']} paire(s) listée(s) après START (début non re-demandé)"
+            yield "line", msg
+            log.write(msg + "\n")
+        if total_steps_download == 0:
+            if dl_stats:
+                yield "result", "[DOWNLOAD] Toutes les paires / timeframes sont à jour."
             else:
-                for cmd_ in (["git","-C",git_path_single,"add","-A"],
-                             ["git","-C",git_path_single,"commit","-m",f"auto push {dt.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"],
-                             ["git","-C",git_path_single,"push"]):
+                yield "warn", "[DOWNLOAD] Aucune étape planifiée (pas de paires/timeframes)."
+            log_download = "/logs/" + os.path.basename(log_path)
+            yield "end", json.dumps({"returncode": 0, "log_download": log_download, "total_steps": total_steps_download})
+            return
+
+        # une tâche "head+tail" enchaîne ses deux commandes dans le même worker (jamais deux écritures simultanées)
+        dl_jobs = [(label, [build_cmd("download", strategy, start_ymd, timeframe=tf, erase=erase, pairs=chunk,
+                                      timerange=timerange, prepend=prepend) for (timerange, prepend) in task_steps])
+                   for (label, tf, chunk, task_steps) in dl_tasks]
+        yield "line", f"[DOWNLOAD] {len(dl_jobs)} tâche(s), {dl_parallel} en parallèle, lancement espacé de {DOWNLOAD_SPAWN_INTERVAL_S}s"
+
+        dl_failed = set()
+        for label, kind, value in iter_parallel_procs(dl_jobs, max_parallel=dl_parallel, spawn_interval=DOWNLOAD_SPAWN_INTERVAL_S, track=job.track, action=action):
+            if kind == "spawn_error":
+                dl_failed.add(label)
+                err = f"[DOWNLOAD] Impossible de démarrer la commande (tf={label}): {value}"
+                yield "err", err
+                log.write("ERR: " + err + "\n")
+                continue
+
+            if kind == "exit":
+                if value:
+                    dl_failed.add(label)
+                    msg = f"[DOWNLOAD] Commande terminée avec code {value} (tf={label})"
+                    yield "warn", msg
+                    log.write("WARN: " + msg + "\n")
+                continue
+
+            line = value
+            low = line.lower()
+
+            if "downloaded data for" in low:
+                if prog_current < total_steps_download:
+                    prog_current += 1
+                    yield emit_progress()
+
+            if is_warn_err(low):
+                tagged = f"[{label}] {line}"
+                yield "warn" if "warn" in low else "err", tagged
+                log.write(("WARN: " if "warn" in low else "ERR: ") + tagged + "\n")
+
+        if not job.cancelled:
+            try:
+                record_history_starts([t for t in dl_tasks if t[0] not in dl_failed], start_ymd)
+            except Exception as e:
+                yield "warn", f"[DOWNLOAD] Début d'historique non mémorisé : {e}"
+
+        # Étape post-download : timeframes dérivés du timeframe de base, une paire par tâche (pandas libère le GIL)
+        if resample_tfs and not job.cancelled:
+            prog_current = total_steps_download - len(pairs) * len(resample_tfs)
+            yield emit_progress()
+            workers = max(1, min(RESAMPLE_MAX_WORKERS, len(pairs)))
+            msg = f"[RESAMPLE] {resample_base} -> {', '.join(resample_tfs)} pour {len(pairs)} paire(s), {workers} en parallèle"
+            yield "line", msg
+            log.write(msg + "\n")
+            failed = 0
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resample") as pool:
+                futures = {pool.submit(resample_pair, pair, resample_base, resample_tfs, erase=erase): pair for pair in pairs}
+                for fut in as_completed(futures):
+                    pair = futures[fut]
                     try:
-                        proc = subprocess.Popen(
-                            cmd_, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                            text=True, encoding="utf-8", errors="replace", bufsize=1,
-                            cwd=PROJECT_DIR
-                        )
+                        results = fut.result()
                     except Exception as e:
-                        err = f"[GIT] Impossible d'exécuter: {e}"
-                        yield sse_format("err", err)
-                        with open(log_path, "a", encoding="utf-8") as f: f.write("ERR: " + err + "\n")
-                        rc = 1
+                        results = [(tf, str(e)) for tf in resample_tfs]
+                    for tf, err in results:
+                        prog_current += 1
+                        if err:
+                            failed += 1
+                            warn = f"[RESAMPLE] {pair} {tf} : {err}"
+                            yield "warn", warn
+                            log.write("WARN: " + warn + "\n")
+                    yield emit_progress()
+                    if job.cancelled:
+                        for f in futures:
+                            f.cancel()
                         break
+            done_msg = f"[RESAMPLE] {len(pairs) * len(resample_tfs) - failed} fichier(s) dérivé(s), {failed} échec(s)"
+            yield "line", done_msg
+            log.write(done_msg + "\n")
 
-                    for raw in proc.stdout:
-                        line = raw.rstrip("\r\n")
-                        low = line.lower()
-                        if is_warn_err(low):
-                            yield sse_format("warn" if "warn" in low else "err", line)
-                        with open(log_path, "a", encoding="utf-8") as f: f.write(line + "\n")
-                    code = proc.wait()
-                    if code != 0:
-                        rc = 1
+    log.close()
+    log_download = "/logs/" + os.path.basename(log_path)
+    payload = {"returncode": rc, "log_download": log_download}
+    if action == "download":
+        payload["total_steps"] = total_steps_download
+    if action == "hyperopt":
+        payload["epochs_total"] = epochs
+    yield "end", json.dumps(payload)
+
+# ---------- Résultats de backtest ----------
+BT_CELL_SPLIT_RE = re.compile(r"\s*[│┃|]\s*")
+BT_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+def _first_number(text: str):
+    m = BT_NUMBER_RE.search(text.replace(",", ""))
+    return float(m.group()) if m else None
+
+def parse_backtest_summary(lines):
+    """
+    Extrait les métriques clés du bloc "Result for strategy" d'un backtest freqtrade
+    (SUMMARY METRICS + ligne TOTAL du BACKTESTING REPORT) : trades, profit, drawdown, win rate.
+    """
+    out = {"trades": None, "profit_pct": None, "profit_abs": None, "drawdown_pct": None, "win_rate": None}
+    for line in lines:
+        cells = [c for c in BT_CELL_SPLIT_RE.split(line.strip()) if c]
+        if len(cells) < 2:
+            continue
+        key, val = cells[0].lower(), cells[1]
+        if key.startswith("total/daily avg trades") or key == "total trades":
+            if out["trades"] is None and _first_number(val) is not None:
+                out["trades"] = int(_first_number(val))
+        elif key.startswith("total profit %"):
+            out["profit_pct"] = _first_number(val)
+        elif key.startswith("absolute profit"):
+            out["profit_abs"] = _first_number(val)
+        elif ("underwater" in key or "drawdown" in key) and "%" in val and out["drawdown_pct"] is None:
+            out["drawdown_pct"] = _first_number(val)
+        elif key == "total":
+            if out["trades"] is None and _first_number(val) is not None:
+                out["trades"] = int(_first_number(val))
+            for cell in cells[2:]:
+                parts = cell.split()
+                if out["win_rate"] is None and len(parts) == 4 and all(BT_NUMBER_RE.fullmatch(p) for p in parts):
+                    out["win_rate"] = float(parts[3])
+    return out
+
+BT_RATIO_METRICS = (   # libellé SUMMARY METRICS (début, minuscule) -> colonne numérique
+    ("sharpe", "sharpe"), ("sortino", "sortino"), ("calmar", "calmar"),
+    ("profit factor", "profit_factor"), ("cagr", "cagr_pct"), ("expectancy", "expectancy"),
+)
+
+def parse_summary_metrics(lines):
+    """Toutes les lignes « libellé │ valeur » du bloc SUMMARY METRICS (valeurs brutes)."""
+    out = {}
+    in_block = False
+    for line in lines:
+        up = line.upper()
+        if "SUMMARY METRICS" in up:
+            in_block = True
+            continue
+        if not in_block:
+            continue
+        if "SUMMARY" in up or "REPORT" in up:   # bloc suivant (STRATEGY SUMMARY, ...)
+            break
+        cells = [c for c in BT_CELL_SPLIT_RE.split(line.strip()) if c]
+        if len(cells) == 2 and cells[0].lower() != "metric" and not set(cells[0]) <= set("━─┏┓┗┛┡┩╇╈┳┻"):
+            out[cells[0]] = cells[1]
+    return out
 
-        # === BACKTEST / BEAR / HYPEROPT ===
-        elif is_backtest or is_backtest_bear or is_hyperopt:
+def parse_pair_rows(lines):
+    """Lignes par paire du tableau BACKTESTING REPORT (hors TOTAL)."""
+    header, rows = None, []
+    in_report = False
+    for line in lines:
+        up = line.upper()
+        if "BACKTESTING REPORT" in up:
+            in_report, header = True, None
+            continue
+        if not in_report:
+            continue
+        if "REPORT" in up or "STATS" in up or "SUMMARY" in up:
+            break
+        cells = [c for c in BT_CELL_SPLIT_RE.split(line.strip()) if c]
+        if len(cells) < 3:
+            continue
+        if header is None:
+            if cells[0].lower() == "pair":
+                header = [c.lower() for c in cells]
+            continue
+        if cells[0].upper() == "TOTAL" or len(cells) != len(header):
+            continue
+        row = {"pair": cells[0], "trades": None, "avg_profit_pct": None, "profit_abs": None,
+               "profit_pct": None, "avg_duration": None, "win_rate": None}
+        for name, val in zip(header[1:], cells[1:]):
+            if name == "trades":
+                n = _first_number(val)
+                row["trades"] = int(n) if n is not None else None
+            elif name.startswith("avg profit"):
+                row["avg_profit_pct"] = _first_number(val)
+            elif name.startswith("tot profit") and "%" in name:
+                row["profit_pct"] = _first_number(val)
+            elif name.startswith("tot profit"):
+                row["profit_abs"] = _first_number(val)
+            elif name.startswith("avg duration"):
+                row["avg_duration"] = val
+            elif "win%" in name.replace(" ", ""):
+                nums = BT_NUMBER_RE.findall(val)
+                row["win_rate"] = float(nums[-1]) if nums else None
+        rows.append(row)
+    return rows
+
+def parse_backtest_result(lines):
+    """Résultat structuré d'un backtest : {summary (métriques numériques), metrics (brutes), pairs}."""
+    metrics = parse_summary_metrics(lines)
+    summary = parse_backtest_summary(lines)
+    summary.update({col: None for _, col in BT_RATIO_METRICS})
+    for label, val in metrics.items():
+        key = label.lower()
+        for prefix, col in BT_RATIO_METRICS:
+            if key.startswith(prefix) and summary[col] is None:
+                summary[col] = _first_number(val)
+    return {"summary": summary, "metrics": metrics, "pairs": parse_pair_rows(lines)}
+
+def resolve_batch_jsons(patterns: str):
+    """Fichiers .json de user_data/strategies correspondant à une liste de motifs séparés par des virgules."""
+    pats = [p.strip() for p in (patterns or "").split(",") if p.strip()]
+    files = list_strategy_jsons()
+    return [fn for fn in files if any(fnmatch.fnmatchcase(fn, p) for p in pats)]
+
+def format_batch_table(rows):
+    cols = [("json", "JSON"), ("profit_pct", "Profit %"), ("profit_abs", "Profit"), ("drawdown_pct", "DD %"),
+            ("trades", "Trades"), ("win_rate", "Win %"), ("returncode", "RC")]
+    return format_text_table(cols, rows)
+
+def format_text_table(cols, rows):
+    """Tableau texte aligné : cols = [(clé, titre), ...], rows = dicts (valeur absente -> "-")."""
+    table = [[label for _, label in cols]]
+    for r in rows:
+        table.append(["-" if r.get(k) is None else str(r.get(k)) for k, _ in cols])
+    widths = [max(len(row[i]) for row in table) for i in range(len(cols))]
+    return "\n".join("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip() for row in table)
+
+def batch_backtest_events(job, opts, log, end_ymd):
+    """Backteste plusieurs JSON de paramètres en parallèle (un workspace par run) ; renvoie le code retour."""
+    strategy, start_ymd = opts["strategy"], opts["start_ymd"]
+    sdir = strategies_dir()
+    files = resolve_batch_jsons(opts["bt_glob"])
+    if not files:
+        msg = f"[BATCH] Aucun fichier .json ne correspond à : {opts['bt_glob'] or '(vide)'}"
+        yield "err", msg
+        log.write("ERR: " + msg + "\n")
+        return 1
+
+    runs = []
+    rows = []
+    cache_keys = {}
+    export_dirs = {}
+    for i, fn in enumerate(files, 1):
+        cmd = build_cmd("backtest", strategy, start_ymd, end_ymd=end_ymd)
+        try:
+            cache_keys[fn] = backtest_cache_key(cmd, os.path.join(sdir, fn))
+        except Exception as e:
+            yield "warn", f"[CACHE] Clé de cache indisponible pour {fn} : {e}"
+        cached = BT_CACHE.get(cache_keys[fn]) if (fn in cache_keys and not opts["force"]) else None
+        if cached is not None:
             try:
-                # SWAP JSON si Backtest + fichier choisi
-                selected_json_path = os.path.join(sdir, bt_json) if (is_backtest and bt_json) else None
-                did_swap = False
-                moved_selected_to_strat = False
-                backup_bt_path = None
-
-                if is_backtest and selected_json_path and os.path.isfile(selected_json_path):
-                    if os.path.basename(selected_json_path) != f"{strategy}.json":
-                        if os.path.isfile(strat_json_path):
-                            backup_bt_path = strat_json_path + ".prebacktest.bak"
-                            shutil.move(strat_json_path, backup_bt_path)
-                        shutil.move(selected_json_path, strat_json_path)
-                        did_swap = True
-                        moved_selected_to_strat = True
-
-                # Commande réelle
-                if is_backtest:
-                    cmd_local = build_cmd("backtest", strategy, start_ymd, end_ymd=end_ymd)
-                elif is_backtest_bear:
-                    cmd_local = build_cmd("backtest_bear", strategy, start_ymd)
-                else:
-                    cmd_local = build_cmd("hyperopt", strategy, start_ymd, end_ymd=end_ymd, epochs=epochs, spaces=spaces, hyperopt_loss=hyperopt_loss, job_workers=job_workers)
+                BacktestCache.restore_exports(cached)
+            except Exception as e:
+                yield "warn", f"[CACHE] Restauration des exports impossible pour {fn} : {e}"
+            rows.append({"json": fn, "returncode": cached.get("returncode", 0), "cached": True,
+                         **(cached.get("summary") or parse_backtest_summary(cached.get("result", [])))})
+            continue
+        ws_id = f"{job.id}-{i}"
+        job.add_cleanup(lambda ws_id=ws_id: remove_strategy_workspace(ws_id))
+        ws_dir = create_strategy_workspace(ws_id, strategy, params_json=os.path.join(sdir, fn))
+        export_dirs[fn] = workspace_export_dir(ws_id)   # exports propres au run : pas de course sur backtest_results
+        ensure_dir(export_dirs[fn])
+        runs.append((fn, build_cmd("backtest", strategy, start_ymd, end_ymd=end_ymd, strategy_path=ws_dir,
+                                   export_dir=export_dirs[fn])))
+
+    parallel = max(1, min(opts["batch_parallel"], len(runs) or 1))
+    yield "line", f"[BATCH] {len(files)} backtest(s) dont {len(rows)} depuis le cache, {parallel} en parallèle"
+    for row in rows:
+        yield "batch_row", json.dumps(row)
+    yield "progress", json.dumps({"current": len(rows), "total": len(files)})
+
+    buffers = {fn: [] for fn, _ in runs}
+    seen = set()
+    for label, kind, value in iter_parallel_procs(runs, max_parallel=parallel, track=job.track, action=job.action):
+        if kind == "line":
+            low = value.lower()
+            log.write(f"[{label}] {value}\n")
+            if is_warn_err(low):
+                yield "warn" if "warn" in low else "err", f"[{label}] {value}"
+            if label not in seen and "result for strategy" in low:
+                seen.add(label)
+            if label in seen:
+                buffers[label].append(value)
+            continue
 
-                # Sauvegarde AVANT Hyperopt
-                backup_hopt_path = None
-                if is_hyperopt and os.path.isfile(strat_json_path):
-                    backup_hopt_path = strat_json_path + ".prehyperopt.bak"
-                    try:
-                        shutil.copy2(strat_json_path, backup_hopt_path)
-                    except Exception as e:
-                        yield sse_format("warn", f"[HYPEROPT] Impossible de sauvegarder {strat_json_path}: {e}")
+        if kind == "spawn_error":
+            yield "err", f"[BATCH] Impossible de démarrer {label}: {value}"
+            code = -1
+        else:
+            code = value if value is not None else -1
+        result = buffers.pop(label, [])
+        parsed = parse_backtest_result(result)
+        summary = parsed["summary"]
+        row = {"json": label, "returncode": code, "cached": False, **summary}
+        if result:
+            yield record_result(
+                kind="backtest", strategy=strategy, params_name=label, timerange=f"{start_ymd}-{end_ymd}",
+                returncode=code, summary=parsed["summary"], metrics=parsed["metrics"], pairs=parsed["pairs"],
+                params=read_params_json(os.path.join(sdir, label)),
+                log_filename=os.path.basename(log.path), job_id=job.id)
+        rows.append(row)
+        exports = []
+        try:
+            exports = publish_backtest_exports(export_dirs[label])
+        except Exception as e:
+            yield "warn", f"[BATCH] Copie des exports de {label} vers backtest_results impossible : {e}"
+        if code == 0 and result and label in cache_keys:
+            try:
+                BT_CACHE.put(cache_keys[label], {"result": result, "returncode": code, "created_at": time.time(), "summary": summary},
+                             exports)
+            except Exception as e:
+                yield "warn", f"[CACHE] Mise en cache impossible pour {label} : {e}"
+        yield "batch_row", json.dumps(row)
+        yield "progress", json.dumps({"current": len(rows), "total": len(files)})
+
+    rows.sort(key=lambda r: (r["profit_pct"] is None, -(r["profit_pct"] or 0)))
+    table = format_batch_table(rows)
+    log.write(table + "\n")
+    yield "batch_summary", json.dumps(rows)
+    yield "result", table
+    return 0 if all(r["returncode"] == 0 for r in rows) else 1
+
+# ---------- Walk-forward ----------
+def plan_walk_forward(start_ymd: str, end_ymd: str, n: int, *, mode: str = "rolling",
+                      optimize: bool = False, oos_pct: float = WF_DEFAULT_OOS_PCT):
+    """
+    Découpe [start, end] en n fenêtres ; renvoie [{"window", "is": (début, fin) | None, "oos": (début, fin)}].
+    - sans optimisation : n segments consécutifs (rolling) ou n périodes croissantes depuis start (anchored) ;
+    - avec optimisation : la fin de la plage est couverte par n segments hors échantillon consécutifs, chacun
+      précédé de son échantillon d'optimisation, de longueur fixe (rolling) ou depuis start (anchored).
+    Lève ValueError si la plage est trop courte.
+    """
+    d0 = dt.datetime.strptime(start_ymd, "%Y%m%d").date()
+    d1 = dt.datetime.strptime(end_ymd, "%Y%m%d").date()
+    days = (d1 - d0).days
+    if optimize:
+        ratio = oos_pct / 100.0
+        step = days / (n + (1 - ratio) / ratio)   # n segments OOS + un échantillon IS avant le premier
+        is_len = step * (1 - ratio) / ratio
+        first = days - n * step
+    else:
+        step, is_len, first = days / n, 0, 0
+    if step < 1:
+        raise ValueError(f"Plage {start_ymd}-{end_ymd} trop courte pour {n} fenêtres")
+
+    day = lambda offset: d0 + dt.timedelta(days=round(offset))
+    ymd = lambda d: d.strftime("%Y%m%d")
+    windows = []
+    for i in range(n):
+        a, b = day(first + i * step), day(first + (i + 1) * step)
+        if optimize:
+            is_start = d0 if mode == "anchored" else max(d0, day(first + i * step - is_len))
+            windows.append({"window": f"W{i + 1}", "is": (ymd(is_start), ymd(a)), "oos": (ymd(a), ymd(b))})
+        else:
+            windows.append({"window": f"W{i + 1}", "is": None, "oos": (ymd(d0 if mode == "anchored" else a), ymd(b))})
+    return windows
+
+def _range_days(timerange: str) -> int:
+    a, _, b = timerange.partition("-")
+    return max(1, (dt.datetime.strptime(b, "%Y%m%d") - dt.datetime.strptime(a, "%Y%m%d")).days)
+
+def walk_forward_stability(rows):
+    """Rapport de stabilité : dispersion du profit hors échantillon, part de fenêtres gagnantes, drawdowns."""
+    profits = [r["profit_pct"] for r in rows if r.get("profit_pct") is not None]
+    drawdowns = [r["drawdown_pct"] for r in rows if r.get("drawdown_pct") is not None]
+    efficiencies = [r["efficiency"] for r in rows if r.get("efficiency") is not None]
+    out = {"windows": len(rows), "measured": len(profits)}
+    if profits:
+        mean = statistics.fmean(profits)
+        std = statistics.stdev(profits) if len(profits) > 1 else 0.0
+        out.update({
+            "profit_mean": round(mean, 2), "profit_std": round(std, 2),
+            "profit_min": min(profits), "profit_max": max(profits),
+            "profitable_pct": round(100.0 * sum(1 for p in profits if p > 0) / len(profits), 1),
+            "cv": round(std / abs(mean), 2) if mean else None,   # coefficient de variation
+        })
+    if drawdowns:
+        out.update({"drawdown_mean": round(statistics.fmean(drawdowns), 2), "drawdown_max": max(drawdowns)})
+    if efficiencies:
+        out["efficiency_mean"] = round(statistics.fmean(efficiencies), 2)
+    return out
 
-                proc = subprocess.Popen(
-                    cmd_local, cwd=PROJECT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                    text=True, encoding="utf-8", errors="replace", bufsize=1,
-                    creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
-                )
+def format_walk_forward_report(rows, stats):
+    cols = [("window", "Fenêtre"), ("is_range", "In-sample"), ("is_profit_pct", "IS %"), ("oos_range", "Out-of-sample"),
+            ("profit_pct", "Profit %"), ("drawdown_pct", "DD %"), ("trades", "Trades"), ("win_rate", "Win %"),
+            ("efficiency", "Eff."), ("returncode", "RC")]
+    labels = [("profit_mean", "Profit moyen %"), ("profit_std", "Écart-type %"), ("profit_min", "Profit min %"),
+              ("profit_max", "Profit max %"), ("profitable_pct", "Fenêtres gagnantes %"), ("cv", "Coef. de variation"),
+              ("drawdown_mean", "DD moyen %"), ("drawdown_max", "DD max %"), ("efficiency_mean", "Efficacité moyenne")]
+    lines = [format_text_table(cols, rows), "",
+             f"[WALK-FORWARD] Stabilité sur {stats['measured']} / {stats['windows']} fenêtre(s) mesurée(s)"]
+    lines += [f"  {label:<22} {stats[key]}" for key, label in labels if stats.get(key) is not None]
+    return "\n".join(lines)
+
+def walk_forward_events(job, opts, log, end_ymd):
+    """
+    Walk-forward : une fenêtre = un workspace ; hyperopt in-sample (option) puis backtest out-of-sample
+    avec les paramètres obtenus. Les fenêtres tournent en parallèle (phase par phase) ; renvoie le code retour.
+    """
+    strategy, start_ymd = opts["strategy"], opts["start_ymd"]
+    optimize, mode = opts["wf_optimize"], opts["wf_mode"]
+    sdir = strategies_dir()
+    try:
+        windows = plan_walk_forward(start_ymd, end_ymd, opts["wf_windows"], mode=mode,
+                                    optimize=optimize, oos_pct=opts["wf_oos_pct"])
+    except ValueError as e:
+        msg = f"[WALK-FORWARD] {e}"
+        yield "err", msg
+        log.write("ERR: " + msg + "\n")
+        return 1
+
+    params_json = os.path.join(sdir, opts["bt_json"]) if opts["bt_json"] else os.path.join(sdir, f"{strategy}.json")
+    if not os.path.isfile(params_json):
+        params_json = os.path.join(sdir, f"{strategy}.json")
+    params_name = os.path.basename(params_json)
+    parallel = max(1, min(opts["batch_parallel"], len(windows)))
+    job_workers = max(1, opts["batch_parallel"] // parallel)   # cœurs réservés répartis entre les hyperopts
+    total_steps = len(windows) * (2 if optimize else 1)
+    done = 0
+
+    yield "line", (f"[WALK-FORWARD] {len(windows)} fenêtre(s) {mode} sur {start_ymd}-{end_ymd}, {parallel} en parallèle, "
+                   + (f"hyperopt in-sample ({opts['epochs']} epochs, {job_workers} worker(s) chacun) puis backtest out-of-sample"
+                      if optimize else f"backtest de {params_name}"))
+    rows = {}
+    ws_dirs = {}
+    for w in windows:
+        label = w["window"]
+        rows[label] = {"window": label, "is_range": "-".join(w["is"]) if w["is"] else None,
+                       "oos_range": "-".join(w["oos"]), "is_profit_pct": None, "efficiency": None,
+                       "returncode": None, "cached": False}
+        line = f"[WALK-FORWARD] {label} : " + (f"IS {rows[label]['is_range']} -> " if w["is"] else "") + f"OOS {rows[label]['oos_range']}"
+        yield "line", line
+        log.write(line + "\n")
+    yield "progress", json.dumps({"current": 0, "total": total_steps})
+
+    ws_id_of = lambda label: f"{job.id}-{label.lower()}"
+
+    def workspace(label):
+        ws_id = ws_id_of(label)
+        job.add_cleanup(lambda: remove_strategy_workspace(ws_id))
+        ws_dirs[label] = create_strategy_workspace(ws_id, strategy, params_json=params_json)
+        return ws_dirs[label]
+
+    # Phase 1 (option) : hyperopt de chaque échantillon in-sample, dans le workspace de la fenêtre
+    failed = set()
+    if optimize:
+        runs, parsers, mtimes = [], {}, {}
+        for w in windows:
+            label = w["window"]
+            ws_dir = workspace(label)
+            ws_json = os.path.join(ws_dir, f"{strategy}.json")
+            mtimes[label] = os.stat(ws_json).st_mtime_ns if os.path.isfile(ws_json) else None
+            parsers[label] = HyperoptProgressParser(opts["epochs"])
+            runs.append((label, build_cmd("hyperopt", strategy, w["is"][0], end_ymd=w["is"][1], epochs=opts["epochs"],
+                                          spaces=opts["spaces"], hyperopt_loss=opts["hyperopt_loss"],
+                                          job_workers=job_workers, strategy_path=ws_dir)))
+        for label, kind, value in iter_parallel_procs(runs, max_parallel=parallel, track=job.track, action=job.action):
+            if kind == "line":
+                low = value.lower()
+                log.write(f"[{label}] {value}\n")
+                if is_warn_err(low):
+                    yield "warn" if "warn" in low else "err", f"[{label}] {value}"
+                parsers[label].feed(value, low)
+                continue
+            if kind == "spawn_error":
+                yield "err", f"[WALK-FORWARD] Impossible de démarrer l'hyperopt {label}: {value}"
+                code = -1
+            else:
+                code = value if value is not None else -1
+            row = rows[label]
+            best = parsers[label].snapshot()
+            row["is_profit_pct"] = best["profit"]
+            ws_json = os.path.join(ws_dirs[label], f"{strategy}.json")
+            new_mtime = os.stat(ws_json).st_mtime_ns if os.path.isfile(ws_json) else None
+            if code != 0 or new_mtime is None or new_mtime == mtimes[label]:
+                failed.add(label)
+                row["returncode"] = code or 1
+                yield "warn", f"[WALK-FORWARD] {label} : hyperopt sans nouveaux paramètres (code {code}), fenêtre ignorée."
+            else:
+                yield record_result(
+                    kind="hyperopt", strategy=strategy, params_name=f"{params_name} [{label} IS]",
+                    timerange=row["is_range"], returncode=code,
+                    summary={"trades": best["trades"], "profit_pct": best["profit"], "loss": best["best_loss"]},
+                    metrics={"epochs": opts["epochs"], "hyperopt_loss": opts["hyperopt_loss"],
+                             "spaces": opts["spaces"] or ["default"], "walk_forward": {"window": label, "mode": mode}},
+                    params=read_params_json(ws_json), log_filename=os.path.basename(log.path), job_id=job.id)
+            done += 1
+            yield "progress", json.dumps({"current": done, "total": total_steps})
+        for label in failed:
+            done += 1
+            yield "wf_row", json.dumps(rows[label])
+
+    # Phase 2 : backtest out-of-sample (résultats en cache réutilisés quand les paramètres ne sont pas réoptimisés)
+    runs, cache_keys, export_dirs = [], {}, {}
+    for w in windows:
+        label = w["window"]
+        if label in failed:
+            continue
+        oos_start, oos_end = w["oos"]
+        if not optimize:
+            try:
+                cache_keys[label] = backtest_cache_key(build_cmd("backtest", strategy, oos_start, end_ymd=oos_end), params_json)
             except Exception as e:
-                yield sse_format("err", f"Impossible de démarrer le processus: {e}")
-                payload = {"returncode": 1, "log_download": ""}
-                yield sse_format("end", json.dumps(payload))
+                yield "warn", f"[CACHE] Clé de cache indisponible pour {label} : {e}"
+            cached = BT_CACHE.get(cache_keys[label]) if (label in cache_keys and not opts["force"]) else None
+            if cached is not None:
                 try:
-                    if is_backtest and 'did_swap' in locals() and did_swap:
-                        if moved_selected_to_strat and os.path.isfile(strat_json_path) and selected_json_path:
-                            shutil.move(strat_json_path, selected_json_path)
-                        if backup_bt_path and os.path.isfile(backup_bt_path):
-                            shutil.move(backup_bt_path, strat_json_path)
-                except Exception:
-                    pass
-                return
-
-            # Capture résultats + progression
-            result_buf = []
-            seen_result = False
-            start_token = "hyperopt results" if is_hyperopt else "result for strategy"
+                    BacktestCache.restore_exports(cached)
+                except Exception as e:
+                    yield "warn", f"[CACHE] Restauration des exports impossible pour {label} : {e}"
+                rows[label].update(returncode=cached.get("returncode", 0), cached=True,
+                                   **(cached.get("summary") or parse_backtest_summary(cached.get("result", []))))
+                done += 1
+                yield "wf_row", json.dumps(rows[label])
+                continue
+        ws_dir = ws_dirs.get(label) or workspace(label)
+        export_dirs[label] = workspace_export_dir(ws_id_of(label))
+        ensure_dir(export_dirs[label])
+        runs.append((label, build_cmd("backtest", strategy, oos_start, end_ymd=oos_end, strategy_path=ws_dir,
+                                      export_dir=export_dirs[label])))
+    yield "progress", json.dumps({"current": done, "total": total_steps})
+
+    buffers = {label: [] for label, _ in runs}
+    seen = set()
+    for label, kind, value in iter_parallel_procs(runs, max_parallel=min(parallel, len(runs) or 1), track=job.track, action=job.action):
+        if kind == "line":
+            low = value.lower()
+            log.write(f"[{label}] {value}\n")
+            if is_warn_err(low):
+                yield "warn" if "warn" in low else "err", f"[{label}] {value}"
+            if label not in seen and "result for strategy" in low:
+                seen.add(label)
+            if label in seen:
+                buffers[label].append(value)
+            continue
 
-            total_epochs = max(1, int(epochs))  # total figé = saisie UI
-            current_epoch = 0
+        if kind == "spawn_error":
+            yield "err", f"[WALK-FORWARD] Impossible de démarrer le backtest {label}: {value}"
+            code = -1
+        else:
+            code = value if value is not None else -1
+        result = buffers.pop(label, [])
+        parsed = parse_backtest_result(result)
+        row = rows[label]
+        row.update(returncode=code, **parsed["summary"])
+        # Efficacité : rendement journalier hors échantillon / rendement journalier obtenu en optimisation
+        if row["is_profit_pct"] and row["is_profit_pct"] > 0 and row.get("profit_pct") is not None:
+            row["efficiency"] = round((row["profit_pct"] / _range_days(row["oos_range"]))
+                                      / (row["is_profit_pct"] / _range_days(row["is_range"])), 2)
+        if result:
+            yield record_result(
+                kind="walk_forward", strategy=strategy, params_name=f"{params_name} [{row['window']}]",
+                timerange=row["oos_range"], returncode=code, summary=parsed["summary"],
+                metrics={**parsed["metrics"], "walk_forward": {"window": label, "mode": mode, "in_sample": row["is_range"]}},
+                pairs=parsed["pairs"], params=read_params_json(os.path.join(ws_dirs[label], f"{strategy}.json")),
+                log_filename=os.path.basename(log.path), job_id=job.id)
+        exports = []
+        try:
+            exports = publish_backtest_exports(export_dirs[label])
+        except Exception as e:
+            yield "warn", f"[WALK-FORWARD] Copie des exports de {label} vers backtest_results impossible : {e}"
+        if code == 0 and result and label in cache_keys:
+            try:
+                BT_CACHE.put(cache_keys[label], {"result": result, "returncode": code, "created_at": time.time(),
+                                                 "summary": parsed["summary"]}, exports)
+            except Exception as e:
+                yield "warn", f"[CACHE] Mise en cache impossible pour {label} : {e}"
+        done += 1
+        yield "wf_row", json.dumps(row)
+        yield "progress", json.dumps({"current": done, "total": total_steps})
+
+    ordered = [rows[w["window"]] for w in windows]
+    stats = walk_forward_stability(ordered)
+    report = format_walk_forward_report(ordered, stats)
+    log.write(report + "\n")
+    yield "wf_report", json.dumps({"rows": ordered, "stability": stats})
+    yield "result", report
+    return 0 if all(r["returncode"] == 0 for r in ordered) else 1
+
+# ---------- Stockage des résultats ----------
+class ResultStore:
+    """
+    Résultats structurés des backtests / hyperopts (SQLite indexé) : métriques de synthèse,
+    lignes par paire et paramètres utilisés, interrogeables sans relire les logs.
+    """
 
-            for raw in proc.stdout:
-                line = raw.rstrip("\r\n")
-                low = line.lower()
+    NUMERIC = ("trades", "profit_pct", "profit_abs", "drawdown_pct", "win_rate",
+               "sharpe", "sortino", "calmar", "profit_factor", "cagr_pct", "expectancy", "loss")
+    SORTABLE = ("created_at",) + NUMERIC
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        ensure_dir(os.path.dirname(path))
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(f"""
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, strategy TEXT, params_name TEXT,
+                    timerange TEXT, start_ymd TEXT, end_ymd TEXT, created_at REAL, returncode INTEGER,
+                    log_filename TEXT, job_id TEXT,
+                    {", ".join(f"{c} {'INTEGER' if c == 'trades' else 'REAL'}" for c in self.NUMERIC)},
+                    metrics_json TEXT, params_json TEXT)""")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS result_pairs (
+                    result_id INTEGER REFERENCES results(id) ON DELETE CASCADE, pair TEXT, trades INTEGER,
+                    avg_profit_pct REAL, profit_abs REAL, profit_pct REAL, avg_duration TEXT, win_rate REAL)""")
+            for idx in ("strategy, created_at", "strategy, start_ymd, end_ymd", "calmar", "profit_pct", "drawdown_pct"):
+                name = "results_" + idx.replace(", ", "_")
+                self._db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON results({idx})")
+            self._db.execute("CREATE INDEX IF NOT EXISTS result_pairs_run ON result_pairs(result_id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS result_pairs_pair ON result_pairs(pair, profit_pct)")
+
+    def add(self, *, kind: str, strategy: str, params_name: str, timerange: str, returncode: int,
+            summary: dict, metrics: dict | None = None, pairs=(), params=None,
+            log_filename: str = "", job_id: str = "") -> int:
+        start_ymd, _, end_ymd = (timerange or "").partition("-")
+        values = {c: summary.get(c) for c in self.NUMERIC}
+        cols = ["kind", "strategy", "params_name", "timerange", "start_ymd", "end_ymd", "created_at",
+                "returncode", "log_filename", "job_id", *self.NUMERIC, "metrics_json", "params_json"]
+        row = [kind, strategy, params_name, timerange, start_ymd, end_ymd, time.time(), returncode,
+               log_filename, job_id, *values.values(),
+               json.dumps(metrics or {}, ensure_ascii=False), json.dumps(params, ensure_ascii=False) if params is not None else None]
+        with self._lock, self._db:
+            cur = self._db.execute(
+                f"INSERT INTO results ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", row)
+            run_id = cur.lastrowid
+            self._db.executemany(
+                "INSERT INTO result_pairs (result_id, pair, trades, avg_profit_pct, profit_abs, profit_pct, avg_duration, win_rate) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, p["pair"], p.get("trades"), p.get("avg_profit_pct"), p.get("profit_abs"),
+                  p.get("profit_pct"), p.get("avg_duration"), p.get("win_rate")) for p in pairs])
+        return run_id
+
+    def query(self, *, strategy: str = "", kind: str = "", params_name: str = "", pair: str = "",
+              year: str = "", bounds: dict | None = None, sort: str = "created_at", desc: bool = True,
+              limit: int = 50, offset: int = 0):
+        """
+        Retourne (résultats, nombre total). `year` garde les timeranges qui chevauchent l'année,
+        `bounds` = {colonne: (min, max)} sur les colonnes numériques.
+        """
+        where, args = [], []
+        for col, val in (("strategy", strategy), ("kind", kind), ("params_name", params_name)):
+            if val:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if year:
+            where.append("start_ymd <= ? AND (end_ymd = '' OR end_ymd >= ?)")
+            args += [f"{year}1231", f"{year}0101"]
+        if pair:
+            where.append("id IN (SELECT result_id FROM result_pairs WHERE pair = ?)")
+            args.append(pair)
+        for col, (lo, hi) in (bounds or {}).items():
+            if col not in self.NUMERIC:
+                continue
+            if lo is not None:
+                where.append(f"{col} >= ?")
+                args.append(lo)
+            if hi is not None:
+                where.append(f"{col} <= ?")
+                args.append(hi)
+        if sort not in self.SORTABLE:
+            sort = "created_at"
+        clause = (" WHERE " + " AND ".join(where)) if where else ""
+        order = f" ORDER BY {sort} IS NULL, {sort} {'DESC' if desc else 'ASC'}, id DESC"
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM results{clause}", args).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT * FROM results{clause}{order} LIMIT ? OFFSET ?", args + [limit, offset]).fetchall()
+        return [self._row(r) for r in rows], total
+
+    def get(self, run_id: int):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM results WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            pairs = self._db.execute(
+                "SELECT pair, trades, avg_profit_pct, profit_abs, profit_pct, avg_duration, win_rate "
+                "FROM result_pairs WHERE result_id = ? ORDER BY profit_pct DESC", (run_id,)).fetchall()
+        out = self._row(row, full=True)
+        out["pairs"] = [dict(p) for p in pairs]
+        return out
+
+    def by_job(self, job_id: str):
+        """Id du dernier résultat enregistré par un job (None s'il n'en a produit aucun)."""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM results WHERE job_id = ? ORDER BY id DESC LIMIT 1",
+                                   (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def find_hyperopt(self, strategy: str, timerange: str, hyperopt_loss: str, epochs: int, spaces):
+        """Id du dernier hyperopt réussi pour cette combinaison exacte (None si jamais calculée)."""
+        spaces = sorted(spaces or ["default"])
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, metrics_json FROM results WHERE kind = 'hyperopt' AND strategy = ? AND timerange = ? "
+                "AND returncode = 0 ORDER BY id DESC", (strategy, timerange)).fetchall()
+        for run_id, metrics in rows:
+            m = json.loads(metrics or "{}")
+            if (m.get("hyperopt_loss") == hyperopt_loss and str(m.get("epochs")) == str(epochs)
+                    and sorted(m.get("spaces") or ["default"]) == spaces):
+                return run_id
+        return None
 
-                with open(log_path, "a", encoding="utf-8") as f:
-                    f.write(line + "\n")
+    @staticmethod
+    def _row(row, full: bool = False):
+        out = dict(row)
+        metrics, params = out.pop("metrics_json"), out.pop("params_json")
+        if full:
+            out["metrics"] = json.loads(metrics) if metrics else {}
+            out["params"] = json.loads(params) if params else None
+        return out
 
-                if is_warn_err(low):
-                    yield sse_format("warn" if "warn" in low else "err", line)
-
-                # Progress Hyperopt
-                if is_hyperopt:
-                    updated = False
-                    for rgx in epoch_patterns:
-                        m = rgx.search(line)
-                        if not m:
-                            continue
-                        try:
-                            if m.lastindex and m.lastindex >= 2:
-                                cur = int(m.group(1))  # on ignore le total log
-                                current_epoch = max(current_epoch, min(cur, total_epochs))
-                                updated = True
-                                break
-                            elif m.lastindex and m.lastindex >= 1:
-                                cur = int(m.group(1))
-                                current_epoch = max(current_epoch, min(cur, total_epochs))
-                                updated = True
-                                break
-                        except Exception:
-                            pass
-                    if not updated:
-                        t = re.search(r'\btrial\s+(\d+)\b', line, re.IGNORECASE)
-                        if t:
-                            try:
-                                cur = int(t.group(1))
-                                if cur > current_epoch:
-                                    current_epoch = min(cur, total_epochs)
-                                    updated = True
-                            except Exception:
-                                pass
-                    if updated:
-                        yield sse_format("hopt_progress", json.dumps({"current": current_epoch, "total": total_epochs}))
-
-                # Résultats
-                if not seen_result and start_token in low:
-                    seen_result = True
-                if seen_result:
-                    result_buf.append(line)
+RESULTS = ResultStore(RESULTS_DB_PATH)
 
-            rc = proc.wait()
+def read_params_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-            if result_buf:
-                yield sse_format("result", "\n".join(result_buf))
+def record_result(**kwargs):
+    """Enregistre un résultat ; renvoie (événement, message) à émettre."""
+    try:
+        run_id = RESULTS.add(**kwargs)
+        return "line", f"[RESULTS] Résultat #{run_id} enregistré ({kwargs['params_name']})"
+    except sqlite3.Error as e:
+        return "warn", f"[RESULTS] Enregistrement impossible : {e}"
 
-            # Post-traitement Hyperopt : nommage + restauration
-            if is_hyperopt:
-                end_label = end_ymd if end_ymd else "open"
-                final_name = f"{strategy}_{epochs}_{hyperopt_loss}_{start_ymd}_{end_label}.json"
-                final_path = unique_path(sdir, final_name)
-                try:
-                    if os.path.isfile(strat_json_path):
-                        shutil.move(strat_json_path, final_path)
-                        yield sse_format("result", f"[HYPEROPT] JSON enregistré : {os.path.basename(final_path)}")
-                    else:
-                        yield sse_format("warn", "[HYPEROPT] Aucun nouveau JSON trouvé à renommer.")
-                except Exception as e:
-                    yield sse_format("err", f"[HYPEROPT] Échec du renommage : {e}")
-                backup_hopt_path = strat_json_path + ".prehyperopt.bak"
-                if os.path.isfile(backup_hopt_path):
-                    try:
-                        shutil.move(backup_hopt_path, strat_json_path)
-                        yield sse_format("result", f"[HYPEROPT] Stratégie restaurée : {os.path.basename(strat_json_path)}")
-                    except Exception as e:
-                        yield sse_format("err", f"[HYPEROPT] Échec de restauration de la sauvegarde : {e}")
-                yield sse_format("hopt_progress", json.dumps({"current": total_epochs, "total": total_epochs}))
+# ---------- Campagnes hyperopt (matrice losses x timeranges x spaces) ----------
+def parse_campaign_matrix(args):
+    """
+    Matrice d'une campagne depuis un formulaire : losses=a,b ; timeranges=20240101-20240630,20240701-20241231 ;
+    spaces=default;buy sell;all (jeux séparés par « ; »). Lève ValueError si la matrice est vide ou invalide.
+    """
+    known = {v for (v, _, _) in HYPEROPT_LOSSES}
+    losses = [l for l in re.split(r"[,\s]+", args.get("losses") or "") if l]
+    unknown = [l for l in losses if l not in known]
+    if unknown:
+        raise ValueError(f"Loss inconnue : {', '.join(unknown)}")
+    timeranges = []
+    for tr in re.split(r"[,\s]+", args.get("timeranges") or ""):
+        if not tr:
+            continue
+        m = re.fullmatch(r"(\d{8})-(\d{8})?", tr)
+        if not m or (m.group(2) and m.group(1) > m.group(2)):
+            raise ValueError(f"Timerange invalide : {tr}")
+        timeranges.append((m.group(1), m.group(2) or ""))
+    spaces_sets = []
+    for chunk in (args.get("spaces") or "default").split(";"):
+        sp = sorted({s for s in re.split(r"[,\s]+", chunk.strip().lower()) if s}) or ["default"]
+        if sp not in spaces_sets:
+            spaces_sets.append(sp)
+    if not losses or not timeranges:
+        raise ValueError("Campagne vide : au moins une loss et un timerange.")
+    return losses, timeranges, spaces_sets
+
+class CampaignStore:
+    """
+    Campagnes hyperopt persistées (SQLite, même base que les résultats) : une ligne par combinaison
+    (loss, timerange, spaces) avec son statut, son job et le résultat obtenu. Après un arrêt de l'app,
+    les campagnes en cours reprennent là où elles en étaient ; une combinaison déjà faite n'est pas relancée.
+    """
 
-            # Restauration Backtest
-            if is_backtest:
-                try:
-                    selected_json_path = os.path.join(sdir, bt_json) if bt_json else None
-                    if 'did_swap' in locals() and did_swap:
-                        if moved_selected_to_strat and os.path.isfile(strat_json_path) and selected_json_path:
-                            shutil.move(strat_json_path, selected_json_path)
-                        if backup_bt_path and os.path.isfile(backup_bt_path):
-                            shutil.move(backup_bt_path, strat_json_path)
-                        yield sse_format("result", "[BACKTEST] JSON restauré après exécution.")
-                except Exception as e:
-                    yield sse_format("err", f"[BACKTEST] Restauration échouée : {e}")
-
-        # === DOWNLOAD (multi-TF) ===
-        elif is_download:
-            if total_steps_download == 0:
-                yield sse_format("warn", "[DOWNLOAD] Aucune étape planifiée (pas de paires/timeframes).")
-                log_download = "/logs/" + os.path.basename(log_path)
-                yield sse_format("end", json.dumps({"returncode": 0, "log_download": log_download, "total_steps": total_steps_download}))
+    def __init__(self, path: str, jobs: JobManager, results: ResultStore):
+        self.jobs = jobs
+        self.results = results
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS campaigns (
+                    id TEXT PRIMARY KEY, name TEXT, strategy TEXT, epochs INTEGER, job_workers INTEGER,
+                    parallel INTEGER, status TEXT, created_at REAL, finished_at REAL)""")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS campaign_runs (
+                    campaign_id TEXT REFERENCES campaigns(id) ON DELETE CASCADE, combo TEXT,
+                    hyperopt_loss TEXT, start_ymd TEXT, end_ymd TEXT, spaces TEXT, status TEXT,
+                    job_id TEXT, result_id INTEGER, started_at REAL, finished_at REAL, returncode INTEGER,
+                    PRIMARY KEY (campaign_id, combo))""")
+
+    @staticmethod
+    def combo_key(loss, start_ymd, end_ymd, spaces):
+        return f"{loss}|{start_ymd}-{end_ymd}|{','.join(spaces)}"
+
+    def create(self, *, strategy, losses, timeranges, spaces_sets, epochs, job_workers, parallel, name=""):
+        """`job_workers` : borné (ou fixé s'il est absent) à la part de capacité CPU de chacun des `parallel` runs."""
+        cid = dt.datetime.now().strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:4]
+        parallel = max(1, parallel)
+        # au-delà, chaque hyperopt réserverait trop de cœurs et les runs passeraient un par un dans la file
+        share = max(1, self.jobs.capacity // parallel)
+        job_workers = min(job_workers, share) if job_workers and job_workers > 0 else share
+        runs = [(cid, self.combo_key(l, s, e, sp), l, s, e, ",".join(sp))
+                for l in losses for (s, e) in timeranges for sp in spaces_sets]
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO campaigns (id, name, strategy, epochs, job_workers, parallel, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'running', ?)",
+                (cid, name or f"{strategy} x{len(runs)}", strategy, epochs, job_workers, parallel, time.time()))
+            self._db.executemany(
+                "INSERT INTO campaign_runs (campaign_id, combo, hyperopt_loss, start_ymd, end_ymd, spaces, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'pending')", runs)
+        self._schedule(cid)
+        return cid
+
+    def resume_all(self):
+        """Au démarrage : les runs restés « running » ont été interrompus -> remis en attente, campagnes relancées."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE campaign_runs SET status='pending', job_id=NULL WHERE status='running'")
+            ids = [r[0] for r in self._db.execute("SELECT id FROM campaigns WHERE status='running'")]
+        for cid in ids:
+            self._schedule(cid)
+        return ids
+
+    def resume(self, cid: str):
+        """Relance une campagne annulée ou terminée avec des erreurs (runs en attente, en erreur ou annulés)."""
+        with self._lock, self._db:
+            if not self._db.execute("SELECT 1 FROM campaigns WHERE id=?", (cid,)).fetchone():
+                return False
+            self._db.execute("UPDATE campaign_runs SET status='pending', job_id=NULL "
+                             "WHERE campaign_id=? AND status IN ('error', 'cancelled')", (cid,))
+            self._db.execute("UPDATE campaigns SET status='running', finished_at=NULL WHERE id=?", (cid,))
+        self._schedule(cid)
+        return True
+
+    def cancel(self, cid: str):
+        with self._lock, self._db:
+            self._db.execute("UPDATE campaigns SET status='cancelled', finished_at=? WHERE id=? AND status='running'",
+                             (time.time(), cid))
+            job_ids = [r[0] for r in self._db.execute(
+                "SELECT job_id FROM campaign_runs WHERE campaign_id=? AND status='running'", (cid,))]
+        for jid in job_ids:
+            job = self.jobs.get(jid)
+            if job is not None:
+                self.jobs.cancel(job)
+
+    def _schedule(self, cid: str):
+        """Soumet les combinaisons en attente tant que la campagne a moins de `parallel` runs en vol."""
+        with self._lock:
+            camp = self._db.execute("SELECT * FROM campaigns WHERE id=?", (cid,)).fetchone()
+            if camp is None or camp["status"] != "running":
                 return
+            with self._db:
+                in_flight = self._db.execute(
+                    "SELECT COUNT(*) FROM campaign_runs WHERE campaign_id=? AND status='running'", (cid,)).fetchone()[0]
+                pending = self._db.execute(
+                    "SELECT * FROM campaign_runs WHERE campaign_id=? AND status='pending' ORDER BY rowid",
+                    (cid,)).fetchall()
+                for run in pending:
+                    if in_flight >= camp["parallel"]:
+                        break
+                    spaces = run["spaces"].split(",")
+                    timerange = f"{run['start_ymd']}-{run['end_ymd']}"
+                    done_id = self.results.find_hyperopt(camp["strategy"], timerange, run["hyperopt_loss"],
+                                                         camp["epochs"], spaces)
+                    if done_id is not None:   # déjà calculée (cette campagne ou une autre) : pas de relance
+                        self._db.execute("UPDATE campaign_runs SET status='skipped', result_id=?, finished_at=? "
+                                         "WHERE campaign_id=? AND combo=?", (done_id, time.time(), cid, run["combo"]))
+                        continue
+                    opts = parse_run_params(MultiDict({
+                        "action": "hyperopt", "strategy": camp["strategy"], "start_ymd": run["start_ymd"],
+                        "end_ymd": run["end_ymd"], "epochs": str(camp["epochs"]), "hyperopt_loss": run["hyperopt_loss"],
+                        "spaces": run["spaces"], "job_workers": str(camp["job_workers"] or ""),
+                    }))
+                    # _on_run_done attend self._lock : la ligne ci-dessous est écrite avant qu'il ne s'exécute
+                    job = self.jobs.submit(opts, on_done=lambda job, combo=run["combo"]: self._on_run_done(cid, combo, job))
+                    self._db.execute("UPDATE campaign_runs SET status='running', job_id=?, started_at=? "
+                                     "WHERE campaign_id=? AND combo=?", (job.id, time.time(), cid, run["combo"]))
+                    in_flight += 1
+                left = self._db.execute(
+                    "SELECT COUNT(*) FROM campaign_runs WHERE campaign_id=? AND status IN ('pending', 'running')",
+                    (cid,)).fetchone()[0]
+                if not left:
+                    self._db.execute("UPDATE campaigns SET status='done', finished_at=? WHERE id=?", (time.time(), cid))
+
+    def _on_run_done(self, cid: str, combo: str, job: Job):
+        result_id = self.results.by_job(job.id)
+        status = "cancelled" if job.cancelled else ("done" if job.returncode == 0 and result_id else "error")
+        with self._lock, self._db:
+            self._db.execute("UPDATE campaign_runs SET status=?, result_id=?, returncode=?, finished_at=? "
+                             "WHERE campaign_id=? AND combo=? AND job_id=?",
+                             (status, result_id, job.returncode, time.time(), cid, combo, job.id))
+        # hors du thread du job : il doit encore émettre "end" et libérer ses cœurs
+        threading.Thread(target=self._schedule, args=(cid,), daemon=True).start()
+
+    def list(self):
+        with self._lock:
+            camps = [dict(r) for r in self._db.execute("SELECT * FROM campaigns ORDER BY created_at DESC")]
+            counts = self._db.execute(
+                "SELECT campaign_id, status, COUNT(*) FROM campaign_runs GROUP BY campaign_id, status").fetchall()
+        by_id = {c["id"]: c for c in camps}
+        for c in camps:
+            c["counts"] = {}
+        for cid, status, n in counts:
+            if cid in by_id:
+                by_id[cid]["counts"][status] = n
+        return camps
+
+    LEADERBOARD_SORT = ("profit_pct", "trades", "loss")
+
+    def leaderboard(self, cid: str, sort: str = "profit_pct"):
+        """
+        Campagne + runs classés (métriques du meilleur epoch) + agrégat par (loss, spaces) sur les timeranges :
+        le profit minimal mesure la robustesse d'un jeu de paramètres d'une période à l'autre.
+        """
+        sort = sort if sort in self.LEADERBOARD_SORT else "profit_pct"
+        with self._lock:
+            camp = self._db.execute("SELECT * FROM campaigns WHERE id=?", (cid,)).fetchone()
+            if camp is None:
+                return None
+            runs = [dict(r) for r in self._db.execute(
+                "SELECT * FROM campaign_runs WHERE campaign_id=? ORDER BY rowid", (cid,))]
+        for run in runs:
+            res = self.results.get(run["result_id"]) if run["result_id"] else None
+            run["params_name"] = res["params_name"] if res else None
+            for col in self.LEADERBOARD_SORT:
+                run[col] = res[col] if res else None
+        desc = sort != "loss"
+        runs.sort(key=lambda r: (r[sort] is None, -(r[sort] or 0) if desc else (r[sort] or 0)))
+        groups = {}
+        for run in runs:
+            if run["profit_pct"] is None:
+                continue
+            g = groups.setdefault((run["hyperopt_loss"], run["spaces"]), [])
+            g.append(run["profit_pct"])
+        robust = sorted(({"hyperopt_loss": l, "spaces": sp, "runs": len(v), "mean_profit_pct": sum(v) / len(v),
+                          "min_profit_pct": min(v), "max_profit_pct": max(v)} for (l, sp), v in groups.items()),
+                        key=lambda g: -g["min_profit_pct"])
+        return {"campaign": dict(camp), "runs": runs, "robustness": robust}
+
+CAMPAIGNS = CampaignStore(RESULTS_DB_PATH, JOBS, RESULTS)
+
+# ---------- Page et assets statiques ----------
+class StaticAssets:
+    """
+    CSS/JS de l'UI chargés une fois au démarrage : URL avec empreinte du contenu (app.<hash>.css),
+    versions gzip/brotli pré-calculées et cache navigateur longue durée (immutable).
+    """
 
-            for tf in tfs_list:
-                try:
-                    cmd_local = build_cmd("download", strategy, start_ymd, timeframe=tf, erase=erase)
-                    proc = subprocess.Popen(
-                        cmd_local, cwd=PROJECT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                        text=True, encoding="utf-8", errors="replace", bufsize=1,
-                        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
-                    )
-                except Exception as e:
-                    err = f"[DOWNLOAD] Impossible de démarrer la commande (tf={tf}): {e}"
-                    yield sse_format("err", err)
-                    with open(log_path, "a", encoding="utf-8") as f: f.write("ERR: " + err + "\n")
-                    continue
-
-                for raw in proc.stdout:
-                    line = raw.rstrip("\r\n")
-                    low = line.lower()
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._urls = {}
+        self._files = {}
+        for fn in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+            path = os.path.join(folder, fn)
+            if not os.path.isfile(path):
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            base, ext = os.path.splitext(fn)
+            fp_name = f"{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            variants = {"identity": data, "gzip": gzip.compress(data, 9, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(data)
+            mime = mimetypes.guess_type(fn)[0] or "application/octet-stream"
+            if mime.startswith("text/") or mime in ("application/javascript", "text/javascript"):
+                mime += "; charset=utf-8"
+            self._urls[fn] = "/assets/" + fp_name
+            self._files[fp_name] = (mime, variants)
+
+    def url(self, name: str) -> str:
+        return self._urls[name]
+
+    def response(self, fp_name: str, accept_encoding: str):
+        if fp_name not in self._files:
+            return Response("asset inconnu", status=404)
+        mime, variants = self._files[fp_name]
+        accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+        encoding = next((e for e in ("br", "gzip") if e in variants and e in accepted), "identity")
+        resp = Response(variants[encoding], mimetype=mime.split(";")[0])
+        resp.headers["Content-Type"] = mime
+        if encoding != "identity":
+            resp.headers["Content-Encoding"] = encoding
+        resp.headers["Vary"] = "Accept-Encoding"
+        resp.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return resp
+
+ASSETS = StaticAssets(os.path.join(PROJECT_DIR, "static"))
+app.jinja_env.globals["asset_url"] = ASSETS.url
+INDEX_TEMPLATE = app.jinja_env.get_template("index.html")   # compilé une seule fois au démarrage
+LOGVIEW_TEMPLATE = app.jinja_env.get_template("logview.html")
 
-                    if "downloaded data for" in low:
-                        if prog_current < total_steps_download:
-                            prog_current += 1
-                            yield emit_progress()
+# ---------- Routes ----------
+@app.get("/")
+def index():
+    strategies, json_files, json_files_apply = _strategies_listing.get()
+    default_strategy = DEFAULT_STRATEGY if DEFAULT_STRATEGY in strategies else (strategies[0] if strategies else DEFAULT_STRATEGY)
+    boot = {
+        "state": {
+            "strategies": strategies,
+            "json_files": json_files,
+            "json_files_apply": json_files_apply,
+            "git_paths_list": read_git_paths_list(),
+            "pair_count": len(read_pair_whitelist_from_exchange_config()),
+            "timeframe": CONFIG.timeframe(),
+            "stake_currency": CONFIG.stake_currency(),
+        },
+        "default_strategy": default_strategy,
+        "default_date_input": html_default_date_input(),
+        "default_end_date_input": html_end_date_input(),
+        "nb_cpu": cpu_count_safe(),
+        "dl_max_parallel": DOWNLOAD_MAX_PARALLEL,
+        "loss_items": [{"value": v, "label": lbl, "desc": desc} for (v, lbl, desc) in HYPEROPT_LOSSES],
+    }
+    return render_template(INDEX_TEMPLATE, boot=boot)
 
-                    if is_warn_err(low):
-                        yield sse_format("warn" if "warn" in low else "err", line)
-                        with open(log_path, "a", encoding="utf-8") as f:
-                            f.write(("WARN: " if "warn" in low else "ERR: ") + line + "\n")
+@app.get("/assets/<name>")
+def asset(name):
+    return ASSETS.response(name, request.headers.get("Accept-Encoding", ""))
 
-                code = proc.wait()
-                if code != 0:
-                    msg = f"[DOWNLOAD] Commande terminée avec code {code} (tf={tf})"
-                    yield sse_format("warn", msg)
-                    with open(log_path, "a", encoding="utf-8") as f:
-                        f.write("WARN: " + msg + "\n")
-
-        log_download = "/logs/" + os.path.basename(log_path)
-        payload = {"returncode": rc, "log_download": log_download}
-        if action == "download":
-            payload["total_steps"] = total_steps_download
-        if action == "hyperopt":
-            payload["epochs_total"] = epochs
-        yield sse_format("end", json.dumps(payload))
+@app.get("/run_stream")
+def run_stream():
+    """Compatibilité : lance l'action en tâche de fond et stream ses événements."""
+    job = JOBS.submit(parse_run_params(request.args))
+    return stream_job_response(job, 0, wants_batch(request.args))
+
+@app.post("/api/jobs")
+def api_submit_job():
+    job = JOBS.submit(parse_run_params(request.values))
+    return jsonify(job.summary())
+
+@app.get("/api/jobs")
+def api_list_jobs():
+    return jsonify({"jobs": [j.summary() for j in JOBS.list()], "scheduler": JOBS.status(),
+                    "zygote": FT_ZYGOTE_POOL.status()})
+
+@app.get("/jobs/<job_id>/stream")
+def job_stream(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "job inconnu"}), 404
+    return stream_job_response(job, parse_last_event_id(request), wants_batch(request.args))
+
+@app.get("/metrics")
+def metrics():
+    """Compteurs / histogrammes du panel et des jobs au format texte Prometheus."""
+    return Response(METRICS.render(), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+@app.post("/jobs/<job_id>/cancel")
+def job_cancel(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "job inconnu"}), 404
+    JOBS.cancel(job)
+    return jsonify(job.summary())
+
+def parse_logs_query(args):
+    """Filtres et pagination communs à /logs/ et /api/logs."""
+    try:
+        page = max(1, int(args.get("page") or 1))
+    except ValueError:
+        page = 1
+    try:
+        per_page = min(1000, max(1, int(args.get("per_page") or LOGS_PAGE_SIZE)))
+    except ValueError:
+        per_page = LOGS_PAGE_SIZE
+    filters = {k: (args.get(k) or "").strip() for k in ("action", "strategy", "status", "q")}
+    return filters, page, per_page
 
-    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Connection": "keep-alive"}
-    return Response(generate(), mimetype="text/event-stream", headers=headers)
+def _fmt_run_ts(ts):
+    return dt.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else ""
 
 @app.get("/logs/")
 def list_logs():
-    files = sorted(os.listdir(LOG_DIR))
-    links = "\n".join(f'<li><a href="{fn}" target="_blank">{fn}</a></li>' for fn in files)
+    filters, page, per_page = parse_logs_query(request.args)
+    runs, total = LOG_CATALOG.query(page=page, per_page=per_page, **filters)
+    pages = max(1, -(-total // per_page))
+    facets = LOG_CATALOG.facets()
+
+    def select(name):
+        opts = "".join(
+            f'<option value="{escape(v)}"{" selected" if v == filters[name] else ""}>{escape(v)}</option>'
+            for v in facets[name])
+        return f'<select name="{name}"><option value="">{name} (tous)</option>{opts}</select>'
+
+    def page_link(p, label):
+        qs = urlencode([(k, v) for k, v in filters.items() if v] + [("page", p), ("per_page", per_page)])
+        return f'<a href="?{escape(qs)}">{label}</a>'
+
+    def cell(v):
+        return "" if v is None else escape(v)
+
+    rows = "\n".join(
+        f'<tr><td><a href="view/{escape(r["filename"])}" target="_blank">{escape(r["filename"])}</a>'
+        f' <a href="{escape(r["filename"])}" target="_blank" title="fichier brut">⤓</a></td>'
+        f'<td>{cell(r["action"])}</td><td>{cell(r["strategy"])}</td><td>{cell(r["timerange"])}</td>'
+        f'<td>{cell(r["status"])}</td><td>{cell(r["returncode"])}</td><td>{_fmt_run_ts(r["started_at"])}</td>'
+        f'<td>{"" if r["duration_s"] is None else "%.1fs" % r["duration_s"]}</td>'
+        f'<td>{cell(r["lines"])}</td><td>{cell(r["bytes"])}'
+        f'{"" if not r["compression"] else " → %s (%s)" % (r["disk_bytes"], r["compression"])}</td></tr>'
+        for r in runs)
+    nav = " ".join(filter(None, [
+        page_link(page - 1, "« Précédent") if page > 1 else "",
+        f"page {page} / {pages} ({total} runs)",
+        page_link(page + 1, "Suivant »") if page < pages else "",
+    ]))
     html = f"""
     <h2>Logs</h2>
-    <ul>
-      {links or "<li>(vide)</li>"}
-    </ul>
+    <form method="get">
+      {select("action")} {select("strategy")} {select("status")}
+      <input name="q" value="{escape(filters["q"])}" placeholder="nom de fichier" />
+      <button type="submit">Filtrer</button>
+    </form>
+    <p>{nav}</p>
+    <table border="0" cellpadding="4">
+      <tr><th>Fichier</th><th>Action</th><th>Stratégie</th><th>Timerange</th><th>Statut</th><th>Code</th>
+          <th>Début</th><th>Durée</th><th>Lignes</th><th>Octets</th></tr>
+      {rows or '<tr><td colspan="10">(vide)</td></tr>'}
+    </table>
+    <p>{nav}</p>
     """
     return html
 
+@app.get("/logs/view/<filename>")
+def view_log(filename):
+    if log_file_path(filename) is None:
+        return Response("log inconnu", status=404)
+    return render_template(LOGVIEW_TEMPLATE, boot={"filename": filename, "window": LOG_VIEW_LINES})
+
 @app.get("/logs/<path:filename>")
 def get_log(filename):
-    return send_from_directory(LOG_DIR, filename, as_attachment=False)
+    path = safe_join(LOG_DIR, filename)
+    packed = compressed_log_path(path) if path and not os.path.isfile(path) else None
+    if packed is None:
+        return send_from_directory(LOG_DIR, filename, as_attachment=False)
+    # Log compressé : envoyé tel quel si le navigateur sait le décoder, sinon décompressé à la volée
+    packed_path, encoding = packed
+    accepted = {part.split(";")[0].strip().lower() for part in request.headers.get("Accept-Encoding", "").split(",")}
+    if encoding in accepted:
+        resp = send_file(packed_path, mimetype="text/plain", conditional=True)
+        resp.headers["Content-Encoding"] = encoding
+        resp.headers["Content-Type"] = "text/plain; charset=utf-8"
+        resp.headers["Vary"] = "Accept-Encoding"
+        return resp
+
+    def generate():
+        with open_compressed_log(packed_path, encoding) as src:
+            while True:
+                chunk = src.read(LOG_IO_CHUNK)
+                if not chunk:
+                    return
+                yield chunk
+
+    return Response(generate(), content_type="text/plain; charset=utf-8", headers={"Vary": "Accept-Encoding"})
+
+@app.post("/api/logs/retention")
+def api_logs_retention():
+    """Lance immédiatement une passe de compression / rétention."""
+    return jsonify(LOG_RETENTION_WORKER.run_once())
+
+@app.get("/api/logs")
+def api_logs():
+    filters, page, per_page = parse_logs_query(request.args)
+    runs, total = LOG_CATALOG.query(page=page, per_page=per_page, **filters)
+    for r in runs:
+        r["url"] = "/logs/" + r["filename"]
+    return jsonify({"runs": runs, "total": total, "page": page, "per_page": per_page,
+                    "pages": max(1, -(-total // per_page)), "facets": LOG_CATALOG.facets()})
+
+@app.get("/api/logs/<filename>")
+def api_log_meta(filename):
+    run = LOG_CATALOG.get(filename)
+    if run is None:
+        return jsonify({"error": "log inconnu"}), 404
+    run["url"] = "/logs/" + run["filename"]
+    return jsonify(run)
+
+def _int_arg(name: str, default: int):
+    try:
+        return int(request.values.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+@app.get("/api/logs/<filename>/lines")
+def api_log_lines(filename):
+    """Fenêtre de lignes ; start < 0 compte depuis la fin (-1 = dernière fenêtre)."""
+    path = log_file_path(filename)
+    if path is None:
+        return jsonify({"error": "log inconnu"}), 404
+    idx = log_line_index(path)
+    count = min(max(1, _int_arg("count", LOG_VIEW_LINES)), 5000)
+    start = _int_arg("start", 0)
+    if start < 0:
+        start = max(0, idx.total_lines - count * -start)
+    lines, first, end = idx.read_lines(start, count)
+    return jsonify({"start": start, "lines": lines, "offset": first, "end_offset": end,
+                    "total_lines": idx.total_lines, "size": idx.size})
+
+@app.get("/api/logs/<filename>/bytes")
+def api_log_bytes(filename):
+    path = log_file_path(filename)
+    if path is None:
+        return jsonify({"error": "log inconnu"}), 404
+    offset = max(0, _int_arg("offset", 0))
+    length = min(max(0, _int_arg("length", LOG_VIEW_MAX_BYTES)), LOG_VIEW_MAX_BYTES)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        f.seek(offset)
+        data = f.read(length)
+    return jsonify({"offset": offset, "length": len(data), "size": size,
+                    "data": data.decode("utf-8", errors="replace")})
+
+@app.get("/api/logs/<filename>/search")
+def api_log_search(filename):
+    path = log_file_path(filename)
+    if path is None:
+        return jsonify({"error": "log inconnu"}), 404
+    q = request.args.get("q") or ""
+    try:
+        matches, next_offset = search_log(
+            path, q, regex=request.args.get("regex") == "1", ignore_case=request.args.get("icase") == "1",
+            start_offset=max(0, _int_arg("from", 0)),
+            max_matches=min(max(1, _int_arg("max", LOG_SEARCH_MAX_MATCHES)), LOG_SEARCH_MAX_MATCHES))
+    except re.error as e:
+        return jsonify({"error": f"regex invalide : {e}"}), 400
+    return jsonify({"q": q, "matches": matches, "next_offset": next_offset})
+
+@app.get("/api/logs/<filename>/tail")
+def api_log_tail(filename):
+    """Suivi en direct (SSE) : envoie les octets ajoutés depuis `offset` (ou Last-Event-ID) jusqu'à la fin du run."""
+    path = log_file_path(filename)
+    if path is None:
+        return jsonify({"error": "log inconnu"}), 404
+    last_id = parse_last_event_id(request)
+    offset = last_id if last_id else _int_arg("offset", -1)
+    if offset < 0:
+        offset = os.path.getsize(path)
+
+    def generate():
+        cur = offset
+        idle = 0.0
+        yield "retry: 3000\n\n"
+        while True:
+            size = os.path.getsize(path)
+            if size < cur:                      # fichier tronqué / remplacé
+                cur = 0
+            run = LOG_CATALOG.get(filename)
+            running = run is not None and run["status"] == "running"
+            if size > cur:
+                with open(path, "rb") as f:
+                    f.seek(cur)
+                    data = f.read(min(size - cur, LOG_VIEW_MAX_BYTES))
+                if running and len(data) < LOG_VIEW_MAX_BYTES:
+                    data = data[:data.rfind(b"\n") + 1]   # ligne en cours d'écriture : attendre la suite
+                if data:
+                    payload = {"offset": cur, "data": data.decode("utf-8", errors="replace")}
+                    cur += len(data)
+                    idle = 0.0
+                    yield sse_format("chunk", json.dumps(payload), event_id=cur)
+                    continue
+            if not running:
+                yield sse_format("end", json.dumps({"offset": cur, "status": run["status"] if run else None}))
+                return
+            time.sleep(LOG_TAIL_POLL_S)
+            idle += LOG_TAIL_POLL_S
+            if idle >= JOB_KEEPALIVE_S:
+                idle = 0.0
+                yield ": keepalive\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "Connection": "keep-alive"}
+    return Response(generate(), mimetype="text/event-stream", headers=headers)
+
+def _float_arg(name: str):
+    raw = (request.args.get(name) or "").strip()
+    try:
+        return float(raw) if raw else None
+    except ValueError:
+        return None
+
+@app.get("/api/results")
+def api_results():
+    """
+    Résultats structurés, ex. meilleur Calmar 2025 : ?strategy=eZ3_scalp3m&year=2025&sort=calmar&limit=1
+    ou drawdown < 10 % : ?max_drawdown_pct=10. Filtres min_<col> / max_<col> sur toute colonne numérique.
+    """
+    bounds = {col: (_float_arg(f"min_{col}"), _float_arg(f"max_{col}")) for col in ResultStore.NUMERIC}
+    limit = min(max(1, _int_arg("limit", 50)), 1000)
+    results, total = RESULTS.query(
+        strategy=(request.args.get("strategy") or "").strip(), kind=(request.args.get("kind") or "").strip(),
+        params_name=(request.args.get("params") or "").strip(), pair=(request.args.get("pair") or "").strip(),
+        year=(request.args.get("year") or "").strip(), bounds=bounds,
+        sort=request.args.get("sort") or "created_at", desc=request.args.get("order", "desc") != "asc",
+        limit=limit, offset=max(0, _int_arg("offset", 0)))
+    return jsonify({"results": results, "total": total})
+
+@app.get("/api/results/<int:run_id>")
+def api_result(run_id):
+    result = RESULTS.get(run_id)
+    if result is None:
+        return jsonify({"error": "résultat inconnu"}), 404
+    return jsonify(result)
+
+# --- APIs campagnes hyperopt ---
+@app.post("/api/campaigns")
+def api_create_campaign():
+    """
+    Lance une campagne hyperopt : strategy, losses, timeranges, spaces (voir parse_campaign_matrix),
+    epochs, job_workers, parallel (runs simultanés de la campagne), name.
+    """
+    args = request.values
+    try:
+        losses, timeranges, spaces_sets = parse_campaign_matrix(args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    cid = CAMPAIGNS.create(
+        strategy=(args.get("strategy") or DEFAULT_STRATEGY).strip(), losses=losses, timeranges=timeranges,
+        spaces_sets=spaces_sets, epochs=max(1, _int_arg("epochs", 100)), job_workers=_int_arg("job_workers", 0) or None,
+        parallel=max(1, _int_arg("parallel", 1)), name=(args.get("name") or "").strip())
+    return jsonify(CAMPAIGNS.leaderboard(cid))
+
+@app.get("/api/campaigns")
+def api_campaigns():
+    return jsonify({"campaigns": CAMPAIGNS.list()})
+
+@app.get("/api/campaigns/<cid>")
+def api_campaign(cid):
+    """Campagne, runs classés (?sort=profit_pct|trades|loss) et tableau de robustesse par (loss, spaces)."""
+    board = CAMPAIGNS.leaderboard(cid, request.args.get("sort") or "profit_pct")
+    if board is None:
+        return jsonify({"error": "campagne inconnue"}), 404
+    return jsonify(board)
+
+@app.post("/api/campaigns/<cid>/cancel")
+def api_campaign_cancel(cid):
+    CAMPAIGNS.cancel(cid)
+    return jsonify(CAMPAIGNS.leaderboard(cid) or {"error": "campagne inconnue"})
+
+@app.post("/api/campaigns/<cid>/resume")
+def api_campaign_resume(cid):
+    if not CAMPAIGNS.resume(cid):
+        return jsonify({"error": "campagne inconnue"}), 404
+    return jsonify(CAMPAIGNS.leaderboard(cid))
 
 # --- APIs pour refresh UI ---
 @app.get("/api/list_strategies")
@@ -1252,7 +4511,171 @@ def api_list_jsons_apply():
 def api_git_paths():
     return jsonify({"git_paths_list": read_git_paths_list()})
 
+@app.get("/api/config")
+def api_config():
+    return jsonify({
+        "pairs": CONFIG.pairs(),
+        "timeframe": CONFIG.timeframe(),
+        "stake_currency": CONFIG.stake_currency(),
+        "exchange": CONFIG.exchange_name(),
+        "files": [os.path.relpath(p, PROJECT_DIR) for p in CONFIG.files()],
+        "errors": CONFIG.errors,
+    })
+
+@app.get("/api/state")
+def api_state():
+    """Listes de l'UI en une seule requête ; ETag dérivé des mtimes -> 304 sans relire ni sérialiser."""
+    sig = (_strategies_listing.signature(), _git_paths.signature(), CONFIG.signature())
+    etag = hashlib.sha1(repr(sig).encode("utf-8")).hexdigest()
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        strategies, json_files, json_files_apply = _strategies_listing.get()
+        resp = jsonify({
+            "strategies": strategies,
+            "json_files": json_files,
+            "json_files_apply": json_files_apply,
+            "git_paths_list": read_git_paths_list(),
+            "pair_count": len(read_pair_whitelist_from_exchange_config()),
+            "timeframe": CONFIG.timeframe(),
+            "stake_currency": CONFIG.stake_currency(),
+        })
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+@app.get("/api/data/inventory")
+def api_data_inventory():
+    """
+    Couverture des données pour une plage : ?start_ymd=&end_ymd=&tfs=3m,1h (défaut : timeframe de la config).
+    `ready` = toutes les paires de la whitelist couvertes (ok/gaps) sur tous les timeframes demandés.
+    """
+    start_ymd = (request.args.get("start_ymd") or "").strip() or default_start_date()
+    end_ymd = (request.args.get("end_ymd") or "").strip()
+    tfs = [t for t in (request.args.get("tfs") or "").split(",") if t] or [CONFIG.timeframe() or "5m"]
+    pairs = read_pair_whitelist_from_exchange_config()
+    try:
+        cells, summary = OHLCV_INVENTORY.coverage(pairs, tfs, start_ymd, end_ymd)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    ready = all(s["partial"] == 0 and s["missing"] == 0 for s in summary.values())
+    return jsonify({"start_ymd": start_ymd, "end_ymd": end_ymd, "timeframes": tfs, "pairs": pairs,
+                    "cells": cells, "summary": summary, "ready": ready})
+
+# ---------- Serveur asynchrone (ASGI) ----------
+class AsyncPanel:
+    """
+    Application ASGI (uvicorn) : les flux SSE des jobs (/jobs/<id>/stream, /run_stream) sont servis par des
+    coroutines qui attendent les événements sur la boucle asyncio, sans thread par client connecté.
+    Les autres routes passent par l'app Flask via l'adaptateur WSGI d'uvicorn (pool de threads borné).
+    """
+
+    JOB_STREAM_RE = re.compile(r"/jobs/([^/]+)/stream")
+
+    def __init__(self, flask_app, wsgi_workers: int = ASYNC_WSGI_WORKERS):
+        self.wsgi = WSGIMiddleware(flask_app, workers=wsgi_workers)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if scope["method"] == "GET":
+            path = scope["path"]
+            args = MultiDict(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True))
+            m = self.JOB_STREAM_RE.fullmatch(path)
+            if m:
+                job = JOBS.get(m.group(1))
+                if job is None:
+                    return await self._json(send, 404, {"error": "job inconnu"})
+                return await self._stream_job(job, self._last_event_id(scope), wants_batch(args), receive, send)
+            if path == "/run_stream":
+                job = JOBS.submit(parse_run_params(args))
+                return await self._stream_job(job, 0, wants_batch(args), receive, send)
+        await self.wsgi(scope, receive, send)
+
+    @staticmethod
+    def _last_event_id(scope):
+        raw = dict(scope["headers"]).get(b"last-event-id", b"").decode("latin-1").strip()
+        if not raw:
+            raw = dict(parse_qsl(scope["query_string"].decode("latin-1"))).get("last_id", "").strip()
+        try:
+            return max(0, int(raw))
+        except ValueError:
+            return 0
+
+    @staticmethod
+    async def _json(send, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _stream_job(self, job, last_id, batched, receive, send):
+        headers = [(b"content-type", b"text/event-stream; charset=utf-8")]
+        headers += [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in SSE_HEADERS.items()]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        METRICS.inc("ftpanel_sse_clients", 1, server="async")
+        pump = asyncio.ensure_future(self._pump(job, last_id, batched, send))
+        gone = asyncio.ensure_future(self._wait_disconnect(receive))
+        try:
+            await asyncio.wait({pump, gone}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            METRICS.inc("ftpanel_sse_clients", -1, server="async")
+            pump.cancel()
+            gone.cancel()
+        if pump.done() and not pump.cancelled() and pump.exception() is None:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _pump(job, last_id, batched, send):
+        sub = job.subscribe(last_id)
+        window = SSE_BATCH_WINDOW_S if batched else 0.0
+        try:
+            await send({"type": "http.response.body", "body": b"retry: 3000\n\n", "more_body": True})
+            while True:
+                batch, lost = await sub.next_async(JOB_KEEPALIVE_S, window)
+                if not batch and job.done:
+                    return
+                chunk = (job_sse_batch(batch, lost) if batched else job_sse_chunk(batch, lost)).encode("utf-8")
+                METRICS.inc("ftpanel_sse_bytes_total", len(chunk), server="async")
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            sub.close()
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+def serve_async(host="127.0.0.1", port=5000):
+    """Sert le panel avec uvicorn (boucle asyncio) au lieu du serveur Flask threadé."""
+    if uvicorn is None:
+        raise SystemExit("Mode asynchrone indisponible : pip install uvicorn (installé avec freqtrade).")
+    start_services()
+    uvicorn.run(AsyncPanel(app), host=host, port=port, lifespan="off", log_level="warning")
+
+# ---------- Démarrage ----------
+_services_started = False
+
+def start_services():
+    """
+    Tâches de fond du serveur, lancées par le point d'entrée et non à l'import
+    (les scripts de bench/ importent app sans toucher aux campagnes ni aux logs réels).
+    """
+    global _services_started
+    if _services_started:
+        return
+    _services_started = True
+    LOG_CATALOG.mark_interrupted()
+    if FT_ZYGOTE and FreqtradeZygote.supported():
+        FT_ZYGOTE_POOL.start()
+    LOG_RETENTION_WORKER.start()
+    CAMPAIGNS.resume_all()
+
 if __name__ == "__main__":
     # .\\.venv\\Scripts\\python.exe -m pip install flask
-    # .\\.venv\\Scripts\\python.exe app.py
-    app.run(host="127.0.0.1", port=5000, debug=False)
+    # .\\.venv\\Scripts\\python.exe app.py            (--async : serveur asyncio/uvicorn)
+    if SERVER_ASYNC or "--async" in sys.argv[1:]:
+        serve_async(host="127.0.0.1", port=5000)
+    else:
+        start_services()
+        app.run(host="127.0.0.1", port=5000, debug=False)
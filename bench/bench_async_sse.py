@@ -0,0 +1,184 @@
+"""
+Test de charge des flux SSE : serveur Flask threadé vs serveur asynchrone (AsyncPanel / uvicorn).
+Le serveur tourne dans un process à part avec un job silencieux (suivi par --idle clients inactifs)
+et --jobs jobs bavards (vrais sous-process, --rate lignes/s, --viewers clients chacun).
+
+    python bench/bench_async_sse.py [--mode both|async|threaded] [--idle 300] [--jobs 12] [--viewers 2]
+
+Mesures côté serveur via /proc (Linux) : threads max, RSS max, temps CPU ; côté clients : événements
+reçus et latence émission -> réception (p50 / p99).
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PRODUCER = (
+    "import sys, time\n"
+    "rate, duration = float(sys.argv[1]), float(sys.argv[2])\n"
+    "end = time.time() + duration\n"
+    "while time.time() < end:\n"
+    "    print(f't={time.time():.6f} ' + 'x' * 80, flush=True)\n"
+    "    time.sleep(1.0 / rate)\n"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---------- process serveur ----------
+def serve(mode, port, jobs, rate, duration, warmup):
+    import app
+
+    def register(opts):
+        job = app.Job(f"bench-{opts['action']}", opts)
+        with app.JOBS._lock:
+            app.JOBS._jobs[job.id] = job
+        return job
+
+    def run_chatty(job):
+        time.sleep(warmup)
+        cmd = [sys.executable, "-u", "-c", PRODUCER, str(rate), str(duration)]
+        for _, kind, value in app.iter_parallel_procs([(job.id, cmd)], max_parallel=1):
+            if kind == "line":
+                job.emit("line", value)
+        job.emit("end", json.dumps({"returncode": 0}))
+        job.finish()
+
+    def run_quiet(job):
+        time.sleep(warmup + duration + 5)
+        job.emit("end", json.dumps({"returncode": 0}))
+        job.finish()
+
+    quiet = register({"action": "quiet"})
+    threading.Thread(target=run_quiet, args=(quiet,), daemon=True).start()
+    chatty = []
+    for i in range(jobs):
+        job = register({"action": f"chatty{i}"})
+        threading.Thread(target=run_chatty, args=(job,), daemon=True).start()
+        chatty.append(job.id)
+    print("READY " + json.dumps({"quiet": quiet.id, "chatty": chatty}), flush=True)
+
+    if mode == "async":
+        import uvicorn
+        uvicorn.run(app.AsyncPanel(app.app), host="127.0.0.1", port=port, lifespan="off", log_level="warning")
+    else:
+        import logging
+        from werkzeug.serving import make_server
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        make_server("127.0.0.1", port, app.app, threaded=True).serve_forever()
+
+
+# ---------- clients ----------
+async def sse_client(port, job_id, stats, latencies):
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    except OSError:
+        stats["connect_errors"] += 1
+        return
+    writer.write(f"GET /jobs/{job_id}/stream HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    stats["connected"] += 1
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b"data: t="):
+                latencies.append(time.time() - float(line[8:25].split()[0]))
+                stats["events"] += 1
+            elif line.startswith(b"event: end"):
+                break
+    except (OSError, ValueError):
+        stats["read_errors"] += 1
+    finally:
+        writer.close()
+
+
+def proc_sample(pid):
+    threads = rss = 0
+    with open(f"/proc/{pid}/status") as f:
+        for ln in f:
+            if ln.startswith("Threads:"):
+                threads = int(ln.split()[1])
+            elif ln.startswith("VmRSS:"):
+                rss = int(ln.split()[1]) * 1024
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return threads, rss, cpu
+
+
+async def run_mode(mode, args):
+    port = free_port()
+    srv = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", mode, "--port", str(port),
+                            "--jobs", str(args.jobs), "--rate", str(args.rate), "--duration", str(args.duration),
+                            "--warmup", str(args.warmup)], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        ready = json.loads(next(ln for ln in srv.stdout if ln.startswith("READY "))[6:])
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                await asyncio.sleep(0.1)
+        _, _, cpu0 = proc_sample(srv.pid)
+        stats = {"connected": 0, "events": 0, "connect_errors": 0, "read_errors": 0}
+        latencies = []
+        idle = [asyncio.ensure_future(sse_client(port, ready["quiet"], stats, [])) for _ in range(args.idle)]
+        active = [asyncio.ensure_future(sse_client(port, jid, stats, latencies))
+                  for jid in ready["chatty"] for _ in range(args.viewers)]
+        peak_threads = peak_rss = 0
+        while not all(t.done() for t in active):
+            threads, rss, _ = proc_sample(srv.pid)
+            peak_threads, peak_rss = max(peak_threads, threads), max(peak_rss, rss)
+            await asyncio.sleep(0.25)
+        _, _, cpu1 = proc_sample(srv.pid)
+        for t in idle:
+            t.cancel()
+        await asyncio.gather(*idle, return_exceptions=True)
+    finally:
+        srv.kill()
+        srv.wait()
+    expected = args.jobs * args.viewers * int(args.rate * args.duration)
+    lat = sorted(latencies) or [0.0]
+    print(f"{mode:9s} clients={stats['connected']:4d}/{args.idle + len(active)}  threads max={peak_threads:4d}  "
+          f"RSS max={peak_rss / 1e6:7.1f} Mo  CPU={cpu1 - cpu0:6.2f} s  "
+          f"événements={stats['events']}/~{expected}  latence p50={statistics.median(lat) * 1000:6.1f} ms  "
+          f"p99={lat[int(len(lat) * 0.99) - 1 if len(lat) > 1 else 0] * 1000:7.1f} ms  "
+          f"erreurs={stats['connect_errors'] + stats['read_errors']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mode", choices=["both", "async", "threaded"], default="both")
+    ap.add_argument("--idle", type=int, default=300, help="clients SSE inactifs (job silencieux)")
+    ap.add_argument("--jobs", type=int, default=12, help="jobs bavards simultanés")
+    ap.add_argument("--viewers", type=int, default=2, help="clients par job bavard")
+    ap.add_argument("--rate", type=float, default=50.0, help="lignes/s par job")
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--warmup", type=float, default=3.0, help="délai avant le démarrage des jobs (connexions)")
+    ap.add_argument("--serve", choices=["async", "threaded"], help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.serve:
+        serve(args.serve, args.port, args.jobs, args.rate, args.duration, args.warmup)
+        return
+    for mode in (["threaded", "async"] if args.mode == "both" else [args.mode]):
+        asyncio.run(run_mode(mode, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark du démarrage d'une commande freqtrade : subprocess.Popen (interpréteur + imports à chaque fois)
+vs fork depuis le zygote pré-chauffé (ft_zygote.py). Mesure le délai jusqu'à la première ligne et la durée totale.
+
+    python bench/bench_ft_startup.py [--repeat 5] [-- show-config --config user_data/config_base.json]
+
+Sans commande : `freqtrade --version` (dominé par le coût de démarrage, donc le gain maximal).
+Linux / macOS uniquement pour le zygote.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import PROJECT_DIR, FT_ZYGOTE_POOL, FreqtradeZygote, ZygoteProcess, find_python_exe, start_process  # noqa: E402
+
+POPEN_KW = dict(cwd=PROJECT_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, encoding="utf-8", errors="replace", bufsize=1)
+
+
+def run_once(cmd, zygote):
+    t0 = time.perf_counter()
+    proc = start_process(cmd, **POPEN_KW) if zygote else subprocess.Popen(cmd, **POPEN_KW)
+    if zygote and not isinstance(proc, ZygoteProcess):
+        raise RuntimeError("le zygote n'a pas pris la commande")
+    first = None
+    for _ in proc.stdout:
+        if first is None:
+            first = time.perf_counter() - t0
+    rc = proc.wait()
+    total = time.perf_counter() - t0
+    return (first if first is not None else total), total, rc
+
+
+def report(name, samples):
+    firsts = [s[0] for s in samples]
+    totals = [s[1] for s in samples]
+    print(f"{name:10s} 1re ligne méd={statistics.median(firsts) * 1000:8.1f} ms  "
+          f"total méd={statistics.median(totals) * 1000:8.1f} ms  min={min(totals) * 1000:8.1f} ms  "
+          f"rc={sorted({s[2] for s in samples})}")
+    return statistics.median(totals)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--ready-timeout", type=float, default=120.0, help="attente max du zygote (imports)")
+    ap.add_argument("ft_args", nargs=argparse.REMAINDER, help="arguments freqtrade (après --)")
+    args = ap.parse_args()
+    ft_args = [a for a in args.ft_args if a != "--"] or ["--version"]
+    cmd = [find_python_exe(), "-m", "freqtrade"] + ft_args
+    print("commande :", " ".join(cmd))
+
+    if FreqtradeZygote.supported():
+        FT_ZYGOTE_POOL.start()   # préchauffage en fond pendant les mesures Popen (comme au lancement de l'app)
+    popen = [run_once(cmd, False) for _ in range(args.repeat)]
+    t_popen = report("popen", popen)
+
+    if not FreqtradeZygote.supported():
+        print("zygote   : non supporté sur cette plateforme (fork / socket Unix)")
+        return
+    t0 = time.perf_counter()
+    deadline = t0 + args.ready_timeout
+    while FT_ZYGOTE_POOL.state in ("starting", "stopped") and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    if FT_ZYGOTE_POOL.state != "ready":
+        print(f"zygote   : indisponible ({FT_ZYGOTE_POOL.state} {FT_ZYGOTE_POOL.info})")
+        return
+    print(f"zygote   : prêt ({FT_ZYGOTE_POOL.info}), préchauffage payé une fois au lancement de l'app")
+    zyg = [run_once(cmd, True) for _ in range(args.repeat)]
+    t_zyg = report("zygote", zyg)
+    print(f"gain     : x{t_popen / max(t_zyg, 1e-9):.1f} sur la durée totale")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark du parsing de progression hyperopt : ancienne boucle (5 regex + fallback recompilé)
+vs HyperoptProgressParser, en rejouant des logs hyperopt capturés.
+
+    python bench/bench_hopt_parser.py [log_app/hyperopt_*.log ...] [--repeat 5]
+
+Sans argument : rejoue les logs hyperopt_*.log de log_app/, ou un log synthétique
+(freqtrade + optuna) si aucun n'existe.
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import LOG_DIR, HyperoptProgressParser  # noqa: E402
+
+LEGACY_PATTERNS = [
+    re.compile(r'\bepoch\s*[:\- ]*\s*(\d+)\s*/\s*(\d+)\b', re.IGNORECASE),
+    re.compile(r'\b(\d+)\s*/\s*(\d+)\s*epochs?\b', re.IGNORECASE),
+    re.compile(r'\bepoch[^\d]*(\d+)\b', re.IGNORECASE),
+    re.compile(r'\btrial\s+(\d+)\b.*\b(finished|completed|complete|done)\b', re.IGNORECASE),
+    re.compile(r'\btrial\s+(\d+)\s*(?:of|/)\s*(\d+)\b', re.IGNORECASE),
+]
+
+
+def legacy_parse(lines, total):
+    """Copie de l'ancienne boucle de run_stream() (référence)."""
+    current_epoch = 0
+    updates = 0
+    for line in lines:
+        updated = False
+        for rgx in LEGACY_PATTERNS:
+            m = rgx.search(line)
+            if not m:
+                continue
+            if m.lastindex and m.lastindex >= 1:
+                current_epoch = max(current_epoch, min(int(m.group(1)), total))
+                updated = True
+                break
+        if not updated:
+            t = re.search(r'\btrial\s+(\d+)\b', line, re.IGNORECASE)
+            if t and int(t.group(1)) > current_epoch:
+                current_epoch = min(int(t.group(1)), total)
+                updated = True
+        updates += updated
+    return current_epoch, updates
+
+
+def parser_parse(lines, total):
+    parser = HyperoptProgressParser(total)
+    updates = 0
+    for line in lines:
+        if parser.feed(line, line.lower()) is not None:
+            updates += 1
+    return parser.current, updates
+
+
+def synthetic_log(epochs=2000, noise_per_epoch=12):
+    rnd = random.Random(42)
+    out = []
+    for i in range(1, epochs + 1):
+        for _ in range(noise_per_epoch):
+            out.append(f"2025-01-01 12:00:00,{rnd.randint(0, 999):03d} - freqtrade.strategy - INFO - populate_indicators pair={rnd.choice(['BTC/USDC', 'ETH/USDC'])}")
+        loss = -rnd.random()
+        out.append(f"[I 2025-01-01 12:00:00,000] Trial {i} finished with value: {loss:.5f} and parameters: {{'buy_rsi': {rnd.randint(10, 40)}}}. Best is trial 1 with value: -0.5.")
+        if i % 50 == 0:
+            out.append(f"Best {i:5d}/{epochs}: {rnd.randint(50, 500):6d} trades. 70/0/53 Wins/Draws/Losses. Avg profit   0.12%. "
+                       f"Median profit   0.20%. Total profit 12.34567890 USDC (  12.35%). Avg duration 1:23:00 min. Objective: {loss:.5f}")
+    return out, epochs
+
+
+def load_lines(paths):
+    lines = []
+    for p in paths:
+        with open(p, "r", encoding="utf-8", errors="replace") as f:
+            lines.extend(ln.rstrip("\r\n") for ln in f)
+    return lines
+
+
+def timed(fn, lines, total, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(lines, total)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("logs", nargs="*")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--total", type=int, default=0, help="epochs attendus (défaut : 10^9, pas de plafond)")
+    args = ap.parse_args()
+
+    paths = args.logs or sorted(glob.glob(os.path.join(LOG_DIR, "hyperopt_*.log")))
+    if paths:
+        lines = load_lines(paths)
+        total = args.total or 10 ** 9
+        source = f"{len(paths)} log(s) capturé(s)"
+    else:
+        lines, total = synthetic_log()
+        source = "log synthétique"
+    print(f"Source : {source}, {len(lines):,} lignes")
+
+    for name, fn in (("avant (5 regex + fallback)", legacy_parse), ("après (HyperoptProgressParser)", parser_parse)):
+        elapsed, (current, updates) = timed(fn, lines, total, args.repeat)
+        print(f"{name:32s} {len(lines) / elapsed:12,.0f} lignes/s  epoch final={current}  mises à jour={updates}")
+
+
+if __name__ == "__main__":
+    main()
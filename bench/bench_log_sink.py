@@ -0,0 +1,57 @@
+"""
+Benchmark écriture de log : open/append/close par ligne (ancien run_stream) vs LogSink bufferisé.
+
+    python bench/bench_log_sink.py [--lines 200000] [--line-len 120]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import LogSink  # noqa: E402
+
+
+def make_lines(n, width):
+    pad = "x" * max(0, width - 60)
+    return [f"2025-01-01 12:00:00,000 - freqtrade.optimize.hyperopt - INFO - epoch {i} {pad}" for i in range(n)]
+
+
+def bench_reopen(path, lines):
+    t0 = time.perf_counter()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("header\n")
+    for line in lines:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    return time.perf_counter() - t0, os.path.getsize(path), None
+
+
+def bench_sink(path, lines):
+    t0 = time.perf_counter()
+    sink = LogSink(path)
+    sink.write("header\n")
+    for line in lines:
+        sink.write(line + "\n")
+    sink.close()
+    return time.perf_counter() - t0, sink.bytes_written, sink.stats()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lines", type=int, default=200_000)
+    ap.add_argument("--line-len", type=int, default=120)
+    args = ap.parse_args()
+
+    lines = make_lines(args.lines, args.line_len)
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (name, fn) in enumerate((("open/append par ligne", bench_reopen), ("LogSink bufferisé", bench_sink))):
+            elapsed, size, stats = fn(os.path.join(tmp, f"bench_{i}.log"), lines)
+            print(f"{name:24s} {elapsed:8.3f} s  {len(lines) / elapsed:12,.0f} lignes/s  {size:,} octets")
+            if stats:
+                print(f"{'':24s} flushes={stats['flushes']}  latence flush moy={stats['flush_avg_ms']:.3f} ms  max={stats['flush_max_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
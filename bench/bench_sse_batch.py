@@ -0,0 +1,88 @@
+"""
+Benchmark du regroupement SSE : une frame par événement vs frames "batch" (fenêtre SSE_BATCH_WINDOW_S,
+progression réduite à sa dernière valeur), sur un job qui émet comme un hyperopt bavard.
+
+    python bench/bench_sse_batch.py [--rate 2000] [--duration 5] [--window 0.1]
+
+Les deux abonnés lisent le même job en parallèle. Mesures : frames/s, octets, temps CPU du lecteur (formatage)
+et mises à jour de progression que le navigateur devra appliquer (rendu : une passe par frame).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import SSE_BATCH_WINDOW_S, SSE_COALESCE_EVENTS, Job, job_sse_batch, job_sse_chunk  # noqa: E402
+
+
+def produce(job, rate, duration, warn_ratio):
+    rnd = random.Random(1)
+    end = time.monotonic() + duration
+    n = 0
+    while time.monotonic() < end:
+        n += 1
+        if rnd.random() < warn_ratio:
+            job.emit("warn", f"2025-01-01 12:00:00 - freqtrade.optimize - WARNING - epoch {n}: no trades")
+        else:
+            job.emit("hopt_progress", json.dumps({"current": n, "total": 10 ** 6, "best_loss": -0.1 - n * 1e-6}))
+        if n % max(1, int(rate / 100)) == 0:   # émission par rafales de ~10 ms
+            time.sleep(0.01)
+    job.emit("end", json.dumps({"returncode": 0}))
+    job.finish()
+
+
+def consume(job, batched, window, out):
+    sub = job.subscribe(0)
+    frames = size = updates = 0
+    cpu0 = time.thread_time()
+    try:
+        while True:
+            batch, lost = sub.next(1.0, window if batched else 0.0)
+            if not batch and job.done:
+                break
+            if not batch:
+                continue
+            chunk = job_sse_batch(batch, lost) if batched else job_sse_chunk(batch, lost)
+            frames += len(batch) if not batched else 1
+            size += len(chunk.encode("utf-8"))
+            if batched:
+                updates += len(json.loads(chunk.split("data: ", 1)[1]))
+            else:
+                updates += len(batch)
+    finally:
+        sub.close()
+    out.update(frames=frames, bytes=size, cpu=time.thread_time() - cpu0, updates=updates)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rate", type=float, default=2000.0, help="événements/s émis par le job")
+    ap.add_argument("--duration", type=float, default=5.0)
+    ap.add_argument("--window", type=float, default=SSE_BATCH_WINDOW_S)
+    ap.add_argument("--warn-ratio", type=float, default=0.05)
+    args = ap.parse_args()
+
+    job = Job("bench", {"action": "hyperopt"})
+    results = {"unitaire": {}, "batch": {}}
+    readers = [threading.Thread(target=consume, args=(job, False, 0.0, results["unitaire"])),
+               threading.Thread(target=consume, args=(job, True, args.window, results["batch"]))]
+    for t in readers:
+        t.start()
+    t0 = time.monotonic()
+    produce(job, args.rate, args.duration, args.warn_ratio)
+    for t in readers:
+        t.join()
+    elapsed = time.monotonic() - t0
+    print(f"{job.last_seq} événements en {elapsed:.1f} s, fenêtre {args.window * 1000:.0f} ms, "
+          f"regroupés : {', '.join(sorted(SSE_COALESCE_EVENTS))}")
+    for name, r in results.items():
+        print(f"{name:9s} {r['frames'] / elapsed:8.1f} frames/s  {r['bytes'] / 1024:9.1f} Ko  "
+              f"CPU lecteur {r['cpu'] * 1000:7.1f} ms  mises à jour UI {r['updates']:7d}")
+
+
+if __name__ == "__main__":
+    main()
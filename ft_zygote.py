@@ -0,0 +1,137 @@
+"""
+Zygote freqtrade (Linux / macOS) : un process qui a déjà importé freqtrade et ses dépendances lourdes
+(pandas, ccxt, ...) et qui fork un enfant prêt à l'emploi pour chaque commande. Lancé et piloté par app.py.
+
+Protocole (socket Unix, une connexion par commande) :
+  -> {"argv": ["backtesting", "--config", ...], "cwd": "...", "env": {...}}\\n
+  <- "PID <pid>\\n", la sortie de la commande (stdout + stderr), puis "\\0EXIT <code>\\n"
+
+    python ft_zygote.py --socket /tmp/ft_zygote.sock
+"""
+import argparse
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+
+PRELOAD = [
+    "freqtrade.main", "freqtrade.commands", "freqtrade.configuration", "freqtrade.resolvers",
+    "freqtrade.data.history", "freqtrade.data.dataprovider", "freqtrade.exchange",
+    "freqtrade.optimize.backtesting", "freqtrade.optimize.hyperopt", "freqtrade.strategy",
+    "pandas", "numpy", "ccxt",
+]
+EXIT_MARKER = "\0EXIT "
+
+
+def preload():
+    """Importe freqtrade (obligatoire) puis les modules lourds (au mieux)."""
+    importlib.import_module("freqtrade.main")
+    for name in PRELOAD:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"Préchargement de {name} impossible : {e}", file=sys.stderr, flush=True)
+
+
+def read_request(conn):
+    buf = b""
+    while not buf.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            raise ConnectionError("requête incomplète")
+        buf += chunk
+    return json.loads(buf.decode("utf-8"))
+
+
+def run_child(conn, req):
+    """Dans l'enfant forké : sortie standard vers la connexion, exécution de freqtrade, code retour en fin de flux."""
+    os.setsid()   # groupe de process propre : terminate() atteint aussi les workers d'hyperopt
+    for sig in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT, signal.SIGPIPE):
+        signal.signal(sig, signal.SIG_DFL)
+    code = 1
+    try:
+        os.chdir(req.get("cwd") or os.getcwd())
+        os.environ.update(req.get("env") or {})
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        sys.stdout = open(1, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+        sys.stdout.write(f"PID {os.getpid()}\n")
+        argv = list(req["argv"])
+        sys.argv = ["freqtrade"] + argv
+        try:
+            from freqtrade.main import main
+            main(argv)
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        sys.stdout.write(f"{EXIT_MARKER}{code}\n")
+        sys.stdout.flush()
+    finally:
+        os._exit(code)
+
+
+def serve(sock_path):
+    try:
+        preload()
+    except Exception as e:
+        print(f"UNAVAILABLE {e}", flush=True)
+        return 1
+    try:
+        os.unlink(sock_path)
+    except FileNotFoundError:
+        pass
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(sock_path)
+    os.chmod(sock_path, 0o600)
+    srv.listen(64)
+    srv.settimeout(1.0)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)   # enfants récupérés automatiquement (pas de zombies)
+    parent = os.getppid()
+    print("READY", flush=True)
+    try:
+        while os.getppid() == parent:               # app.py arrêtée -> le zygote s'arrête aussi
+            try:
+                conn, _ = srv.accept()
+            except socket.timeout:
+                continue
+            try:
+                conn.settimeout(10)
+                req = read_request(conn)
+                conn.settimeout(None)
+            except Exception:
+                conn.close()
+                continue
+            pid = os.fork()
+            if pid == 0:
+                srv.close()
+                run_child(conn, req)
+            conn.close()
+    finally:
+        srv.close()
+        try:
+            os.unlink(sock_path)
+        except OSError:
+            pass
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--socket", required=True)
+    args = ap.parse_args()
+    sys.exit(serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,627 @@
+const sources = {};
+const jobIds = {};
+// Données dynamiques injectées par index() (le reste de la page est statique et mis en cache)
+const BOOT = JSON.parse(document.getElementById('boot').textContent);
+const LOSS_ITEMS = BOOT.loss_items || [];
+const NB_CPU = BOOT.nb_cpu || 1;
+
+function toYMD(dstr){ if(!dstr) return ""; const [y,m,d]=dstr.split("-"); return `${y}${m}${d}`; }
+function openLogs(){ window.open('/logs/', '_blank'); }
+function appendColored(parent, cls, text, tag='span'){
+  const el = document.createElement(tag);
+  el.className = cls;
+  el.textContent = text;
+  parent.appendChild(el);
+  parent.appendChild(document.createTextNode("\n"));
+}
+
+// ?perf dans l'URL de la page : frames/s, événements/s et part du temps passée à rendre chaque flux (console)
+const PERF = new URLSearchParams(location.search).has('perf') ? {} : null;
+function perfRecord(action, nEvents, ms){
+  if(!PERF) return;
+  const p = PERF[action] || (PERF[action] = { frames: 0, events: 0, ms: 0, since: performance.now() });
+  p.frames++; p.events += nEvents; p.ms += ms;
+  const elapsed = performance.now() - p.since;
+  if(elapsed >= 5000){
+    console.info(`[perf] ${action} : ${(p.frames * 1000 / elapsed).toFixed(1)} frames/s, `
+      + `${(p.events * 1000 / elapsed).toFixed(0)} événements/s, rendu ${(p.ms * 100 / elapsed).toFixed(2)} % du temps`);
+    delete PERF[action];
+  }
+}
+
+function setBarProgress(barId, textId, current, total){
+  const bar = document.getElementById(barId);
+  const txt = document.getElementById(textId);
+  const pct = total > 0 ? Math.min(100, Math.floor(100*current/total)) : 0;
+  if (bar) bar.style.width = pct + "%";
+  if (txt) txt.textContent = `${current} / ${total} (${pct}%)`;
+}
+function resetHyperoptProgress(total){
+  setBarProgress('hoptProgressBar', 'hoptProgressText', 0, total || 0);
+}
+
+function applySpacesRules(){
+  const boxes = Array.from(document.querySelectorAll("input[name='spaces']"));
+  if (!boxes.length) return;
+  const allBox = boxes.find(b => b.value === "all");
+  const defBox = boxes.find(b => b.value === "default");
+  const wantedDefault = ["buy","sell","roi","stoploss"];
+
+  const setDis = (b, disabled) => {
+    b.disabled = !!disabled;
+    const lbl = b.parentElement;
+    lbl.style.opacity = disabled ? .6 : 1;
+  };
+
+  if (allBox && allBox.checked){
+    boxes.forEach(b => { if (b !== allBox){ b.checked = false; setDis(b, true); } else setDis(b, false); });
+    return;
+  }
+  if (defBox && defBox.checked){
+    boxes.forEach(b => {
+      if (b.value === "default"){ setDis(b, false); }
+      else if (wantedDefault.includes(b.value)){ b.checked = true; setDis(b, true); }
+      else { b.checked = false; setDis(b, true); }
+    });
+    return;
+  }
+  boxes.forEach(b => setDis(b, false));
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+  document.getElementById('start_date').value = BOOT.default_date_input || "";
+  document.getElementById('end_date').value = BOOT.default_end_date_input || "";
+  applyState(BOOT.state || {});
+  const stratSel = document.getElementById('strategy');
+  if(stratSel && BOOT.default_strategy && (BOOT.state?.strategies || []).includes(BOOT.default_strategy)) stratSel.value = BOOT.default_strategy;
+  fillRange(document.getElementById('dl_parallel'), BOOT.dl_max_parallel || 1);
+  fillRange(document.getElementById('batch_parallel'), NB_CPU);
+
+  applySpacesRules();
+  document.querySelectorAll("input[name='spaces']").forEach(b => b.addEventListener("change", applySpacesRules));
+
+  const lossSel = document.getElementById('hyperoptloss');
+  const lossDesc = document.getElementById('lossDesc');
+  if (lossSel){
+    LOSS_ITEMS.forEach(it => {
+      const opt = document.createElement('option');
+      opt.value = it.value; opt.textContent = it.label; opt.title = it.desc;
+      lossSel.appendChild(opt);
+    });
+    lossSel.value = "OnlyProfitHyperOptLoss";
+    const updateDesc = () => {
+      const cur = LOSS_ITEMS.find(x => x.value === lossSel.value);
+      lossDesc.textContent = cur ? cur.desc : "";
+    };
+    lossSel.addEventListener('change', updateDesc);
+    updateDesc();
+  }
+
+  const campLosses = document.getElementById('campLosses');
+  LOSS_ITEMS.forEach(it => {
+    const lbl = document.createElement('label');
+    lbl.title = it.desc;
+    lbl.innerHTML = `<input type="checkbox" name="camp_loss" value="${it.value}"${it.value === 'OnlyProfitHyperOptLoss' ? ' checked' : ''}> `;
+    lbl.appendChild(document.createTextNode(it.label));
+    campLosses.appendChild(lbl);
+  });
+  fillRange(document.getElementById('camp_parallel'), NB_CPU);
+  loadLastCampaign();
+
+  const jwSel = document.getElementById('jobworkers');
+  if (jwSel){
+    const max = Math.max(1, NB_CPU || 1);
+    for (let i=1;i<=max;i++){
+      const opt = document.createElement('option');
+      opt.value = String(i); opt.textContent = String(i);
+      jwSel.appendChild(opt);
+    }
+    jwSel.value = String(max);
+  }
+
+  ['start_date', 'end_date'].forEach(id => document.getElementById(id).addEventListener('change', refreshCoverage));
+  document.querySelectorAll("input[name='tf']").forEach(b => b.addEventListener('change', refreshCoverage));
+  refreshCoverage();
+
+  resumeJobs();
+});
+
+// Options 1..max, max sélectionné par défaut
+function fillRange(sel, max){
+  if(!sel) return;
+  sel.innerHTML = "";
+  for(let i = 1; i <= max; i++){
+    const opt = document.createElement('option'); opt.value = String(i); opt.textContent = String(i);
+    sel.appendChild(opt);
+  }
+  sel.value = String(max);
+}
+function fillSelect(sel, values, { placeholder = null } = {}){
+  if(!sel) return;
+  const cur = sel.value;
+  sel.innerHTML = "";
+  if(placeholder !== null){
+    const ph = document.createElement('option'); ph.value = ""; ph.textContent = placeholder; if(cur === "") ph.selected = true; sel.appendChild(ph);
+  }
+  values.forEach(v => { const opt = document.createElement('option'); opt.value = v; opt.textContent = v; if(v === cur) opt.selected = true; sel.appendChild(opt); });
+}
+function applyState(state){
+  fillSelect(document.getElementById('strategy'), state.strategies || []);
+  fillSelect(document.getElementById('bt_json_sel'), state.json_files || [], { placeholder: "— Utiliser le {strategy}.json courant —" });
+  fillSelect(document.getElementById('apply_json_sel'), state.json_files_apply || []);
+  fillSelect(document.getElementById('git_path'), state.git_paths_list || []);
+  const pc = document.getElementById('pairCount'); if(pc && typeof state.pair_count === 'number') pc.textContent = state.pair_count;
+  const tf = document.getElementById('cfgTimeframe'); if(tf) tf.textContent = state.timeframe || "?";
+  const sk = document.getElementById('cfgStake'); if(sk) sk.textContent = state.stake_currency || "?";
+}
+// Une seule requête /api/state ; le navigateur revalide via ETag (304 si rien n'a changé côté disque).
+async function refreshLists(){
+  let state;
+  try{
+    const r = await fetch('/api/state', { cache: 'no-cache' }); if(!r.ok) return;
+    state = await r.json();
+  }catch(_){ return; }
+  applyState(state);
+  refreshCoverage();
+}
+
+// Couverture des données (inventaire OHLCV) pour la plage choisie : grille paires × timeframes
+const COV_LABELS = { ok: 'complet', gaps: 'complet, avec trous', partial: 'incomplet', missing: 'absent' };
+function fmtTs(ms){ return ms ? new Date(ms).toISOString().slice(0, 16).replace('T', ' ') : '-'; }
+async function refreshCoverage(){
+  const cfgTf = (document.getElementById('cfgTimeframe')?.textContent || '').trim();
+  const tfs = Array.from(new Set([cfgTf, ...collectTimeframes()].filter(t => t && t !== '?' && t !== '…')));
+  const params = new URLSearchParams({
+    start_ymd: toYMD(document.getElementById('start_date').value),
+    end_ymd: toYMD(document.getElementById('end_date').value),
+    tfs: tfs.join(','),
+  });
+  let inv;
+  try{
+    const r = await fetch('/api/data/inventory?' + params); if(!r.ok) return;
+    inv = await r.json();
+  }catch(_){ return; }
+  const total = inv.pairs.length;
+  const ready = (tf) => { const s = inv.summary[tf] || {}; return (s.ok || 0) + (s.gaps || 0); };
+  const dr = document.getElementById('dataReady');
+  if(dr && cfgTf && inv.summary[cfgTf]){
+    dr.textContent = `${ready(cfgTf)}/${total} paires prêtes (${cfgTf})`;
+    dr.className = ready(cfgTf) === total ? 'ok' : 'warn';
+  }
+  document.getElementById('coverageSummary').textContent =
+    inv.timeframes.map(tf => `${tf} : ${ready(tf)}/${total}`).join(' · ') + (inv.ready ? ' — prêt pour le backtest' : '');
+  const table = document.createElement('table');
+  const head = table.createTHead().insertRow();
+  ['Paire', ...inv.timeframes].forEach(t => { const th = document.createElement('th'); th.textContent = t; head.appendChild(th); });
+  const body = table.createTBody();
+  inv.pairs.forEach(pair => {
+    const tr = body.insertRow();
+    tr.insertCell().textContent = pair;
+    inv.timeframes.forEach(tf => {
+      const c = inv.cells[pair][tf];
+      const td = tr.insertCell();
+      td.className = 'cov-' + c.status;
+      td.textContent = c.rows === null || c.rows === undefined ? '' : String(c.rows);
+      td.title = `${pair} ${tf} : ${COV_LABELS[c.status]}\n${fmtTs(c.first)} → ${fmtTs(c.last)}` +
+                 (c.gaps ? `\n${c.gaps} trou(s), ${c.missing_candles} bougie(s) manquante(s)` : '');
+    });
+  });
+  document.getElementById('coverageGrid').replaceChildren(table);
+}
+
+function collectTimeframes(){ return Array.from(document.querySelectorAll("input[name='tf']:checked")).map(b => b.value); }
+function setDownloadProgress(current, total){
+  setBarProgress('dlProgressBar', 'dlProgressText', current, total);
+}
+
+function runningStatus(action, suffix){
+  const stEl = document.getElementById('status-'+action);
+  stEl.innerHTML = `Exécution en cours…${suffix || ''} <a href="#" onclick="cancelJob('${action}'); return false;">annuler</a>`;
+}
+function fmtDelay(s){
+  if(s < 60) return 'moins d’une minute';
+  const m = Math.round(s / 60);
+  return m < 60 ? `${m} min` : `${Math.floor(m / 60)} h ${String(m % 60).padStart(2, '0')}`;
+}
+function queuedStatus(action, q){
+  const stEl = document.getElementById('status-'+action);
+  const at = new Date(Date.now() + 1000 * (q.eta_s || 0)).toTimeString().slice(0, 5);
+  stEl.innerHTML = `<span class="warn">En file d’attente : position ${q.position}</span>`
+    + ` · ${q.slots}/${q.capacity} cœur(s) · début estimé dans ${fmtDelay(q.eta_s || 0)} (~${at})`
+    + ` <a href="#" onclick="cancelJob('${action}'); return false;">annuler</a>`;
+}
+
+async function startStream(action, extraParams={}){
+  if(sources[action]) sources[action].close();
+
+  const strategy = document.getElementById('strategy').value.trim();
+  const start_date = document.getElementById('start_date')?.value || "";
+  const end_date = document.getElementById('end_date')?.value || "";
+  const start_ymd = toYMD(start_date);
+  const end_ymd = toYMD(end_date);
+
+  const outEl = document.getElementById('out-'+action);
+  const stEl  = document.getElementById('status-'+action);
+  outEl.textContent = ""; stEl.textContent = "Exécution en cours…";
+
+  const params = new URLSearchParams({ action, strategy, start_ymd, ...extraParams });
+  if (action === 'backtest' && end_ymd) params.set('end_ymd', end_ymd);
+  if (action === 'batch_backtest' && end_ymd) params.set('end_ymd', end_ymd);
+  if (action === 'walk_forward' && end_ymd) params.set('end_ymd', end_ymd);
+  if (action === 'hyperopt' && end_ymd) params.set('end_ymd', end_ymd);
+
+  if(action === 'download'){ setDownloadProgress(0, 0); }
+  if(action === 'hyperopt'){
+    const tot = parseInt(extraParams.epochs || '100', 10);
+    resetHyperoptProgress(tot);
+  }
+
+  let job = null;
+  try{
+    const r = await fetch('/api/jobs', { method: 'POST', body: params });
+    if(r.ok) job = await r.json();
+  }catch(_){}
+  if(!job || !job.job_id){
+    stEl.innerHTML = '<span class="err">Impossible de lancer le job</span>';
+    return;
+  }
+  attachJob(action, job.job_id);
+}
+
+// Se (re)branche sur le flux d'un job serveur ; le navigateur renvoie Last-Event-ID en cas de reconnexion.
+// Flux groupé (?batch=1) : une frame "batch" = liste [[event, data], ...] rendue en une seule passe.
+function attachJob(action, jobId){
+  if(sources[action]) sources[action].close();
+  const outEl = document.getElementById('out-'+action);
+  const stEl  = document.getElementById('status-'+action);
+  const src = new EventSource('/jobs/'+encodeURIComponent(jobId)+'/stream?batch=1');
+  sources[action] = src;
+  jobIds[action] = jobId;
+  runningStatus(action);
+  if(action === 'batch_backtest'){ batchState.rows = []; renderBatchTable(); }
+  if(action === 'walk_forward') showWalkForward([], null);
+
+  let queued = null;   // dernier état de file reçu (un rattachement Last-Event-ID ne le rejoue pas)
+  src.onopen = () => queued ? queuedStatus(action, queued) : runningStatus(action);
+
+  let tableDirty = false;   // tableau batch re-rendu une fois par frame
+  // Sorties texte : ajoutées à un fragment, inséré une fois par batch
+  const output = {
+    line: (frag, data) => appendColored(frag, 'muted', data, 'div'),   // commande exécutée, lignes d'info
+    warn: (frag, data) => appendColored(frag, 'warn', data),
+    err:  (frag, data) => appendColored(frag, 'err', data),
+    result: (frag, data) => {
+      const div = document.createElement('div');
+      div.className = 'result';
+      div.textContent = data;
+      frag.appendChild(div);
+    },
+  };
+
+  const handlers = {
+    meta: data => {
+      const meta = JSON.parse(data);
+      if(action === 'download' && typeof meta.total_steps === 'number'){
+        setDownloadProgress(0, meta.total_steps);
+      }
+      if(action === 'hyperopt' && typeof meta.epochs_total === 'number'){
+        resetHyperoptProgress(meta.epochs_total);
+      }
+    },
+    progress: data => {
+      const d = JSON.parse(data);
+      if(action === 'batch_backtest') setBarProgress('batchProgressBar', 'batchProgressText', d.current||0, d.total||0);
+      else if(action === 'walk_forward') setBarProgress('wfProgressBar', 'wfProgressText', d.current||0, d.total||0);
+      else setDownloadProgress(d.current||0, d.total||0);
+    },
+    batch_row: data => { batchState.rows.push(JSON.parse(data)); tableDirty = true; },
+    batch_summary: data => { batchState.rows = JSON.parse(data); tableDirty = true; },
+    wf_row: data => { const r = JSON.parse(data); wfRows[r.window] = r; tableDirty = true; },
+    wf_report: data => { const d = JSON.parse(data); showWalkForward(d.rows, d.stability); },
+    queue: data => {
+      const q = JSON.parse(data);
+      queued = q.state === 'queued' ? q : null;
+      if(queued) queuedStatus(action, q);
+      else runningStatus(action);
+    },
+    hopt_progress: data => {
+      const d = JSON.parse(data);
+      setBarProgress('hoptProgressBar', 'hoptProgressText', d.current||0, d.total||0);
+      const extra = [];
+      if(typeof d.best_loss === 'number') extra.push(`best loss ${d.best_loss.toFixed(5)}`);
+      if(typeof d.trades === 'number') extra.push(`${d.trades} trades`);
+      if(typeof d.profit === 'number') extra.push(`profit ${d.profit.toFixed(2)}%`);
+      if(extra.length){ document.getElementById('hoptProgressText').textContent += ' — ' + extra.join(' · '); }
+    },
+  };
+
+  function finish(data){
+    try{
+      const d = JSON.parse(data);
+      const ok = d.returncode === 0;
+      const cls = ok ? 'ok' : 'err';
+      const txt = ok ? 'Terminé ✓' : 'Terminé avec erreurs ✗';
+      const link = d.log_download ? ` — Log : <a href="${d.log_download}" target="_blank">ouvrir</a>` : '';
+      stEl.innerHTML = `<span class="${cls}">${txt}</span>${link}`;
+      if(action === 'download' && ok && d.total_steps){ setDownloadProgress(d.total_steps, d.total_steps); }
+      if(action === 'hyperopt' && typeof d.epochs_total === 'number'){ setBarProgress('hoptProgressBar','hoptProgressText', d.epochs_total, d.epochs_total); }
+    }catch(_){
+      stEl.innerHTML = `<span class="err">Terminé (parsing meta échoué)</span>`;
+    }
+    src.close(); delete sources[action]; delete jobIds[action];
+    refreshLists();
+  }
+
+  src.addEventListener('batch', ev => {
+    const t0 = performance.now();
+    const events = JSON.parse(ev.data);
+    const frag = document.createDocumentFragment();
+    let ended = null;
+    for(const [event, data] of events){
+      if(output[event]) output[event](frag, data);
+      else if(event === 'end') ended = data;
+      else if(handlers[event]){ try{ handlers[event](data); }catch(_){} }
+    }
+    if(frag.childNodes.length){
+      outEl.appendChild(frag);
+      outEl.scrollTop = outEl.scrollHeight;
+    }
+    if(tableDirty){
+      tableDirty = false;
+      if(action === 'walk_forward') showWalkForward(Object.values(wfRows), null);
+      else renderBatchTable();
+    }
+    perfRecord(action, events.length, performance.now() - t0);
+    if(ended !== null) finish(ended);
+  });
+
+  src.onerror = () => {
+    if(src.readyState === EventSource.CONNECTING){
+      stEl.innerHTML = '<span class="warn">Connexion perdue, reprise du flux…</span>';
+      return;
+    }
+    stEl.innerHTML = '<span class="err">Erreur de streaming</span>';
+    src.close(); delete sources[action]; delete jobIds[action];
+    refreshLists();
+  };
+}
+
+async function cancelJob(action){
+  const jobId = jobIds[action];
+  if(!jobId) return;
+  try{ await fetch('/jobs/'+encodeURIComponent(jobId)+'/cancel', { method: 'POST' }); }catch(_){}
+}
+
+// Après un rechargement de page : on se rattache aux jobs encore en cours (rejeu complet du buffer).
+async function resumeJobs(){
+  let jobs = [];
+  try{
+    const r = await fetch('/api/jobs'); if(!r.ok) return;
+    ({ jobs = [] } = await r.json());
+  }catch(_){ return; }
+  jobs.filter(j => !j.done && document.getElementById('out-'+j.action)).forEach(j => {
+    document.getElementById('out-'+j.action).textContent = "";
+    attachJob(j.action, j.job_id);
+  });
+}
+
+// Tableau récapitulatif du batch backtest (tri par clic sur l'en-tête)
+const batchState = { rows: [], sortKey: 'profit_pct', sortDir: -1 };
+const BATCH_COLS = [['json','JSON'], ['profit_pct','Profit %'], ['profit_abs','Profit'], ['drawdown_pct','Drawdown %'],
+                    ['trades','Trades'], ['win_rate','Win %'], ['returncode','RC'], ['cached','Cache']];
+function renderBatchTable(){
+  const host = document.getElementById('batchTable');
+  if(!host) return;
+  host.innerHTML = "";
+  if(!batchState.rows.length) return;
+  const { sortKey, sortDir } = batchState;
+  const rows = batchState.rows.slice().sort((a, b) => {
+    const va = a[sortKey], vb = b[sortKey];
+    if(va === vb) return 0;
+    if(va === null || va === undefined) return 1;
+    if(vb === null || vb === undefined) return -1;
+    return (va < vb ? -1 : 1) * sortDir;
+  });
+  const table = document.createElement('table'); table.className = 'sortable';
+  const head = table.createTHead().insertRow();
+  BATCH_COLS.forEach(([key, label]) => {
+    const th = document.createElement('th');
+    th.textContent = label + (key === sortKey ? (sortDir > 0 ? ' ▲' : ' ▼') : '');
+    th.onclick = () => {
+      batchState.sortDir = (batchState.sortKey === key) ? -batchState.sortDir : -1;
+      batchState.sortKey = key;
+      renderBatchTable();
+    };
+    head.appendChild(th);
+  });
+  const body = table.createTBody();
+  rows.forEach(r => {
+    const tr = body.insertRow();
+    BATCH_COLS.forEach(([key]) => { tr.insertCell().textContent = (r[key] === null || r[key] === undefined) ? '-' : String(r[key]); });
+  });
+  host.appendChild(table);
+}
+
+function startBatchBacktest(){
+  const pattern = (document.getElementById('batch_glob')?.value || '').trim();
+  if(!pattern){ alert("Indique un ou plusieurs motifs de fichiers .json (ex : eZ3_scalp3m_*.json)"); return; }
+  const batch_parallel = document.getElementById('batch_parallel')?.value || '1';
+  setBarProgress('batchProgressBar', 'batchProgressText', 0, 0);
+  startStream('batch_backtest', { bt_glob: pattern, batch_parallel, force: btForce() });
+}
+
+// Walk-forward : une ligne par fenêtre (in-sample / out-of-sample) puis le rapport de stabilité
+let wfRows = {};
+function showWalkForward(rows, stability){
+  if(!rows.length) wfRows = {};
+  const host = document.getElementById('wfTable');
+  host.innerHTML = '';
+  if(rows.length){
+    host.appendChild(simpleTable([
+      ['window', 'Fenêtre'], ['is_range', 'In-sample'], [r => fmtPct(r.is_profit_pct), 'IS %'], ['oos_range', 'Out-of-sample'],
+      [r => fmtPct(r.profit_pct), 'Profit %'], ['drawdown_pct', 'Drawdown %'], ['trades', 'Trades'], ['win_rate', 'Win %'],
+      ['efficiency', 'Efficacité'], ['returncode', 'RC'], ['cached', 'Cache'],
+    ], rows));
+  }
+  const stab = document.getElementById('wfStability');
+  stab.innerHTML = '';
+  if(stability){
+    stab.appendChild(simpleTable([
+      ['measured', 'Fenêtres'], ['profit_mean', 'Profit moyen %'], ['profit_std', 'Écart-type %'], ['profit_min', 'Min %'],
+      ['profit_max', 'Max %'], ['profitable_pct', 'Gagnantes %'], ['cv', 'Coef. variation'], ['drawdown_max', 'DD max %'],
+      ['efficiency_mean', 'Efficacité moy.'],
+    ], [stability]));
+  }
+}
+function startWalkForward(){
+  const optimize = document.getElementById('wf_optimize').checked;
+  const extra = {
+    wf_windows: String(Math.max(2, parseInt(document.getElementById('wf_windows').value || '4', 10))),
+    wf_mode: document.getElementById('wf_mode').value,
+    wf_optimize: optimize ? "1" : "0",
+    wf_oos_pct: document.getElementById('wf_oos_pct').value || '25',
+    batch_parallel: document.getElementById('batch_parallel')?.value || '1',
+    force: btForce(),
+  };
+  const chosen = document.getElementById('bt_json_sel')?.value || "";
+  if(chosen) extra.bt_json = chosen;
+  if(optimize){
+    extra.epochs = String(Math.max(1, parseInt(document.getElementById('epochs').value || '100', 10)));
+    extra.spaces = Array.from(document.querySelectorAll("input[name='spaces']:checked")).map(b => b.value).join(",");
+    extra.hyperopt_loss = (document.getElementById('hyperoptloss')?.value || 'OnlyProfitHyperOptLoss').trim();
+  }
+  setBarProgress('wfProgressBar', 'wfProgressText', 0, 0);
+  startStream('walk_forward', extra);
+}
+
+function startDownload(){
+  const tfs = collectTimeframes();
+  const erase = document.getElementById('dl_erase').checked ? "1" : "0";
+  const dl_parallel = document.getElementById('dl_parallel')?.value || "1";
+  const dl_chunk = String(Math.max(0, parseInt(document.getElementById('dl_chunk')?.value || '0', 10) || 0));
+  const dl_resample = document.getElementById('dl_resample')?.checked ? "1" : "0";
+  startStream('download', { tfs: tfs.join(","), erase, dl_parallel, dl_chunk, dl_resample });
+}
+function btForce(){ return document.getElementById('bt_force')?.checked ? "1" : "0"; }
+function startBacktest(){
+  const chosen = document.getElementById('bt_json_sel')?.value || "";
+  const extra = { force: btForce() }; if(chosen) extra.bt_json = chosen;
+  startStream('backtest', extra);
+}
+function startHyperopt(){
+  const epochs = Math.max(1, parseInt(document.getElementById('epochs').value || '100', 10));
+  const spaces = Array.from(document.querySelectorAll("input[name='spaces']:checked")).map(b => b.value);
+  const loss = (document.getElementById('hyperoptloss')?.value || 'OnlyProfitHyperOptLoss').trim();
+  const jobw = (document.getElementById('jobworkers')?.value || '').trim();
+  startStream('hyperopt', {
+    epochs:String(epochs),
+    spaces: spaces.join(","),
+    hyperopt_loss: loss,
+    job_workers: jobw
+  });
+}
+function startApplyStrategy(){
+  const chosen = document.getElementById('apply_json_sel')?.value || "";
+  if(!chosen){ alert("Sélectionne un fichier .json à appliquer !"); return; }
+  startStream('apply_strategy', { apply_json: chosen });
+}
+function startGitPush(){
+  const val = document.getElementById('git_path')?.value || "";
+  if(!val){
+    document.getElementById('status-git_push').textContent = "Aucun chemin Git sélectionné.";
+    document.getElementById('out-git_push').textContent = "";
+    return;
+  }
+  startStream('git_push', { git_path_single: val });
+}
+
+// Campagnes hyperopt : classement rafraîchi tant que la campagne tourne
+let campaignId = null, campaignTimer = null;
+function simpleTable(cols, rows){
+  const table = document.createElement('table'); table.className = 'sortable';
+  const head = table.createTHead().insertRow();
+  cols.forEach(([, label]) => { const th = document.createElement('th'); th.textContent = label; head.appendChild(th); });
+  const body = table.createTBody();
+  rows.forEach(r => {
+    const tr = body.insertRow();
+    cols.forEach(([key]) => {
+      const v = typeof key === 'function' ? key(r) : r[key];
+      tr.insertCell().textContent = (v === null || v === undefined) ? '-' : String(v);
+    });
+  });
+  return table;
+}
+const fmtPct = v => (typeof v === 'number') ? v.toFixed(2) : v;
+function showCampaign(board){
+  const c = board.campaign, runs = board.runs || [];
+  campaignId = c.id;
+  const n = st => runs.filter(r => r.status === st).length;
+  const action = c.status === 'running'
+    ? `<a href="#" onclick="campaignAction('cancel'); return false;">annuler</a>`
+    : ((n('error') || n('cancelled') || n('pending')) ? `<a href="#" onclick="campaignAction('resume'); return false;">reprendre</a>` : '');
+  const cls = c.status === 'running' ? '' : (n('error') ? 'warn' : 'ok');
+  const name = document.createElement('span');
+  name.textContent = c.name;
+  document.getElementById('campStatus').innerHTML =
+    `<span class="${cls}">${name.innerHTML} — ${c.status}</span> : ${n('done') + n('skipped')} / ${runs.length} faits`
+    + ` (${n('skipped')} déjà calculés) · ${n('running')} en cours · ${n('error')} en erreur ${action}`;
+  const host = document.getElementById('campTable');
+  host.innerHTML = '';
+  host.appendChild(simpleTable([
+    [r => runs.indexOf(r) + 1, '#'], ['hyperopt_loss', 'Loss'], [r => `${r.start_ymd}-${r.end_ymd}`, 'Timerange'],
+    ['spaces', 'Spaces'], ['status', 'Statut'], ['trades', 'Trades'], [r => fmtPct(r.profit_pct), 'Profit %'],
+    ['loss', 'Objective'], ['params_name', 'JSON'],
+  ], runs));
+  const robust = document.getElementById('campRobust');
+  robust.innerHTML = '';
+  if((board.robustness || []).length){
+    robust.appendChild(simpleTable([
+      ['hyperopt_loss', 'Loss'], ['spaces', 'Spaces'], ['runs', 'Timeranges'],
+      [r => fmtPct(r.min_profit_pct), 'Profit min %'], [r => fmtPct(r.mean_profit_pct), 'Profit moyen %'],
+      [r => fmtPct(r.max_profit_pct), 'Profit max %'],
+    ], board.robustness));
+  }
+  clearTimeout(campaignTimer);
+  if(c.status === 'running') campaignTimer = setTimeout(refreshCampaign, 5000);
+}
+async function refreshCampaign(){
+  if(!campaignId) return;
+  try{
+    const r = await fetch('/api/campaigns/' + encodeURIComponent(campaignId));
+    if(r.ok) showCampaign(await r.json());
+  }catch(_){ campaignTimer = setTimeout(refreshCampaign, 5000); }
+}
+async function loadLastCampaign(){
+  try{
+    const r = await fetch('/api/campaigns'); if(!r.ok) return;
+    const { campaigns = [] } = await r.json();
+    if(campaigns.length){ campaignId = campaigns[0].id; refreshCampaign(); }
+  }catch(_){}
+}
+async function campaignAction(what){
+  if(!campaignId) return;
+  try{
+    const r = await fetch(`/api/campaigns/${encodeURIComponent(campaignId)}/${what}`, { method: 'POST' });
+    if(r.ok) showCampaign(await r.json());
+  }catch(_){}
+}
+async function startCampaign(){
+  const st = document.getElementById('campStatus');
+  const params = new URLSearchParams({
+    strategy: document.getElementById('strategy').value.trim(),
+    losses: Array.from(document.querySelectorAll("input[name='camp_loss']:checked")).map(b => b.value).join(','),
+    timeranges: document.getElementById('camp_ranges').value.trim(),
+    spaces: document.getElementById('camp_spaces').value.trim(),
+    epochs: String(Math.max(1, parseInt(document.getElementById('epochs').value || '100', 10))),
+    job_workers: (document.getElementById('jobworkers')?.value || '').trim(),
+    parallel: document.getElementById('camp_parallel').value,
+  });
+  try{
+    const r = await fetch('/api/campaigns', { method: 'POST', body: params });
+    const data = await r.json();
+    if(!r.ok){ st.innerHTML = '<span class="err"></span>'; st.firstChild.textContent = data.error || 'Campagne refusée'; return; }
+    showCampaign(data);
+  }catch(_){
+    st.innerHTML = '<span class="err">Impossible de lancer la campagne</span>';
+  }
+}
@@ -0,0 +1,105 @@
+const BOOT = JSON.parse(document.getElementById('boot').textContent);
+const FILE = encodeURIComponent(BOOT.filename);
+const WINDOW = BOOT.window || 500;
+const view = { start: 0, total: 0, endOffset: 0, highlight: -1 };
+let tail = null;
+
+const linesEl = document.getElementById('logLines');
+
+function lineNode(n, text){
+  const div = document.createElement('div');
+  if (n === view.highlight) div.className = 'hit';
+  const ln = document.createElement('span');
+  ln.className = 'ln';
+  ln.textContent = n + 1;
+  div.appendChild(ln);
+  div.appendChild(document.createTextNode(text));
+  return div;
+}
+
+function updateInfo(){
+  const last = view.start + linesEl.childElementCount;
+  document.getElementById('viewInfo').textContent =
+    `lignes ${view.total ? view.start + 1 : 0}–${last} / ${view.total}`;
+}
+
+async function loadWindow(start){
+  const r = await fetch(`/api/logs/${FILE}/lines?start=${Math.max(0, start)}&count=${WINDOW}`);
+  const j = await r.json();
+  if (!r.ok){ document.getElementById('viewInfo').textContent = j.error || 'Erreur'; return; }
+  view.start = j.start; view.total = j.total_lines; view.endOffset = j.end_offset;
+  linesEl.replaceChildren(...j.lines.map((t, i) => lineNode(j.start + i, t)));
+  updateInfo();
+  return j;
+}
+
+async function loadLast(){
+  const r = await fetch(`/api/logs/${FILE}/lines?start=-1&count=${WINDOW}`);
+  const j = await r.json();
+  await loadWindow(j.start);
+  linesEl.scrollTop = linesEl.scrollHeight;
+}
+
+function gotoLine(n){
+  const line = (n === undefined ? parseInt(document.getElementById('goto_line').value || '1', 10) : n + 1) - 1;
+  view.highlight = line;
+  loadWindow(line - Math.floor(WINDOW / 2)).then(() => {
+    const hit = linesEl.querySelector('.hit');
+    if (hit) hit.scrollIntoView({ block: 'center' });
+  });
+}
+
+// Suivi en direct : n'ajoute que les octets nouveaux, et garde au plus 2 fenêtres dans le DOM.
+async function toggleFollow(){
+  if (tail){ tail.close(); tail = null; }
+  if (!document.getElementById('follow').checked) return;
+  await loadLast();
+  let partial = '';
+  tail = new EventSource(`/api/logs/${FILE}/tail?offset=${view.endOffset}`);
+  tail.addEventListener('chunk', (e) => {
+    const j = JSON.parse(e.data);
+    const parts = (partial + j.data).split('\n');
+    partial = parts.pop();
+    const frag = document.createDocumentFragment();
+    parts.forEach(t => frag.appendChild(lineNode(view.total++, t)));
+    linesEl.appendChild(frag);
+    while (linesEl.childElementCount > 2 * WINDOW){ linesEl.firstChild.remove(); view.start++; }
+    updateInfo();
+    linesEl.scrollTop = linesEl.scrollHeight;
+  });
+  tail.addEventListener('end', () => {
+    if (partial){ linesEl.appendChild(lineNode(view.total++, partial)); partial = ''; updateInfo(); }
+    tail.close(); tail = null;
+    document.getElementById('follow').checked = false;
+  });
+}
+
+async function runSearch(from){
+  const q = document.getElementById('search_q').value;
+  const box = document.getElementById('searchResults');
+  const info = document.getElementById('searchInfo');
+  if (!from) box.replaceChildren();
+  if (!q) { info.textContent = ''; return; }
+  const params = new URLSearchParams({ q, from: from || 0 });
+  if (document.getElementById('search_regex').checked) params.set('regex', '1');
+  if (document.getElementById('search_icase').checked) params.set('icase', '1');
+  info.textContent = 'Recherche…';
+  const r = await fetch(`/api/logs/${FILE}/search?${params}`);
+  const j = await r.json();
+  if (!r.ok){ info.textContent = j.error || 'Erreur'; return; }
+  j.matches.forEach(m => {
+    const div = document.createElement('div');
+    div.textContent = `${String(m.line + 1).padStart(7)}  ${m.text}`;
+    div.onclick = () => gotoLine(m.line);
+    box.appendChild(div);
+  });
+  info.textContent = `${box.childElementCount} résultat(s)`;
+  if (j.next_offset !== null){
+    const more = document.createElement('a');
+    more.href = '#'; more.textContent = ' — suite';
+    more.onclick = (e) => { e.preventDefault(); more.remove(); runSearch(j.next_offset); };
+    info.appendChild(more);
+  }
+}
+
+document.addEventListener('DOMContentLoaded', () => loadWindow(0));